@@ -2,82 +2,30 @@
 Classe base para agentes do sistema.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-import os
+import time
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
+from langchain_core.messages import AIMessage
 from rag.hybrid_retriever import HybridRetriever
-
-# Tentar importar diferentes tipos de LLM
-try:
-    from langchain_ollama import ChatOllama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
-
-try:
-    from langchain_openai import ChatOpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
-try:
-    from langchain_community.llms import LlamaCpp
-    LLAMACPP_AVAILABLE = True
-except ImportError:
-    LLAMACPP_AVAILABLE = False
+from agents.llm_pool import LLMBusyError, get_llm_pool
+from agents.response_cache import embed_query, fingerprint, get_response_cache, prompt_fingerprint
 
 
 def _get_llm(model_name: str = None, temperature: float = 0.7):
     """
     Obtém o LLM apropriado baseado na configuração.
     
+    O cliente vem do registro compartilhado do processo (``agents/llm_pool.py``):
+    agentes com a mesma configuração usam o mesmo cliente, as mesmas
+    conexões e a mesma fila de chamadas.
+    
     Prioridade:
     1. Ollama (se disponível e configurado)
     2. OpenAI (se API key disponível)
     3. LlamaCpp (se disponível)
     """
-    # Verificar variáveis de ambiente
-    use_ollama = os.getenv("USE_OLLAMA", "false").lower() == "true"
-    ollama_model = os.getenv("OLLAMA_MODEL", "llama3.2")
-    openai_key = os.getenv("OPENAI_API_KEY")
-    
-    # Prioridade 1: Ollama (local, gratuito)
-    if use_ollama and OLLAMA_AVAILABLE:
-        try:
-            return ChatOllama(model=ollama_model, temperature=temperature)
-        except Exception as e:
-            print(f"Aviso: Não foi possível conectar ao Ollama: {e}")
-            print("Certifique-se de que o Ollama está rodando: ollama serve")
-    
-    # Prioridade 2: OpenAI (se API key disponível)
-    if openai_key and OPENAI_AVAILABLE:
-        model = model_name or os.getenv("OPENAI_MODEL", "gpt-4")
-        return ChatOpenAI(model=model, temperature=temperature)
-    
-    # Prioridade 3: LlamaCpp (local, se disponível)
-    if LLAMACPP_AVAILABLE:
-        model_path = os.getenv("LLAMA_MODEL_PATH")
-        if model_path and os.path.exists(model_path):
-            return LlamaCpp(
-                model_path=model_path,
-                temperature=temperature,
-                n_ctx=2048,
-                verbose=False
-            )
-    
-    # Fallback: Tentar Ollama mesmo sem configuração explícita
-    if OLLAMA_AVAILABLE:
-        try:
-            return ChatOllama(model="llama3.2", temperature=temperature)
-        except:
-            pass
-    
-    # Se nada funcionar, levantar erro informativo
-    raise RuntimeError(
-        "Nenhum LLM disponível! Configure uma das opções:\n"
-        "1. Ollama (recomendado, gratuito): USE_OLLAMA=true OLLAMA_MODEL=llama3.2\n"
-        "2. OpenAI: OPENAI_API_KEY=sua_chave\n"
-        "3. LlamaCpp: LLAMA_MODEL_PATH=caminho/para/modelo.gguf"
-    )
+    return get_llm_pool().get(model_name, temperature)
 
 
 class BaseAgent(ABC):
@@ -97,6 +45,7 @@ class BaseAgent(ABC):
         self.name = name
         self.retriever = retriever
         self.llm = _get_llm(model_name, temperature)
+        self.response_cache = get_response_cache()
         self.conversation_history: list = []
     
     @abstractmethod
@@ -113,12 +62,276 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def aprocess(self, message: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Versão assíncrona de ``process``.
+        
+        A recuperação e a montagem do prompt rodam no executor; a chamada ao
+        LLM é aguardada sem ocupar thread. Agentes sem LLM executam
+        ``process`` no executor.
+        
+        Args:
+            message: Mensagem a processar
+            context: Contexto adicional (opcional)
+            
+        Returns:
+            Resposta do agente com citações
+        """
+        prepared = await self._aprepare(message, context)
+        if prepared is None:
+            return await asyncio.to_thread(self.process, message, context)
+        
+        prompt, query, context_text, citations = prepared
+        with self._llm_errors():
+            response = await self._ainvoke_llm(prompt, query, context_text)
+        self._remember(message, response.content)
+        return self._format_response(response.content, citations)
+    
     def _retrieve_context(self, query: str) -> Dict:
         """Recupera contexto usando o retriever híbrido."""
         if self.retriever:
             return self.retriever.retrieve(query)
         return {}
     
+    async def _aretrieve_context(self, query: str) -> Dict:
+        """Versão assíncrona de ``_retrieve_context``."""
+        if self.retriever:
+            return await self.retriever.aretrieve(query)
+        return {}
+    
+    def _retrieval_query(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Consulta enviada ao retriever (padrão: a própria mensagem)."""
+        return message
+    
+    def _graph_version(self) -> int:
+        """Versão do grafo de conhecimento consultado pelo retriever (0 sem grafo)."""
+        engine = getattr(self.retriever, "sparql_engine", None)
+        knowledge_graph = getattr(engine, "knowledge_graph", None)
+        return knowledge_graph.version if knowledge_graph is not None else 0
+    
+    def _embed(self, texts: List[str]):
+        """Embeddings do vector store do retriever (usados pelo cache semântico)."""
+        return self.retriever.vector_store._get_embeddings(texts)
+    
+    def _cache_lookup(self, messages: List[Any], query: str, context_text: str):
+        """Chave, escopo e embedding da pergunta no cache, e a resposta armazenada (se houver)."""
+        cache = self.response_cache
+        key = prompt_fingerprint(messages)
+        scope = (self.name, fingerprint(context_text), self._graph_version())
+        vector = None
+        if cache.semantic and getattr(self.retriever, "vector_store", None) is not None:
+            vector = embed_query(self._embed, query)
+        return key, scope, vector, cache.get(key, scope, query, vector)
+    
+    async def _acache_lookup(self, messages: List[Any], query: str, context_text: str):
+        """Versão assíncrona de ``_cache_lookup`` (o embedding da pergunta roda no executor)."""
+        if self.response_cache.semantic:
+            return await asyncio.to_thread(self._cache_lookup, messages, query, context_text)
+        return self._cache_lookup(messages, query, context_text)
+    
+    def _invoke_llm(self, messages: List[Any], query: str, context_text: str = ""):
+        """
+        Gera a resposta do LLM, reaproveitando respostas do cache quando possível.
+        
+        Args:
+            messages: Prompt já formatado
+            query: Pergunta do usuário (busca por similaridade)
+            context_text: Contexto recuperado anexado ao prompt
+            
+        Returns:
+            Resposta do LLM
+        """
+        cache = self.response_cache
+        if cache is None:
+            return self.llm.invoke(messages)
+        
+        key, scope, vector, response = self._cache_lookup(messages, query, context_text)
+        if response is not None:
+            return response
+        
+        start = time.perf_counter()
+        response = self.llm.invoke(messages)
+        cache.put(key, scope, response, time.perf_counter() - start, query, vector)
+        return response
+    
+    async def _ainvoke_llm(self, messages: List[Any], query: str, context_text: str = ""):
+        """Versão assíncrona de ``_invoke_llm`` (``llm.ainvoke``)."""
+        cache = self.response_cache
+        if cache is None:
+            return await self.llm.ainvoke(messages)
+        
+        key, scope, vector, response = await self._acache_lookup(messages, query, context_text)
+        if response is not None:
+            return response
+        
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(messages)
+        cache.put(key, scope, response, time.perf_counter() - start, query, vector)
+        return response
+    
+    def _stream_llm(self, messages: List[Any], query: str, context_text: str = "") -> Iterator[str]:
+        """
+        Gera a resposta do LLM em partes, à medida que os tokens são produzidos.
+        
+        Uma resposta do cache é entregue de uma vez; uma resposta gerada é
+        armazenada no cache ao final.
+        
+        Args:
+            messages: Prompt já formatado
+            query: Pergunta do usuário (busca por similaridade)
+            context_text: Contexto recuperado anexado ao prompt
+            
+        Yields:
+            Trechos do texto da resposta
+        """
+        cache = self.response_cache
+        if cache is not None:
+            key, scope, vector, response = self._cache_lookup(messages, query, context_text)
+            if response is not None:
+                yield response.content
+                return
+        
+        start = time.perf_counter()
+        parts = []
+        for chunk in self.llm.stream(messages):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if text:
+                parts.append(text)
+                yield text
+        if cache is not None:
+            cache.put(key, scope, AIMessage(content="".join(parts)),
+                      time.perf_counter() - start, query, vector)
+    
+    async def _astream_llm(self, messages: List[Any], query: str, context_text: str = "") -> AsyncIterator[str]:
+        """Versão assíncrona de ``_stream_llm`` (``llm.astream``)."""
+        cache = self.response_cache
+        if cache is not None:
+            key, scope, vector, response = await self._acache_lookup(messages, query, context_text)
+            if response is not None:
+                yield response.content
+                return
+        
+        start = time.perf_counter()
+        parts = []
+        async for chunk in self.llm.astream(messages):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if text:
+                parts.append(text)
+                yield text
+        if cache is not None:
+            cache.put(key, scope, AIMessage(content="".join(parts)),
+                      time.perf_counter() - start, query, vector)
+    
+    def _llm_error(self, e: Exception) -> Exception:
+        """Traduz uma falha do LLM (padrão: mantém o erro original)."""
+        return e
+    
+    @contextmanager
+    def _llm_errors(self):
+        """Aplica ``_llm_error`` às falhas do LLM (a fila cheia passa sem tradução)."""
+        try:
+            yield
+        except LLMBusyError:
+            raise
+        except Exception as e:
+            error = self._llm_error(e)
+            if error is e:
+                raise
+            raise error from e
+    
+    def _prepare(self, message: str, context: Optional[Dict[str, Any]] = None,
+                 rag_context: Optional[Dict] = None) -> Optional[Tuple[List[Any], str, str, Dict]]:
+        """
+        Monta o prompt do LLM para uma mensagem.
+        
+        Args:
+            message: Mensagem a processar
+            context: Contexto adicional (opcional)
+            rag_context: Resultado do retriever já obtido (opcional)
+        
+        Returns:
+            Tupla (prompt, pergunta, contexto anexado, citações), ou None para
+            agentes que respondem sem LLM
+        """
+        return None
+    
+    async def _aprepare(self, message: str, context: Optional[Dict[str, Any]] = None) -> Optional[Tuple[List[Any], str, str, Dict]]:
+        """
+        Versão assíncrona de ``_prepare``: recuperação com ``aretrieve`` e o
+        restante da montagem do prompt no executor.
+        """
+        if type(self)._prepare is BaseAgent._prepare:
+            return None
+        rag_context = await self._aretrieve_context(self._retrieval_query(message, context))
+        return await asyncio.to_thread(self._prepare, message, context, rag_context)
+    
+    def _remember(self, message: str, content: str):
+        """Registra a troca no histórico da conversa."""
+        self.conversation_history.append({'role': 'user', 'content': message})
+        self.conversation_history.append({'role': 'assistant', 'content': content})
+    
+    def stream(self, message: str, context: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Processa uma mensagem emitindo eventos à medida que a resposta é produzida.
+        
+        Args:
+            message: Mensagem a processar
+            context: Contexto adicional (opcional)
+            
+        Yields:
+            Pares (evento, dados): ``citations`` (fontes recuperadas),
+            ``token`` (trecho da resposta) e, por último, ``done`` (resposta
+            completa, no formato de ``process``)
+        """
+        prepared = self._prepare(message, context)
+        if prepared is None:
+            response = self.process(message, context)
+            yield "citations", response.get('citations', {})
+            yield "token", response.get('content', '')
+            yield "done", response
+            return
+        
+        prompt, query, context_text, citations = prepared
+        yield "citations", citations
+        parts = []
+        with self._llm_errors():
+            for text in self._stream_llm(prompt, query, context_text):
+                parts.append(text)
+                yield "token", text
+        content = "".join(parts)
+        self._remember(message, content)
+        yield "done", self._format_response(content, citations)
+    
+    async def astream(self, message: str, context: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Versão assíncrona de ``stream`` (mesmos eventos).
+        
+        Args:
+            message: Mensagem a processar
+            context: Contexto adicional (opcional)
+            
+        Yields:
+            Pares (evento, dados): ``citations``, ``token`` e ``done``
+        """
+        prepared = await self._aprepare(message, context)
+        if prepared is None:
+            response = await asyncio.to_thread(self.process, message, context)
+            yield "citations", response.get('citations', {})
+            yield "token", response.get('content', '')
+            yield "done", response
+            return
+        
+        prompt, query, context_text, citations = prepared
+        yield "citations", citations
+        parts = []
+        with self._llm_errors():
+            async for text in self._astream_llm(prompt, query, context_text):
+                parts.append(text)
+                yield "token", text
+        content = "".join(parts)
+        self._remember(message, content)
+        yield "done", self._format_response(content, citations)
+    
     def _format_response(self, content: str, citations: Dict) -> Dict[str, Any]:
         """
         Formata resposta com citações.
@@ -1,8 +1,9 @@
 """
 CoordinatorAgent - Orquestra tarefas e resolve conflitos.
 """
-from typing import Dict, Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from agents.base_agent import BaseAgent
+from ontology.inference_snapshot import InferenceSnapshotService, default_service
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage
 
@@ -10,8 +11,11 @@ from langchain_core.messages import HumanMessage, AIMessage
 class CoordinatorAgent(BaseAgent):
     """Agente coordenador que gerencia fluxo de tarefas."""
     
-    def __init__(self, retriever=None, model_name: str = "gpt-4"):
+    def __init__(self, retriever=None, model_name: str = "gpt-4",
+                 inference: Optional[InferenceSnapshotService] = None):
         super().__init__("CoordinatorAgent", retriever, model_name)
+        # Snapshot de inferências DL compartilhado (sem reasoner por mensagem)
+        self.inference = inference
         
         self.system_prompt = """Você é o CoordinatorAgent de um sistema multiagente para plataforma de ensino.
         
@@ -54,8 +58,40 @@ Seja detalhado e educativo em suas explicações."""
         Returns:
             Resposta coordenada com citações
         """
+        prompt, query, context_text, citations = self._prepare(message, context)
+        
+        # Gerar resposta usando LLM
+        with self._llm_errors():
+            response = self._invoke_llm(prompt, query, context_text)
+        
+        self._remember(message, response.content)
+        return self._format_response(response.content, citations)
+    
+    def _llm_error(self, e: Exception) -> RuntimeError:
+        """Traduz uma falha do LLM, indicando se é problema de configuração."""
+        error_msg = str(e).lower()
+        if "connection" in error_msg or "refused" in error_msg or "timeout" in error_msg:
+            return RuntimeError(
+                f"LLM não está disponível. Verifique se Ollama está rodando (ollama serve) ou se a API key do OpenAI está configurada. Erro: {e}"
+            )
+        return RuntimeError(f"Erro ao gerar resposta com LLM: {e}")
+    
+    def _prepare(self, message: str, context: Optional[Dict[str, Any]] = None,
+                 rag_context: Optional[Dict] = None) -> Tuple[List[Any], str, str, Dict]:
+        """
+        Monta o prompt a partir do contexto recuperado (usado por ``process`` e ``stream``).
+        
+        Args:
+            message: Mensagem a processar
+            context: Contexto adicional
+            rag_context: Resultado do retriever já obtido (opcional; se ausente, é recuperado aqui)
+            
+        Returns:
+            Tupla (prompt, pergunta, contexto anexado, citações)
+        """
         # Recuperar contexto usando RAG híbrido
-        rag_context = self._retrieve_context(message)
+        if rag_context is None:
+            rag_context = self._retrieve_context(self._retrieval_query(message, context))
         
         # Preparar histórico de conversa
         messages = []
@@ -71,49 +107,23 @@ Seja detalhado e educativo em suas explicações."""
             context_text = f"\n\nContexto recuperado:\n{rag_context['combined_context']}"
         
         # Adicionar inferências DL explícitas (se disponível)
-        dl_inferences = ""
         try:
-            from ontology.reasoner import DLReasoner
-            reasoner = DLReasoner()
-            consistency = reasoner.check_consistency()
-            if consistency.get('consistent'):
-                dl_inferences = "\n\n=== Inferências DL ===\n"
-                dl_inferences += f"Ontologia consistente: ✅\n"
-                # Adicionar tipos inferidos relevantes
-                realization = reasoner.realize()
-                if realization:
-                    dl_inferences += f"Tipos inferidos disponíveis: {len(realization)} indivíduos\n"
-                context_text += dl_inferences
-        except:
+            inference = self.inference or default_service()
+            snapshot = inference.snapshot() if inference is not None else None
+            if snapshot is not None:
+                context_text += snapshot.to_context()
+        except Exception:
             pass  # Se reasoner não disponível, continuar sem inferências
         
-        # Gerar resposta usando LLM
-        try:
-            response = self.llm.invoke(
-                self.prompt_template.format_messages(
-                    chat_history=messages,
-                    input=message + context_text
-                )
-            )
-        except Exception as e:
-            # Se LLM falhar, verificar se é problema de configuração
-            error_msg = str(e).lower()
-            if "connection" in error_msg or "refused" in error_msg or "timeout" in error_msg:
-                raise RuntimeError(
-                    f"LLM não está disponível. Verifique se Ollama está rodando (ollama serve) ou se a API key do OpenAI está configurada. Erro: {e}"
-                )
-            else:
-                raise RuntimeError(f"Erro ao gerar resposta com LLM: {e}")
-        
         # Extrair citações
         citations = {
             'documents': rag_context.get('citations', {}).get('documents', []),
             'iris': rag_context.get('citations', {}).get('iris', [])
         }
         
-        # Atualizar histórico
-        self.conversation_history.append({'role': 'user', 'content': message})
-        self.conversation_history.append({'role': 'assistant', 'content': response.content})
-        
-        return self._format_response(response.content, citations)
+        prompt = self.prompt_template.format_messages(
+            chat_history=messages,
+            input=message + context_text
+        )
+        return prompt, message, context_text, citations
 
@@ -0,0 +1,483 @@
+"""
+Registro de clientes LLM compartilhados pelo processo.
+
+Antes cada agente (e cada ``StudentAgent`` criado por estudante) construía o
+próprio cliente: conexões HTTP próprias com o Ollama/OpenAI e, com LlamaCpp,
+uma cópia própria do modelo gguf em memória. O ``LLMPool`` mantém:
+
+- um cliente por configuração de backend (tipo, endereço/modelo e
+  temperatura), reutilizado por todos os agentes; o modelo gguf do LlamaCpp
+  é carregado uma única vez por arquivo, com a temperatura aplicada por
+  chamada
+- conexões HTTP persistentes (keep-alive) em um pool por servidor, criado
+  uma vez e entregue aos clientes OpenAI
+- um limite de chamadas simultâneas por backend (``LLM_MAX_CONCURRENCY``,
+  padrão 4; o LlamaCpp executa uma chamada por vez), com as demais
+  aguardando na fila até ``LLM_QUEUE_TIMEOUT`` segundos. A fila é única e
+  FIFO para chamadas síncronas (threads) e assíncronas; estas aguardam sem
+  ocupar thread
+
+Os agentes recebem um ``PooledLLM``, que expõe o mesmo ``invoke``/``ainvoke``
+dos modelos LangChain.
+"""
+import os
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tentar importar diferentes tipos de LLM
+try:
+    from langchain_ollama import ChatOllama
+    OLLAMA_AVAILABLE = True
+except ImportError:
+    OLLAMA_AVAILABLE = False
+
+try:
+    from langchain_openai import ChatOpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+try:
+    from langchain_community.llms import LlamaCpp
+    LLAMACPP_AVAILABLE = True
+except ImportError:
+    LLAMACPP_AVAILABLE = False
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+
+class LLMBusyError(RuntimeError):
+    """Fila de um backend LLM excedeu o tempo de espera."""
+
+    def __init__(self, message: str, retry_after: float):
+        """
+        Args:
+            message: Descrição do erro
+            retry_after: Segundos sugeridos antes de tentar de novo
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _resolve_backend(model_name: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Escolhe o backend LLM a partir da configuração.
+
+    Prioridade:
+    1. Ollama (se disponível e configurado)
+    2. OpenAI (se API key disponível)
+    3. LlamaCpp (se disponível)
+
+    Args:
+        model_name: Nome do modelo (opcional, usa configuração de ambiente)
+
+    Returns:
+        Tupla (tipo do backend, parâmetros do cliente)
+    """
+    # Verificar variáveis de ambiente
+    use_ollama = os.getenv("USE_OLLAMA", "false").lower() == "true"
+    ollama_model = os.getenv("OLLAMA_MODEL", "llama3.2")
+    ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    openai_key = os.getenv("OPENAI_API_KEY")
+
+    # Prioridade 1: Ollama (local, gratuito)
+    if use_ollama and OLLAMA_AVAILABLE:
+        return "ollama", {"model": ollama_model, "base_url": ollama_url}
+
+    # Prioridade 2: OpenAI (se API key disponível)
+    if openai_key and OPENAI_AVAILABLE:
+        model = model_name or os.getenv("OPENAI_MODEL", "gpt-4")
+        return "openai", {"model": model, "base_url": os.getenv("OPENAI_BASE_URL")}
+
+    # Prioridade 3: LlamaCpp (local, se disponível)
+    if LLAMACPP_AVAILABLE:
+        model_path = os.getenv("LLAMA_MODEL_PATH")
+        if model_path and os.path.exists(model_path):
+            return "llamacpp", {"model_path": os.path.abspath(model_path)}
+
+    # Fallback: Tentar Ollama mesmo sem configuração explícita
+    if OLLAMA_AVAILABLE:
+        return "ollama", {"model": "llama3.2", "base_url": ollama_url}
+
+    # Se nada funcionar, levantar erro informativo
+    raise RuntimeError(
+        "Nenhum LLM disponível! Configure uma das opções:\n"
+        "1. Ollama (recomendado, gratuito): USE_OLLAMA=true OLLAMA_MODEL=llama3.2\n"
+        "2. OpenAI: OPENAI_API_KEY=sua_chave\n"
+        "3. LlamaCpp: LLAMA_MODEL_PATH=caminho/para/modelo.gguf"
+    )
+
+
+class LLMBackend:
+    """Servidor (ou arquivo de modelo) LLM com fila e limite de concorrência."""
+
+    def __init__(self, kind: str, address: str, max_concurrency: int, queue_timeout: float):
+        """
+        Inicializa o backend.
+
+        Args:
+            kind: Tipo do backend (ollama, openai ou llamacpp)
+            address: Endereço do servidor ou caminho do modelo
+            max_concurrency: Máximo de chamadas simultâneas
+            queue_timeout: Tempo máximo de espera na fila, em segundos
+        """
+        self.kind = kind
+        self.address = address
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        # Chamadas na fila, em ordem de chegada: (None, Event) para chamadas
+        # síncronas e (laço de eventos, future) para as assíncronas
+        self._waiters: deque = deque()
+        self.active = 0
+        self.waiting = 0
+        self.calls = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.http_client = None
+        self.http_async_client = None
+
+    def connection_pool(self):
+        """Clientes HTTP com keep-alive compartilhados pelos modelos deste servidor."""
+        if self.http_client is None and HTTPX_AVAILABLE:
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            self.http_client = httpx.Client(limits=limits, timeout=None)
+            self.http_async_client = httpx.AsyncClient(limits=limits, timeout=None)
+        return self.http_client, self.http_async_client
+
+    def _record(self, waited: float):
+        """Contabiliza uma chamada que obteve vaga (com o lock adquirido)."""
+        self.calls += 1
+        self.wait_seconds += waited
+
+    def _busy(self) -> LLMBusyError:
+        """Erro de fila excedida (com o lock adquirido)."""
+        self.rejected += 1
+        return LLMBusyError(
+            f"LLM ocupado: {self.kind} ({self.address}) sem vaga após {self.queue_timeout:.0f}s de espera",
+            retry_after=self.queue_timeout
+        )
+
+    def _release(self):
+        """Libera uma vaga, entregando-a diretamente à chamada mais antiga da fila."""
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                # A vaga continua contada em ``active``: passa para quem a recebe
+                if loop is None:
+                    waiter.set()
+                    return
+                if not waiter.done():
+                    loop.call_soon_threadsafe(self._hand_over, waiter)
+                    return
+            self.active -= 1
+
+    def _free(self) -> bool:
+        """Se há vaga livre sem ninguém na fila (com o lock adquirido)."""
+        return self.active < self.max_concurrency and not self._waiters
+
+    def _hand_over(self, future: "asyncio.Future"):
+        """Entrega a vaga a uma chamada assíncrona (no laço dela); devolve se ela desistiu."""
+        if future.done():
+            self._release()
+        else:
+            future.set_result(True)
+
+    @contextmanager
+    def slot(self):
+        """Ocupa uma das vagas de execução, aguardando na fila se necessário."""
+        start = time.perf_counter()
+        with self._lock:
+            if self._free():
+                self.active += 1
+                self._record(0.0)
+                waiter = None
+            else:
+                waiter = threading.Event()
+                self._waiters.append((None, waiter))
+                self.waiting += 1
+        if waiter is not None:
+            waiter.wait(self.queue_timeout)
+            with self._lock:
+                self.waiting -= 1
+                if (None, waiter) in self._waiters:
+                    # Ainda na fila: a vaga não foi entregue
+                    self._waiters.remove((None, waiter))
+                    raise self._busy()
+                self._record(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Versão assíncrona de ``slot``: a espera na fila não ocupa thread."""
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free():
+                self.active += 1
+                self._record(0.0)
+                future = None
+            else:
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+                self.waiting += 1
+        if future is not None:
+            try:
+                await asyncio.wait_for(future, self.queue_timeout)
+            except BaseException as e:
+                with self._lock:
+                    self.waiting -= 1
+                if future.done() and not future.cancelled():
+                    self._release()  # Vaga entregue junto com o cancelamento
+                if isinstance(e, asyncio.TimeoutError):
+                    with self._lock:
+                        raise self._busy()
+                raise
+            with self._lock:
+                # A vaga já foi entregue por _release
+                self.waiting -= 1
+                self._record(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Ocupação atual e totais do backend."""
+        with self._lock:
+            return {
+                'backend': self.kind,
+                'address': self.address,
+                'max_concurrency': self.max_concurrency,
+                'active': self.active,
+                'waiting': self.waiting,
+                'calls': self.calls,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.wait_seconds / self.calls * 1000, 2) if self.calls else 0.0
+            }
+
+    def close(self):
+        """
+        Fecha as conexões HTTP persistentes.
+
+        O cliente assíncrono só pode ser fechado por aqui fora de um laço de
+        eventos; dentro de um, use ``aclose``.
+        """
+        http_client, http_async_client = self.http_client, self.http_async_client
+        self.http_client = self.http_async_client = None
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # No laço persistente em que as chamadas síncronas o usaram
+                run_sync(http_async_client.aclose())
+            else:
+                print(f"⚠️  Aviso: cliente HTTP assíncrono de {self.address} não fechado (use aclose)")
+
+    async def aclose(self):
+        """Fecha as conexões HTTP persistentes (síncronas e assíncronas)."""
+        http_client, http_async_client = self.http_client, self.http_async_client
+        self.http_client = self.http_async_client = None
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            await http_async_client.aclose()
+
+
+class PooledLLM:
+    """Modelo compartilhado entregue aos agentes (mesmo ``invoke`` do LangChain)."""
+
+    def __init__(self, backend: LLMBackend, model):
+        """
+        Args:
+            backend: Backend que limita a concorrência
+            model: Modelo LangChain (ou modelo com parâmetros vinculados)
+        """
+        self.backend = backend
+        self.model = model
+
+    def invoke(self, input, *args, **kwargs):
+        """Chama o modelo ocupando uma vaga do backend."""
+        with self.backend.slot():
+            return self.model.invoke(input, *args, **kwargs)
+
+    def stream(self, input, *args, **kwargs):
+        """Gera a resposta em partes, ocupando a vaga até o fim da geração."""
+        with self.backend.slot():
+            yield from self.model.stream(input, *args, **kwargs)
+
+    async def ainvoke(self, input, *args, **kwargs):
+        """Versão assíncrona de ``invoke``: aguarda a vaga e a resposta sem ocupar thread."""
+        async with self.backend.aslot():
+            return await self.model.ainvoke(input, *args, **kwargs)
+
+    async def astream(self, input, *args, **kwargs):
+        """Versão assíncrona de ``stream``."""
+        async with self.backend.aslot():
+            async for chunk in self.model.astream(input, *args, **kwargs):
+                yield chunk
+
+    def __getattr__(self, name):
+        # Demais atributos (bind, with_structured_output, ...) vêm do modelo
+        return getattr(self.model, name)
+
+
+class LLMPool:
+    """Registro de clientes LLM do processo, um por configuração de backend."""
+
+    def __init__(self, max_concurrency: Optional[int] = None, queue_timeout: Optional[float] = None):
+        """
+        Inicializa o registro (os clientes são criados na primeira utilização).
+
+        Args:
+            max_concurrency: Chamadas simultâneas por servidor (padrão:
+                LLM_MAX_CONCURRENCY ou 4)
+            queue_timeout: Espera máxima na fila em segundos (padrão:
+                LLM_QUEUE_TIMEOUT ou 120)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        self.queue_timeout = queue_timeout or float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))
+        self._lock = threading.Lock()
+        self._backends: Dict[Tuple[str, str], LLMBackend] = {}
+        self._models: Dict[Tuple, Any] = {}
+
+    def _backend(self, kind: str, address: str) -> LLMBackend:
+        """Backend de um servidor/arquivo de modelo (criado uma vez)."""
+        key = (kind, address)
+        if key not in self._backends:
+            # Uma instância do llama.cpp não aceita chamadas concorrentes
+            limit = 1 if kind == "llamacpp" else self.max_concurrency
+            self._backends[key] = LLMBackend(kind, address, limit, self.queue_timeout)
+        return self._backends[key]
+
+    def _create(self, kind: str, config: Dict[str, Any], temperature: float,
+                backend: LLMBackend):
+        """Constrói o modelo LangChain de uma configuração."""
+        if kind == "ollama":
+            return ChatOllama(model=config["model"], base_url=config["base_url"],
+                              temperature=temperature)
+        if kind == "openai":
+            http_client, http_async_client = backend.connection_pool()
+            kwargs = {"http_client": http_client, "http_async_client": http_async_client} if http_client else {}
+            if config["base_url"]:
+                kwargs["base_url"] = config["base_url"]
+            return ChatOpenAI(model=config["model"], temperature=temperature, **kwargs)
+        return LlamaCpp(
+            model_path=config["model_path"],
+            temperature=temperature,
+            n_ctx=2048,
+            verbose=False
+        )
+
+    def get(self, model_name: Optional[str] = None, temperature: float = 0.7) -> PooledLLM:
+        """
+        Retorna o modelo compartilhado da configuração atual.
+
+        Args:
+            model_name: Nome do modelo (opcional, usa configuração de ambiente)
+            temperature: Temperatura para o LLM
+
+        Returns:
+            Modelo com fila e limite de concorrência do backend
+        """
+        kind, config = _resolve_backend(model_name)
+        address = config.get("base_url") or config.get("model_path") or kind
+        with self._lock:
+            backend = self._backend(kind, address)
+            if kind == "llamacpp":
+                # O gguf é carregado uma vez; a temperatura vai em cada chamada
+                key = (kind, address)
+                if key not in self._models:
+                    self._models[key] = self._create(kind, config, temperature, backend)
+                return PooledLLM(backend, self._models[key].bind(temperature=temperature))
+            key = (kind, address, config["model"], temperature)
+            if key not in self._models:
+                self._models[key] = self._create(kind, config, temperature, backend)
+            return PooledLLM(backend, self._models[key])
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Ocupação e totais de cada backend em uso."""
+        with self._lock:
+            backends = list(self._backends.values())
+        return [backend.stats() for backend in backends]
+
+    def _detach(self) -> List[LLMBackend]:
+        """Descarta os modelos e retorna os backends a fechar."""
+        with self._lock:
+            backends = list(self._backends.values())
+            self._backends.clear()
+            self._models.clear()
+        return backends
+
+    def close(self):
+        """Fecha as conexões e descarta os modelos."""
+        for backend in self._detach():
+            backend.close()
+
+    async def aclose(self):
+        """Versão assíncrona de ``close`` (fecha também os clientes HTTP assíncronos)."""
+        for backend in self._detach():
+            await backend.aclose()
+
+
+_pool: Optional[LLMPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool() -> LLMPool:
+    """Registro de clientes LLM do processo (criado na primeira utilização)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = LLMPool()
+    return _pool
+
+
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def run_sync(coro):
+    """
+    Executa uma corrotina a partir de código síncrono e aguarda o resultado.
+
+    As conexões do cliente HTTP assíncrono compartilhado ficam presas ao
+    laço de eventos que as abriu: em vez de um laço novo por chamada
+    (``asyncio.run``), as chamadas síncronas usam um único laço persistente
+    do processo, executado em uma thread de fundo.
+
+    Args:
+        coro: Corrotina a executar
+
+    Returns:
+        Resultado da corrotina
+    """
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-sync-loop", daemon=True).start()
+            _sync_loop = loop
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _sync_loop:
+        coro.close()
+        raise RuntimeError("run_sync chamado dentro do próprio laço; use await")
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
@@ -14,11 +14,15 @@ class LMSAgent(BaseAgent):
         Inicializa o agente LMS.
         
         Args:
-            ontology_path: Caminho para a ontologia
-            retriever: Retriever híbrido
+            ontology_path: Caminho para a ontologia (usado sem retriever)
+            retriever: Retriever híbrido; seu motor SPARQL é compartilhado,
+                então o agente vê as alterações e recargas da ontologia
         """
         super().__init__("LMSAgent", retriever)
-        self.sparql_engine = SPARQLQueryEngine(ontology_path)
+        if retriever is not None and getattr(retriever, "sparql_engine", None) is not None:
+            self.sparql_engine = retriever.sparql_engine
+        else:
+            self.sparql_engine = SPARQLQueryEngine(ontology_path)
     
     def process(self, message: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
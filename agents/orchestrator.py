@@ -1,7 +1,7 @@
 """
 Orquestrador usando LangGraph para coordenar múltiplos agentes.
 """
-from typing import Dict, Any, List, TypedDict, Annotated
+from typing import Dict, Any, List, Optional, TypedDict, Annotated, AsyncIterator, Tuple
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langchain_core.messages import HumanMessage, AIMessage
@@ -9,6 +9,8 @@ from agents.coordinator import CoordinatorAgent
 from agents.student import StudentAgent
 from agents.recommendation import RecommendationAgent
 from agents.lms import LMSAgent
+from agents.base_agent import BaseAgent
+from agents.llm_pool import LLMBusyError, run_sync
 from rag.hybrid_retriever import HybridRetriever
 
 
@@ -25,17 +27,18 @@ class AgentState(TypedDict):
 class AgentOrchestrator:
     """Orquestrador de agentes usando LangGraph."""
     
-    def __init__(self, retriever: HybridRetriever):
+    def __init__(self, retriever: HybridRetriever, inference=None):
         """
         Inicializa o orquestrador.
         
         Args:
             retriever: Retriever híbrido compartilhado
+            inference: Serviço de snapshot de inferências DL (opcional)
         """
         self.retriever = retriever
         
         # Inicializar agentes
-        self.coordinator = CoordinatorAgent(retriever)
+        self.coordinator = CoordinatorAgent(retriever, inference=inference)
         self.lms_agent = LMSAgent(retriever=retriever)
         self.recommendation_agent = RecommendationAgent(retriever)
         
@@ -49,7 +52,7 @@ class AgentOrchestrator:
         """Constrói o grafo de estados dos agentes."""
         workflow = StateGraph(AgentState)
         
-        # Adicionar nós
+        # Adicionar nós (assíncronos: o grafo é executado com ainvoke)
         workflow.add_node("coordinator", self._coordinator_node)
         workflow.add_node("lms", self._lms_node)
         workflow.add_node("recommendation", self._recommendation_node)
@@ -133,23 +136,31 @@ class AgentOrchestrator:
         # Fallback: perguntas gerais vão para coordinator
         return "coordinator"
     
-    def _coordinator_node(self, state: AgentState) -> AgentState:
-        """Nó do coordenador."""
-        query = state.get("query", "")
-        try:
-            response = self.coordinator.process(query, state.get("context"))
-            content = response.get("content", "Sem resposta disponível.")
-            citations = response.get("citations", {})
-            current_agent = "coordinator"
-        except Exception as e:
-            # Log do erro para debug
-            error_msg = str(e)
-            print(f"⚠️  Erro no CoordinatorAgent: {error_msg}")
-            print(f"   Query: {query[:100]}...")
-            
-            # Se for erro de LLM não disponível, dar mensagem clara
-            if "LLM" in error_msg or "ollama" in error_msg.lower() or "openai" in error_msg.lower():
-                content = f"""⚠️ Erro: LLM não está configurado ou não está disponível.
+    def _set_response(self, state: AgentState, content: str, citations: Dict,
+                      agent: str) -> AgentState:
+        """Registra a resposta de um agente no estado."""
+        # Adicionar mensagem usando objeto AIMessage (compatível com add_messages)
+        state["messages"].append(AIMessage(content=content))
+        state["citations"] = citations
+        state["current_agent"] = agent
+        return state
+    
+    def _coordinator_failed(self, query: str, error: Exception) -> Optional[Tuple[str, str]]:
+        """
+        Trata uma falha do CoordinatorAgent.
+        
+        Returns:
+            (conteúdo, agente) se o erro for de LLM não configurado, ou None se
+            a consulta deve cair no LMSAgent
+        """
+        # Log do erro para debug
+        error_msg = str(error)
+        print(f"⚠️  Erro no CoordinatorAgent: {error_msg}")
+        print(f"   Query: {query[:100]}...")
+        
+        # Se for erro de LLM não disponível, dar mensagem clara
+        if "LLM" in error_msg or "ollama" in error_msg.lower() or "openai" in error_msg.lower():
+            content = f"""⚠️ Erro: LLM não está configurado ou não está disponível.
 
 Erro: {error_msg}
 
@@ -159,96 +170,172 @@ Por favor:
 3. Ou configure OpenAI: `OPENAI_API_KEY=sua_chave` no arquivo .env
 
 Sem LLM, não posso gerar respostas em linguagem natural."""
-                citations = {}
-                current_agent = "coordinator_error"
-            else:
-                # Outros erros: tentar fallback mas informar
-                try:
-                    print("   Tentando fallback com LMSAgent...")
-                    response = self.lms_agent.process(query, state.get("context"))
-                    content = response.get("content", "Sem resposta disponível.")
-                    citations = response.get("citations", {})
-                    current_agent = "lms_fallback"
-                    # Adicionar nota sobre o fallback
-                    if "Como LMSAgent" in content:
-                        content += "\n\n(Nota: Esta pergunta conceitual foi redirecionada. Para respostas mais detalhadas, configure o LLM.)"
-                except Exception as e2:
-                    content = f"""Erro ao processar consulta.
+            return content, "coordinator_error"
+        
+        # Outros erros: tentar fallback mas informar
+        print("   Tentando fallback com LMSAgent...")
+        return None
+    
+    def _lms_fallback(self, state: AgentState, response: Dict[str, Any]) -> AgentState:
+        """Registra a resposta do LMSAgent usada como fallback do coordenador."""
+        content = response.get("content", "Sem resposta disponível.")
+        # Adicionar nota sobre o fallback
+        if "Como LMSAgent" in content:
+            content += "\n\n(Nota: Esta pergunta conceitual foi redirecionada. Para respostas mais detalhadas, configure o LLM.)"
+        return self._set_response(state, content, response.get("citations", {}), "lms_fallback")
+    
+    def _fallback_failed(self, state: AgentState, error: Exception, fallback_error: Exception) -> AgentState:
+        """Registra a falha do coordenador e do fallback."""
+        content = f"""Erro ao processar consulta.
 
-Erro no CoordinatorAgent: {error_msg}
-Erro no fallback: {str(e2)}
+Erro no CoordinatorAgent: {str(error)}
+Erro no fallback: {str(fallback_error)}
 
 Por favor, verifique:
 - Se o LLM está configurado (Ollama ou OpenAI)
 - Se há documentos carregados no vector store
 - Se a ontologia está acessível"""
-                    citations = {}
-                    current_agent = "error"
-        
-        # Adicionar mensagem usando objeto AIMessage (compatível com add_messages)
-        state["messages"].append(AIMessage(content=content))
-        state["citations"] = citations
-        state["current_agent"] = current_agent
-        
-        return state
+        return self._set_response(state, content, {}, "error")
     
-    def _lms_node(self, state: AgentState) -> AgentState:
+    async def _coordinator_node(self, state: AgentState) -> AgentState:
+        """Nó do coordenador."""
+        query = state.get("query", "")
+        try:
+            response = await self.coordinator.aprocess(query, state.get("context"))
+        except LLMBusyError:
+            # Fila do LLM cheia: a API responde 503 em vez de uma mensagem de erro
+            raise
+        except Exception as e:
+            failure = self._coordinator_failed(query, e)
+            if failure is not None:
+                return self._set_response(state, failure[0], {}, failure[1])
+            try:
+                response = await self.lms_agent.aprocess(query, state.get("context"))
+            except Exception as e2:
+                return self._fallback_failed(state, e, e2)
+            return self._lms_fallback(state, response)
+        
+        return self._set_response(state, response.get("content", "Sem resposta disponível."),
+                                  response.get("citations", {}), "coordinator")
+    
+    async def _lms_node(self, state: AgentState) -> AgentState:
         """Nó do LMS."""
         query = state.get("query", "")
         try:
-            response = self.lms_agent.process(query, state.get("context"))
+            response = await self.lms_agent.aprocess(query, state.get("context"))
             content = response.get("content", "Sem resposta disponível.")
+        except LLMBusyError:
+            raise
         except Exception as e:
             # Fallback se houver erro
             content = f"Erro ao processar: {str(e)}"
             response = {"citations": {}}
         
-        # Adicionar mensagem usando objeto AIMessage
-        state["messages"].append(AIMessage(content=content))
-        state["citations"] = response.get("citations", {})
-        state["current_agent"] = "lms"
-        
-        return state
+        return self._set_response(state, content, response.get("citations", {}), "lms")
     
-    def _recommendation_node(self, state: AgentState) -> AgentState:
+    async def _recommendation_node(self, state: AgentState) -> AgentState:
         """Nó de recomendação."""
         query = state.get("query", "")
-        response = self.recommendation_agent.process(query, state.get("context"))
-        
-        # Adicionar mensagem usando objeto AIMessage
-        state["messages"].append(AIMessage(content=response["content"]))
-        state["citations"] = response.get("citations", {})
-        state["current_agent"] = "recommendation"
-        
-        return state
+        response = await self.recommendation_agent.aprocess(query, state.get("context"))
+        return self._set_response(state, response["content"], response.get("citations", {}), "recommendation")
     
-    def _student_node(self, state: AgentState) -> AgentState:
+    async def _student_node(self, state: AgentState) -> AgentState:
         """Nó do estudante."""
         query = state.get("query", "")
         context = state.get("context", {})
         
         # Obter ou criar agente estudante
         student_id = context.get("student_id", "Estudante_Ana")
+        response = await self._student_agent(student_id).aprocess(query, context)
+        return self._set_response(state, response["content"], response.get("citations", {}), f"student_{student_id}")
+    
+    def _student_agent(self, student_id: str) -> StudentAgent:
+        """Obtém ou cria o agente de um estudante."""
         if student_id not in self.student_agents:
             self.student_agents[student_id] = StudentAgent(
                 student_id, 
                 self.retriever
             )
+        return self.student_agents[student_id]
+    
+    def _select_agent(self, route: str, context: Dict[str, Any]) -> Tuple[BaseAgent, str]:
+        """Agente e rótulo (como em ``current_agent``) de uma rota."""
+        if route == "lms":
+            return self.lms_agent, "lms"
+        if route == "recommendation":
+            return self.recommendation_agent, "recommendation"
+        if route == "student":
+            student_id = context.get("student_id", "Estudante_Ana")
+            return self._student_agent(student_id), f"student_{student_id}"
+        return self.coordinator, "coordinator"
+    
+    async def astream_query(self, query: str, context: Dict[str, Any] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Processa uma query emitindo eventos à medida que a resposta é produzida.
         
-        student_agent = self.student_agents[student_id]
-        response = student_agent.process(query, context)
+        Usa o mesmo roteamento do grafo (``_route_query``), mas executa o
+        agente escolhido pelo seu ``astream``, sem esperar a geração completa.
         
-        # Adicionar mensagem usando objeto AIMessage
-        state["messages"].append(AIMessage(content=response["content"]))
-        state["citations"] = response.get("citations", {})
-        state["current_agent"] = f"student_{student_id}"
+        Args:
+            query: Query do usuário
+            context: Contexto adicional
+            
+        Yields:
+            Pares (evento, dados): ``route`` (agente que responde), ``citations``,
+            ``token`` (trechos da resposta) e ``done`` (resposta completa, no
+            formato de ``process_query``). ``route`` e ``citations`` são
+            emitidos assim que produzidos; se o agente falhar antes do
+            primeiro ``token`` e o fallback assumir, um novo ``route`` (e as
+            citações do fallback) substitui os anteriores
+        """
+        context = context or {}
+        route = self._route_query({"query": query})
+        agent, label = self._select_agent(route, context)
         
-        return state
+        yield "route", {"agent": label}
+        response: Dict[str, Any] = {}
+        answered = False
+        try:
+            async for event, data in agent.astream(query, context):
+                if event == "done":
+                    response = data
+                    break
+                answered = answered or event == "token"
+                yield event, data
+        except Exception as e:
+            # Como em _coordinator_node: mensagem de LLM não configurado ou fallback no LMSAgent
+            if answered or route != "coordinator" or isinstance(e, LLMBusyError):
+                raise
+            failure = self._coordinator_failed(query, e)
+            if failure is not None:
+                response, label = {"content": failure[0], "citations": {}}, failure[1]
+                yield "route", {"agent": label}
+                yield "citations", {}
+                yield "token", failure[0]
+            else:
+                agent, label = self.lms_agent, "lms_fallback"
+                yield "route", {"agent": label}
+                async for event, data in agent.astream(query, context):
+                    if event == "done":
+                        response = data
+                        break
+                    yield event, data
+        
+        yield "done", {
+            "response": response.get("content", ""),
+            "agent": label,
+            "citations": response.get("citations", {})
+        }
     
     def process_query(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Processa uma query através do orquestrador.
         
+        Executa ``aprocess_query`` no laço de eventos persistente do pool de
+        LLMs (``run_sync``), onde ficam as conexões do cliente HTTP
+        assíncrono; dentro de código assíncrono, use ``aprocess_query``
+        diretamente.
+        
         Args:
             query: Query do usuário
             context: Contexto adicional
@@ -256,7 +343,28 @@ Por favor, verifique:
         Returns:
             Resposta com citações
         """
-        initial_state: AgentState = {
+        return run_sync(self.aprocess_query(query, context))
+    
+    async def aprocess_query(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Processa uma query através do orquestrador (``graph.ainvoke``).
+        
+        Os nós aguardam os agentes (``aprocess``) sem ocupar thread durante a
+        geração do LLM; a recuperação roda no executor.
+        
+        Args:
+            query: Query do usuário
+            context: Contexto adicional
+            
+        Returns:
+            Resposta com citações
+        """
+        final_state = await self.graph.ainvoke(self._initial_state(query, context))
+        return self._final_response(final_state)
+    
+    def _initial_state(self, query: str, context: Dict[str, Any] = None) -> AgentState:
+        """Estado inicial do grafo para uma query."""
+        return {
             "messages": [HumanMessage(content=query)],
             "query": query,
             "current_agent": "",
@@ -264,10 +372,9 @@ Por favor, verifique:
             "citations": {"documents": [], "iris": []},
             "history": []
         }
-        
-        # Executar grafo
-        final_state = self.graph.invoke(initial_state)
-        
+    
+    def _final_response(self, final_state: AgentState) -> Dict[str, Any]:
+        """Resposta da API a partir do estado final do grafo."""
         # Extrair resposta final
         messages = final_state.get("messages", [])
         last_message = messages[-1] if messages else None
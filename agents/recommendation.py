@@ -1,7 +1,7 @@
 """
 RecommendationAgent - Fornece recomendações personalizadas.
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from agents.base_agent import BaseAgent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage
@@ -42,12 +42,19 @@ Cite IRIs e documentos em suas recomendações."""
         Processa solicitação de recomendação.
         
         Args:
-            message: Mensagem com solicitação
+            message: Mensagem a processar
             context: Contexto adicional (ex: student_id, course_id)
             
         Returns:
             Recomendações com justificativas e citações
         """
+        prompt, query, context_text, citations = self._prepare(message, context)
+        response = self._invoke_llm(prompt, query, context_text)
+        self._remember(message, response.content)
+        return self._format_response(response.content, citations)
+    
+    def _retrieval_query(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Consulta enviada ao retriever (mensagem com estudante e curso do contexto)."""
         # Adicionar contexto à query
         query = message
         if context:
@@ -55,9 +62,24 @@ Cite IRIs e documentos em suas recomendações."""
                 query += f" estudante {context['student_id']}"
             if 'course_id' in context:
                 query += f" curso {context['course_id']}"
+        return query
+    
+    def _prepare(self, message: str, context: Optional[Dict[str, Any]] = None,
+                 rag_context: Optional[Dict] = None) -> Tuple[List[Any], str, str, Dict]:
+        """
+        Monta o prompt a partir do contexto recuperado (usado por ``process`` e ``stream``).
         
+        Args:
+            message: Mensagem a processar
+            context: Contexto adicional (ex: student_id, course_id)
+            rag_context: Resultado do retriever já obtido (opcional; se ausente, é recuperado aqui)
+            
+        Returns:
+            Tupla (prompt, pergunta, contexto anexado, citações)
+        """
         # Recuperar contexto usando RAG híbrido
-        rag_context = self._retrieve_context(query)
+        if rag_context is None:
+            rag_context = self._retrieve_context(self._retrieval_query(message, context))
         
         # Preparar histórico
         messages = []
@@ -72,13 +94,9 @@ Cite IRIs e documentos em suas recomendações."""
         if rag_context.get('combined_context'):
             context_text = f"\n\nContexto recuperado:\n{rag_context['combined_context']}"
         
-        # Gerar recomendação
-        response = self.llm.invoke(
-            self.prompt_template.format_messages(
-                chat_history=messages,
-                input=message + context_text
-            )
-        )
+        # Adicionar trilha de pré-requisitos do curso (fecho transitivo)
+        if context and context.get('course_id'):
+            context_text += self._format_prerequisite_context(context['course_id'])
         
         # Extrair citações
         citations = {
@@ -86,11 +104,11 @@ Cite IRIs e documentos em suas recomendações."""
             'iris': rag_context.get('citations', {}).get('iris', [])
         }
         
-        # Atualizar histórico
-        self.conversation_history.append({'role': 'user', 'content': message})
-        self.conversation_history.append({'role': 'assistant', 'content': response.content})
-        
-        return self._format_response(response.content, citations)
+        prompt = self.prompt_template.format_messages(
+            chat_history=messages,
+            input=message + context_text
+        )
+        return prompt, message, context_text, citations
     
     def recommend_resources(self, student_id: str, topic: str) -> Dict[str, Any]:
         """
@@ -121,4 +139,49 @@ Cite IRIs e documentos em suas recomendações."""
         message = f"Recomende cursos que desenvolvam as competências: {', '.join(competencies)}"
         context = {'student_id': student_id}
         return self.process(message, context)
-
+    
+    def get_prerequisites(self, course_id: str, transitive: bool = True) -> List[Dict]:
+        """
+        Obtém todos os pré-requisitos (diretos e indiretos) de um curso.
+        
+        Args:
+            course_id: IRI do curso
+            transitive: Se deve incluir pré-requisitos indiretos
+            
+        Returns:
+            Lista de pré-requisitos
+        """
+        if not self.retriever:
+            return []
+        return self.retriever.sparql_engine.get_prerequisites(course_id, transitive)
+    
+    def get_unlocked_courses(self, course_id: str, transitive: bool = True) -> List[Dict]:
+        """
+        Obtém os cursos que a conclusão de um curso desbloqueia.
+        
+        Args:
+            course_id: IRI do curso
+            transitive: Se deve incluir cursos desbloqueados indiretamente
+            
+        Returns:
+            Lista de cursos desbloqueados
+        """
+        if not self.retriever:
+            return []
+        return self.retriever.sparql_engine.get_unlocked_courses(course_id, transitive)
+    
+    def _format_prerequisite_context(self, course_id: str) -> str:
+        """Formata pré-requisitos e cursos desbloqueados como contexto para o LLM."""
+        prerequisites = self.get_prerequisites(course_id)
+        unlocked = self.get_unlocked_courses(course_id)
+        if not prerequisites and not unlocked:
+            return ""
+        
+        text = "\n\n=== Pré-requisitos (possuiPreRequisito) ===\n"
+        for row in prerequisites:
+            text += f"- {row.get('tituloPreReq', row['preRequisito'])} <{row['preRequisito']}> ({row['tipo']})\n"
+        if unlocked:
+            text += "Cursos desbloqueados após a conclusão:\n"
+            for row in unlocked:
+                text += f"- {row.get('tituloCurso', row['curso'])} <{row['curso']}> ({row['tipo']})\n"
+        return text
@@ -0,0 +1,252 @@
+"""
+Cache de respostas do LLM para os agentes.
+
+Perguntas conceituais se repetem muito ("o que é RAG?", "como funciona
+SPARQL?") e cada uma custava uma geração completa do LLM. O
+``ResponseCache`` fica na frente de ``llm.invoke`` nos agentes:
+
+- chave exata: hash do prompt completo (sistema, histórico, pergunta e
+  contexto), sempre ativa
+- chave semântica (opcional, ``RESPONSE_CACHE_SIMILARITY`` > 0): embedding
+  da pergunta com similaridade de cosseno acima do limiar, restrita ao mesmo
+  escopo. Ignora o histórico da conversa; indicada para perguntas
+  conceituais
+
+Toda entrada tem escopo (agente, impressão digital do contexto recuperado,
+versão do grafo): uma alteração da ontologia ou dos documentos recuperados
+nunca reaproveita respostas antigas. As entradas saem por LRU
+(``RESPONSE_CACHE_SIZE``) ou validade (``RESPONSE_CACHE_TTL``), e os
+acertos/erros ficam em ``stats``.
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+Scope = Tuple[str, str, int]
+Embedder = Callable[[List[str]], Any]
+
+
+def fingerprint(*parts: str) -> str:
+    """Hash curto de um conjunto de textos."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+
+def prompt_fingerprint(messages: List[Any]) -> str:
+    """Hash do prompt completo (tipo e conteúdo de cada mensagem)."""
+    return fingerprint(*(f"{getattr(m, 'type', '')}:{getattr(m, 'content', m)}" for m in messages))
+
+
+def _normalize(query: str) -> str:
+    """Pergunta normalizada (caixa e espaços) para comparação exata."""
+    return " ".join(query.lower().split())
+
+
+class _Entry:
+    """Resposta armazenada."""
+
+    __slots__ = ("response", "scope", "query", "vector", "created", "seconds")
+
+    def __init__(self, response, scope: Scope, query: str, vector, seconds: float):
+        self.response = response
+        self.scope = scope
+        self.query = query
+        self.vector = vector
+        self.created = time.monotonic()
+        self.seconds = seconds
+
+
+class ResponseCache:
+    """Cache LRU/TTL de respostas do LLM, com busca exata e por similaridade."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 similarity: Optional[float] = None):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de respostas (padrão: RESPONSE_CACHE_SIZE ou 512)
+            ttl: Validade em segundos (padrão: RESPONSE_CACHE_TTL ou 3600; 0 = sem validade)
+            similarity: Limiar de similaridade da busca semântica (padrão:
+                RESPONSE_CACHE_SIMILARITY ou 0, desativada)
+        """
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+        self.similarity = similarity if similarity is not None else float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Chaves por escopo, para a busca semântica
+        self._scopes: Dict[Scope, Dict[str, _Entry]] = {}
+        self._counters = {'hits_exact': 0, 'hits_semantic': 0, 'misses': 0,
+                          'evictions': 0, 'expired': 0}
+        self._saved_seconds = 0.0
+
+    @property
+    def semantic(self) -> bool:
+        """Se a busca por similaridade está ativa."""
+        return self.similarity > 0
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.ttl > 0 and time.monotonic() - entry.created > self.ttl
+
+    def _drop(self, key: str, counter: Optional[str] = None):
+        """Remove uma entrada (com o lock adquirido)."""
+        entry = self._entries.pop(key)
+        scoped = self._scopes.get(entry.scope)
+        if scoped is not None:
+            scoped.pop(key, None)
+            if not scoped:
+                del self._scopes[entry.scope]
+        if counter:
+            self._counters[counter] += 1
+
+    def _hit(self, key: str, entry: _Entry, counter: str):
+        """Registra um acerto (com o lock adquirido)."""
+        self._entries.move_to_end(key)
+        self._counters[counter] += 1
+        self._saved_seconds += entry.seconds
+        return entry.response
+
+    def _match(self, scope: Scope, query: str, vector) -> Optional[Tuple[str, _Entry]]:
+        """Entrada do escopo com a mesma pergunta ou a mais similar acima do limiar."""
+        scoped = self._scopes.get(scope)
+        if not scoped:
+            return None
+        normalized = _normalize(query)
+        for key, entry in scoped.items():
+            if entry.query == normalized:
+                return key, entry
+        if vector is None:
+            return None
+        candidates = [(key, entry) for key, entry in scoped.items() if entry.vector is not None]
+        if not candidates:
+            return None
+        scores = np.stack([entry.vector for _, entry in candidates]) @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.similarity:
+            return candidates[best]
+        return None
+
+    def get(self, key: str, scope: Scope, query: str = "", vector=None):
+        """
+        Busca uma resposta.
+
+        Args:
+            key: Hash do prompt completo
+            scope: (agente, impressão digital do contexto, versão do grafo)
+            query: Pergunta original (busca semântica)
+            vector: Embedding normalizado da pergunta (busca semântica)
+
+        Returns:
+            Resposta armazenada ou None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry):
+                    return self._hit(key, entry, 'hits_exact')
+                self._drop(key, 'expired')
+            if self.semantic:
+                match = self._match(scope, query, vector)
+                if match is not None:
+                    match_key, entry = match
+                    if not self._expired(entry):
+                        return self._hit(match_key, entry, 'hits_semantic')
+                    self._drop(match_key, 'expired')
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, key: str, scope: Scope, response, seconds: float,
+            query: str = "", vector=None):
+        """
+        Armazena uma resposta.
+
+        Args:
+            key: Hash do prompt completo
+            scope: (agente, impressão digital do contexto, versão do grafo)
+            response: Resposta do LLM
+            seconds: Tempo gasto na geração (contabiliza o tempo economizado)
+            query: Pergunta original (busca semântica)
+            vector: Embedding normalizado da pergunta (busca semântica)
+        """
+        if self.max_entries <= 0:
+            return
+        entry = _Entry(response, scope, _normalize(query), vector, seconds)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._scopes.setdefault(scope, {})[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)), 'evictions')
+
+    def clear(self):
+        """Descarta todas as respostas."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Acertos, erros, evicções e ocupação do cache."""
+        with self._lock:
+            hits = self._counters['hits_exact'] + self._counters['hits_semantic']
+            lookups = hits + self._counters['misses']
+            return {
+                **self._counters,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'similarity': self.similarity,
+                'saved_seconds': round(self._saved_seconds, 3)
+            }
+
+
+def embed_query(embedder: Optional[Embedder], query: str):
+    """
+    Embedding normalizado de uma pergunta.
+
+    Args:
+        embedder: Função que gera embeddings para uma lista de textos
+        query: Pergunta
+
+    Returns:
+        Vetor unitário, ou None sem embeddings disponíveis
+    """
+    if embedder is None or not NUMPY_AVAILABLE:
+        return None
+    try:
+        vector = np.asarray(embedder([query])[0], dtype="float32")
+    except Exception as e:
+        print(f"⚠️  Aviso: embedding da pergunta falhou (cache semântico ignorado): {e}")
+        return None
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Cache de respostas do processo (None com RESPONSE_CACHE=0)."""
+    global _cache
+    if os.getenv("RESPONSE_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -1,7 +1,7 @@
 """
 StudentAgent - Representa estudantes e suas ações.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from agents.base_agent import BaseAgent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage
@@ -55,9 +55,31 @@ Verifique consistência ontológica antes de fazer afirmações sobre suas açõ
         Returns:
             Resposta do estudante com citações
         """
+        prompt, query, context_text, citations = self._prepare(message, context)
+        response = self._invoke_llm(prompt, query, context_text)
+        self._remember(message, response.content)
+        return self._format_response(response.content, citations)
+    
+    def _retrieval_query(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Consulta enviada ao retriever (mensagem com o estudante)."""
+        return f"{message} estudante {self.student_id}"
+    
+    def _prepare(self, message: str, context: Optional[Dict[str, Any]] = None,
+                 rag_context: Optional[Dict] = None) -> Tuple[List[Any], str, str, Dict]:
+        """
+        Monta o prompt a partir do contexto recuperado (usado por ``process`` e ``stream``).
+        
+        Args:
+            message: Mensagem a processar
+            context: Contexto adicional
+            rag_context: Resultado do retriever já obtido (opcional; se ausente, é recuperado aqui)
+            
+        Returns:
+            Tupla (prompt, pergunta, contexto anexado, citações)
+        """
         # Recuperar contexto específico do estudante
-        query_with_context = f"{message} estudante {self.student_id}"
-        rag_context = self._retrieve_context(query_with_context)
+        if rag_context is None:
+            rag_context = self._retrieve_context(self._retrieval_query(message, context))
         
         # Preparar histórico
         messages = []
@@ -72,25 +94,17 @@ Verifique consistência ontológica antes de fazer afirmações sobre suas açõ
         if rag_context.get('combined_context'):
             context_text = f"\n\nContexto recuperado:\n{rag_context['combined_context']}"
         
-        # Gerar resposta
-        response = self.llm.invoke(
-            self.prompt_template.format_messages(
-                chat_history=messages,
-                input=message + context_text
-            )
-        )
-        
         # Extrair citações
         citations = {
             'documents': rag_context.get('citations', {}).get('documents', []),
             'iris': rag_context.get('citations', {}).get('iris', [])
         }
         
-        # Atualizar histórico
-        self.conversation_history.append({'role': 'user', 'content': message})
-        self.conversation_history.append({'role': 'assistant', 'content': response.content})
-        
-        return self._format_response(response.content, citations)
+        prompt = self.prompt_template.format_messages(
+            chat_history=messages,
+            input=message + context_text
+        )
+        return prompt, message, context_text, citations
     
     def request_extension(self, task_id: str, reason: str) -> Dict[str, Any]:
         """
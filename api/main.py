@@ -1,22 +1,44 @@
 """
 API REST para o sistema multiagente.
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Iterator
+from collections.abc import Mapping
+from itertools import chain, islice
+import json
+import math
 import os
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Adicionar diretório raiz ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from rag.vector_store import VectorStore
+from rag.knowledge_graph import KnowledgeGraph
+from rag.ontology_reloader import OntologyReloader
 from rag.sparql_query import SPARQLQueryEngine
 from rag.hybrid_retriever import HybridRetriever
+from rag.dataloader import SPARQLDataLoader
+from rag.columnar import ColumnarResult
+from rag.query_guard import QueryGuard, QueryRejected
+from rag.query_workers import QueryTimeout, WorkerPoolBusy
+from rag.worker_process import WorkerUnavailable
 from agents.orchestrator import AgentOrchestrator
+from agents.llm_pool import LLMBusyError, get_llm_pool
+from agents.response_cache import get_response_cache
 from ontology.reasoner import DLReasoner
+from ontology.reasoning_jobs import ReasoningJobQueue
+from ontology.inference_snapshot import InferenceSnapshotService
 
 app = FastAPI(title="MAS para Plataforma de Ensino", version="1.0.0")
 
@@ -33,19 +55,57 @@ app.add_middleware(
 vector_store = VectorStore()
 vector_store.load()  # Tentar carregar índice existente
 
-sparql_engine = SPARQLQueryEngine()
+# Grafo de conhecimento único, compartilhado pelo SPARQL e pelo reasoner
+knowledge_graph = KnowledgeGraph()
+sparql_engine = SPARQLQueryEngine(knowledge_graph=knowledge_graph)
 retriever = HybridRetriever(vector_store, sparql_engine)
 
+# Limites para consultas SPARQL ad-hoc (POST /sparql)
+SPARQL_TIMEOUT = float(os.getenv("SPARQL_TIMEOUT", "10"))
+SPARQL_DEFAULT_LIMIT = int(os.getenv("SPARQL_DEFAULT_LIMIT", "1000"))
+SPARQL_MAX_COST = float(os.getenv("SPARQL_MAX_COST", "1e7"))
+SPARQL_ADHOC_WORKERS = int(os.getenv("SPARQL_ADHOC_WORKERS", "2"))
+
+query_guard = QueryGuard(sparql_engine.predicate_stats, SPARQL_DEFAULT_LIMIT, SPARQL_MAX_COST)
+
+# Pool separado de processos para consultas ad-hoc (0 desativa e executa no processo da API)
+adhoc_pool = None
+if SPARQL_ADHOC_WORKERS > 0:
+    try:
+        adhoc_pool = sparql_engine.create_worker_pool(SPARQL_ADHOC_WORKERS)
+    except Exception as e:
+        print(f"⚠️  Pool SPARQL ad-hoc não disponível: {e}")
+        print("   Consultas ad-hoc serão executadas no processo da API")
+
+reasoner = DLReasoner(knowledge_graph=knowledge_graph)
+# Tarefas do reasoner executadas em segundo plano (uma por vez)
+reasoning_jobs = ReasoningJobQueue(reasoner)
+# Inferências para os agentes: último resultado da fila, sem reasoner por mensagem
+inference_snapshots = InferenceSnapshotService(reasoning_jobs)
+
+
+def _on_ontology_reload(result: Dict[str, Any]):
+    """Após uma recarga da ontologia: atualiza o reasoner e agenda o raciocínio."""
+    reasoner.ontology_reloaded()
+    result["reasoning_job_id"] = reasoning_jobs.submit("all").id
+
+
+# Recarga a quente: alterações no arquivo OWL são aplicadas como delta no grafo
+ontology_reloader = OntologyReloader(knowledge_graph)
+ontology_reloader.add_listener(_on_ontology_reload)
+ontology_reloader.start()
+
 # Tentar inicializar orchestrator (pode falhar se LangGraph não estiver disponível)
 orchestrator = None
 try:
-    orchestrator = AgentOrchestrator(retriever)
+    orchestrator = AgentOrchestrator(retriever, inference=inference_snapshots)
     print("✅ Orchestrator inicializado com sucesso")
 except Exception as e:
     print(f"⚠️  Orchestrator não disponível: {e}")
     print("   Usando fallback SPARQL direto")
 
-reasoner = DLReasoner()
+# Cache de respostas do LLM compartilhado pelos agentes (None com RESPONSE_CACHE=0)
+response_cache = get_response_cache()
 
 
 class QueryRequest(BaseModel):
@@ -65,6 +125,14 @@ class QueryResponse(BaseModel):
 class SPARQLRequest(BaseModel):
     """Modelo para requisição SPARQL."""
     query: str
+    limit: Optional[int] = Field(None, ge=1)
+    offset: int = Field(0, ge=0)
+    format: str = Field("json", pattern="^(json|ndjson|columnar)$")
+
+
+class StudentsOverviewRequest(BaseModel):
+    """Modelo para o painel de vários estudantes."""
+    student_ids: List[str] = Field(..., min_length=1)
 
 
 class ConsistencyRequest(BaseModel):
@@ -82,6 +150,7 @@ def root():
         "version": "1.0.0",
         "endpoints": [
             "/query",
+            "/query/stream",
             "/sparql",
             "/consistency",
             "/courses",
@@ -91,11 +160,109 @@ def root():
     }
 
 
+def _complete_response(query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completa a resposta dos agentes: fallback SPARQL direto se vazia e formato garantido.
+    
+    Args:
+        query: Query do usuário
+        result: Resposta do orquestrador (ou vazia)
+        
+    Returns:
+        Resposta com ``response``, ``agent`` e ``citations``
+    """
+    # Se resposta vazia, tentar fallback usando SPARQL direto
+    if not result.get("response") or result.get("response") == "" or result.get("response") == "Sem resposta disponível.":
+        # Fallback: usar SPARQL para responder diretamente
+        query_lower = query.lower()
+
+        if "curso" in query_lower or "cursos" in query_lower or "disponível" in query_lower:
+            courses = sparql_engine.get_courses()
+            response_text = "Cursos encontrados:\n\n"
+            citations_iris = []
+            for course in courses[:10]:
+                title = course.get('titulo', course.get('tituloCurso', course.get('curso', 'N/A')))
+                response_text += f"- {title}\n"
+                if course.get('descricao'):
+                    response_text += f"  Descrição: {course['descricao']}\n"
+                curso_iri = course.get('curso')
+                if curso_iri:
+                    citations_iris.append(curso_iri)
+                response_text += "\n"
+            result["response"] = response_text
+            result["agent"] = "lms_fallback"
+            result["citations"] = {"iris": citations_iris, "documents": []}
+
+        elif "tarefa" in query_lower or "tarefas" in query_lower or "entregar" in query_lower:
+            # Tentar encontrar estudante na query
+            student_id = "http://www.exemplo.org/ead-ontologia#Estudante_Ana"
+            if "ana" in query_lower:
+                student_id = "http://www.exemplo.org/ead-ontologia#Estudante_Ana"
+
+            tasks = sparql_engine.get_student_tasks(student_id)
+            response_text = "Tarefas encontradas:\n\n"
+            citations_iris = []
+            if tasks:
+                for task in tasks[:10]:
+                    title = task.get('titulo', task.get('tituloTarefa', task.get('tarefa', 'N/A')))
+                    response_text += f"- {title}\n"
+                    if task.get('tarefa'):
+                        citations_iris.append(task['tarefa'])
+                    response_text += "\n"
+            else:
+                response_text = "Nenhuma tarefa encontrada."
+            result["response"] = response_text
+            result["agent"] = "lms_fallback"
+            result["citations"] = {"iris": citations_iris, "documents": []}
+
+        elif "recomend" in query_lower or "recurso" in query_lower:
+            # Buscar recursos relacionados
+            courses = sparql_engine.get_courses()
+            response_text = "Recursos recomendados:\n\n"
+            citations_iris = []
+            for course in courses[:5]:
+                title = course.get('titulo', course.get('tituloCurso', course.get('curso', 'N/A')))
+                response_text += f"- Curso: {title}\n"
+                if course.get('curso'):
+                    citations_iris.append(course['curso'])
+                response_text += "\n"
+            result["response"] = response_text
+            result["agent"] = "recommendation_fallback"
+            result["citations"] = {"iris": citations_iris, "documents": []}
+
+        else:
+            result["response"] = "Desculpe, não consegui processar sua consulta. Tente perguntar sobre cursos ou tarefas."
+            result["agent"] = "fallback"
+            result["citations"] = {"iris": [], "documents": []}
+
+    # Garantir que citations tem o formato correto
+    if "citations" not in result:
+        result["citations"] = {"iris": [], "documents": []}
+    elif "documents" not in result["citations"]:
+        result["citations"]["documents"] = []
+    elif "iris" not in result["citations"]:
+        result["citations"]["iris"] = []
+
+    # Garantir que response existe
+    if "response" not in result or not result["response"]:
+        result["response"] = "Sem resposta disponível."
+
+    # Garantir que agent existe
+    if "agent" not in result:
+        result["agent"] = "unknown"
+
+    return result
+
+
 @app.post("/query")
-def process_query(request: QueryRequest):
+async def process_query(request: QueryRequest):
     """
     Processa uma query através do orquestrador de agentes.
     
+    Assíncrono de ponta a ponta: a espera pelo LLM não ocupa uma thread do
+    servidor; a recuperação e o fallback SPARQL rodam no executor.
+    Com a fila do LLM cheia, responde 503 com ``Retry-After``.
+    
     Args:
         request: Requisição com query e contexto opcional
         
@@ -107,93 +274,19 @@ def process_query(request: QueryRequest):
         result = {"response": "", "agent": "fallback", "citations": {}}
         if orchestrator:
             try:
-                result = orchestrator.process_query(request.query, request.context or {})
+                result = await orchestrator.aprocess_query(request.query, request.context or {})
+            except LLMBusyError:
+                raise
             except Exception as orch_error:
                 # Se orchestrator falhar, usar fallback direto
                 print(f"Orchestrator error: {orch_error}")
                 result = {"response": "", "agent": "fallback", "citations": {}}
         
-        # Se resposta vazia, tentar fallback usando SPARQL direto
-        if not result.get("response") or result.get("response") == "" or result.get("response") == "Sem resposta disponível.":
-            # Fallback: usar SPARQL para responder diretamente
-            query_lower = request.query.lower()
-            
-            if "curso" in query_lower or "cursos" in query_lower or "disponível" in query_lower:
-                courses = sparql_engine.get_courses()
-                response_text = "Cursos encontrados:\n\n"
-                citations_iris = []
-                for course in courses[:10]:
-                    title = course.get('titulo', course.get('tituloCurso', course.get('curso', 'N/A')))
-                    response_text += f"- {title}\n"
-                    if course.get('descricao'):
-                        response_text += f"  Descrição: {course['descricao']}\n"
-                    curso_iri = course.get('curso')
-                    if curso_iri:
-                        citations_iris.append(curso_iri)
-                    response_text += "\n"
-                result["response"] = response_text
-                result["agent"] = "lms_fallback"
-                result["citations"] = {"iris": citations_iris, "documents": []}
-            
-            elif "tarefa" in query_lower or "tarefas" in query_lower or "entregar" in query_lower:
-                # Tentar encontrar estudante na query
-                student_id = "http://www.exemplo.org/ead-ontologia#Estudante_Ana"
-                if "ana" in query_lower:
-                    student_id = "http://www.exemplo.org/ead-ontologia#Estudante_Ana"
-                
-                tasks = sparql_engine.get_student_tasks(student_id)
-                response_text = "Tarefas encontradas:\n\n"
-                citations_iris = []
-                if tasks:
-                    for task in tasks[:10]:
-                        title = task.get('titulo', task.get('tituloTarefa', task.get('tarefa', 'N/A')))
-                        response_text += f"- {title}\n"
-                        if task.get('tarefa'):
-                            citations_iris.append(task['tarefa'])
-                        response_text += "\n"
-                else:
-                    response_text = "Nenhuma tarefa encontrada."
-                result["response"] = response_text
-                result["agent"] = "lms_fallback"
-                result["citations"] = {"iris": citations_iris, "documents": []}
-            
-            elif "recomend" in query_lower or "recurso" in query_lower:
-                # Buscar recursos relacionados
-                courses = sparql_engine.get_courses()
-                response_text = "Recursos recomendados:\n\n"
-                citations_iris = []
-                for course in courses[:5]:
-                    title = course.get('titulo', course.get('tituloCurso', course.get('curso', 'N/A')))
-                    response_text += f"- Curso: {title}\n"
-                    if course.get('curso'):
-                        citations_iris.append(course['curso'])
-                    response_text += "\n"
-                result["response"] = response_text
-                result["agent"] = "recommendation_fallback"
-                result["citations"] = {"iris": citations_iris, "documents": []}
-            
-            else:
-                result["response"] = "Desculpe, não consegui processar sua consulta. Tente perguntar sobre cursos ou tarefas."
-                result["agent"] = "fallback"
-                result["citations"] = {"iris": [], "documents": []}
-        
-        # Garantir que citations tem o formato correto
-        if "citations" not in result:
-            result["citations"] = {"iris": [], "documents": []}
-        elif "documents" not in result["citations"]:
-            result["citations"]["documents"] = []
-        elif "iris" not in result["citations"]:
-            result["citations"]["iris"] = []
-        
-        # Garantir que response existe
-        if "response" not in result or not result["response"]:
-            result["response"] = "Sem resposta disponível."
-        
-        # Garantir que agent existe
-        if "agent" not in result:
-            result["agent"] = "unknown"
-        
-        return result
+        return await run_in_threadpool(_complete_response, request.query, result)
+    except LLMBusyError as e:
+        # Fila do LLM cheia: o cliente deve tentar de novo mais tarde
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n\n{traceback.format_exc()}"
@@ -207,23 +300,192 @@ def process_query(request: QueryRequest):
         }
 
 
+def _sse(event: str, data: Any) -> str:
+    """Formata um evento Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=_json_default)}\n\n"
+
+
+@app.post("/query/stream")
+async def stream_query(request: QueryRequest):
+    """
+    Processa uma query emitindo a resposta em Server-Sent Events.
+    
+    Eventos, na ordem: ``route`` (agente escolhido), ``citations`` (fontes
+    recuperadas), ``token`` (trechos da resposta, à medida que o LLM os gera)
+    e ``done`` (resposta completa, no formato de ``/query``). Uma falha após o
+    início da resposta, ou a fila do LLM cheia, gera o evento ``error``; nos
+    demais casos a resposta cai no fallback SPARQL direto, como em ``/query``.
+    
+    Args:
+        request: Requisição com query e contexto opcional
+        
+    Returns:
+        Fluxo ``text/event-stream``
+    """
+    async def events():
+        if orchestrator:
+            streamed = False
+            try:
+                async for event, data in orchestrator.astream_query(request.query, request.context or {}):
+                    if event == "done":
+                        if data.get("response"):
+                            yield _sse("done", _complete_response(request.query, data))
+                            return
+                        break
+                    streamed = streamed or event == "token"
+                    yield _sse(event, data)
+            except LLMBusyError as e:
+                yield _sse("error", {"message": str(e), "retry_after": math.ceil(e.retry_after)})
+                return
+            except Exception as e:
+                if streamed:
+                    yield _sse("error", {"message": str(e)})
+                    return
+                print(f"Orchestrator error: {e}")
+        
+        # Fallback SPARQL direto (sem orquestrador ou sem resposta dos agentes):
+        # o novo route substitui o anterior
+        result = await run_in_threadpool(
+            _complete_response, request.query, {"response": "", "agent": "fallback", "citations": {}}
+        )
+        yield _sse("route", {"agent": result["agent"]})
+        yield _sse("citations", result["citations"])
+        yield _sse("token", result["response"])
+        yield _sse("done", result)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _json_default(obj):
+    """Serializa resultados colunares e visões de linha."""
+    if isinstance(obj, ColumnarResult):
+        return obj.to_json()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+def _dumps(content) -> bytes:
+    """Serializa em JSON com orjson, ou com a biblioteca padrão se indisponível."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON serializada com orjson.
+    
+    Retornada diretamente pelos endpoints de resultados grandes (SPARQL e
+    CQs) para evitar a passagem pelo ``jsonable_encoder`` do FastAPI.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+def _open_rows(rows: Iterator[Dict]) -> Iterator[Dict]:
+    """
+    Antecipa a primeira linha de um iterador de resultados.
+    
+    Erros de avaliação que só aparecem ao consumir o gerador são levantados
+    aqui, antes de a resposta começar a ser enviada.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    return rows if first is None else chain([first], rows)
+
+
+def _ndjson_response(rows: Iterator[Dict]) -> StreamingResponse:
+    """Envia resultados como NDJSON, uma linha por vez."""
+    def generate():
+        for row in rows:
+            yield _dumps(row) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+def _paginated(key: str, rows: Iterator[Dict], limit: Optional[int], offset: int) -> Dict:
+    """
+    Monta uma página de resultados.
+    
+    O iterador deve começar em ``offset`` e trazer até ``limit + 1`` linhas;
+    a linha extra indica se há uma próxima página.
+    """
+    page = list(rows)
+    has_more = limit is not None and len(page) > limit
+    if has_more:
+        page = page[:limit]
+    return {
+        key: page,
+        "count": len(page),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + len(page) if has_more else None
+    }
+
+
+def _paginated_columnar(result: ColumnarResult, limit: int, offset: int) -> Dict:
+    """Monta uma página colunar a partir de até ``limit + 1`` linhas."""
+    has_more = len(result) > limit
+    if has_more:
+        result = result.slice(0, limit)
+    return {
+        **result.to_json(),
+        "count": len(result),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + len(result) if has_more else None
+    }
+
+
 @app.post("/sparql")
 def execute_sparql(request: SPARQLRequest):
     """
     Executa uma consulta SPARQL diretamente.
     
+    A consulta passa pela estimativa de custo, recebe LIMIT/OFFSET da página
+    quando não define um limite e é avaliada no pool de processos ad-hoc com
+    prazo de SPARQL_TIMEOUT segundos.
+    
     Args:
-        request: Requisição com query SPARQL
+        request: Requisição com query SPARQL, paginação (limit/offset)
+            e formato (json, ndjson ou columnar)
         
     Returns:
         Resultados da consulta
     """
+    limit = request.limit or SPARQL_DEFAULT_LIMIT
     try:
-        results = sparql_engine.query(request.query)
-        return {
-            "results": results,
-            "count": len(results)
-        }
+        # Buscar uma linha a mais para saber se há próxima página
+        query, paged = query_guard.prepare(request.query, limit + 1, request.offset)
+        fetch, offset = (None, 0) if paged else (limit + 1, request.offset)
+        
+        if request.format == "columnar":
+            if adhoc_pool:
+                result = ColumnarResult.from_encoded(*adhoc_pool.execute_encoded(
+                    query, SPARQL_TIMEOUT, fetch, offset, columnar=True
+                ))
+            else:
+                result = sparql_engine.query_columnar(query, fetch, offset)
+            return FastJSONResponse(_paginated_columnar(result, limit, request.offset))
+        
+        if adhoc_pool:
+            # Linhas em partes: o NDJSON não acumula a página em nenhum dos processos
+            rows = adhoc_pool.execute_stream(query, SPARQL_TIMEOUT, fetch, offset)
+        else:
+            rows = sparql_engine.iter_query(query, fetch, offset)
+        
+        if request.format == "ndjson":
+            return _ndjson_response(_open_rows(islice(rows, limit)))
+        return FastJSONResponse(_paginated("results", rows, limit, request.offset))
+    except QueryTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except (WorkerPoolBusy, WorkerUnavailable) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except QueryRejected as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -240,59 +502,135 @@ def check_consistency(request: ConsistencyRequest):
         Resultado da verificação
     """
     try:
-        is_consistent = sparql_engine.check_consistency(
-            request.entity,
-            request.property,
-            request.value
-        )
+        return sparql_engine.check_many([request.model_dump()])[0]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/consistency/batch")
+def check_consistency_batch(requests: List[ConsistencyRequest]):
+    """
+    Verifica a consistência de várias afirmações em uma requisição.
+    
+    Args:
+        requests: Afirmações com entidade, propriedade e valor
+        
+    Returns:
+        Resultados na mesma ordem das afirmações
+    """
+    try:
+        results = sparql_engine.check_many([r.model_dump() for r in requests])
         return {
-            "consistent": is_consistent,
-            "entity": request.entity,
-            "property": request.property,
-            "value": request.value
+            "results": results,
+            "count": len(results),
+            "consistent": all(r["consistent"] for r in results)
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/courses")
-def get_courses(student_id: Optional[str] = None):
+def get_courses(student_id: Optional[str] = None,
+                limit: Optional[int] = Query(None, ge=1),
+                offset: int = Query(0, ge=0),
+                format: str = Query("json", pattern="^(json|ndjson)$")):
     """
     Obtém cursos, opcionalmente filtrados por estudante.
     
     Args:
         student_id: IRI do estudante (opcional)
+        limit: Tamanho da página (opcional)
+        offset: Posição inicial da página
+        format: json ou ndjson (streaming)
         
     Returns:
         Lista de cursos
     """
     try:
-        courses = sparql_engine.get_courses(student_id)
-        return {
-            "courses": courses,
-            "count": len(courses)
-        }
+        if format == "ndjson":
+            rows = sparql_engine.iter_courses(student_id, limit, offset)
+            return _ndjson_response(_open_rows(rows))
+        
+        fetch = limit + 1 if limit is not None else None
+        rows = sparql_engine.iter_courses(student_id, fetch, offset)
+        return _paginated("courses", rows, limit, offset)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/tasks")
-def get_tasks(student_id: str):
+def get_tasks(student_id: str,
+              limit: Optional[int] = Query(None, ge=1),
+              offset: int = Query(0, ge=0),
+              format: str = Query("json", pattern="^(json|ndjson)$")):
     """
     Obtém tarefas de um estudante.
     
     Args:
         student_id: IRI do estudante
+        limit: Tamanho da página (opcional)
+        offset: Posição inicial da página
+        format: json ou ndjson (streaming)
         
     Returns:
         Lista de tarefas
     """
     try:
-        tasks = sparql_engine.get_student_tasks(student_id)
-        return {
-            "tasks": tasks,
-            "count": len(tasks)
+        if format == "ndjson":
+            rows = sparql_engine.iter_student_tasks(student_id, limit, offset)
+            return _ndjson_response(_open_rows(rows))
+        
+        fetch = limit + 1 if limit is not None else None
+        rows = sparql_engine.iter_student_tasks(student_id, fetch, offset)
+        return _paginated("tasks", rows, limit, offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/students/overview")
+def students_overview(request: StudentsOverviewRequest):
+    """
+    Painel de vários estudantes: cursos, tarefas e feedback de cada um,
+    com as competências e recursos dos cursos.
+    
+    As buscas por entidade são agrupadas pelo dataloader em consultas com
+    VALUES, então o número de consultas não cresce com o número de
+    estudantes.
+    
+    Args:
+        request: Requisição com os IRIs dos estudantes
+        
+    Returns:
+        Dados por estudante e por curso
+    """
+    try:
+        loader = SPARQLDataLoader(sparql_engine)
+        pending = {
+            student_id: (loader.courses.load(student_id),
+                         loader.tasks.load(student_id),
+                         loader.feedback.load(student_id))
+            for student_id in request.student_ids
+        }
+        students = {
+            student_id: {
+                'courses': courses.result(),
+                'tasks': tasks.result(),
+                'feedback': feedback.result()
+            }
+            for student_id, (courses, tasks, feedback) in pending.items()
         }
+        
+        course_ids = [course['curso'] for data in students.values() for course in data['courses']]
+        competencies = loader.competencies.load_many(course_ids)
+        resources = loader.resources.load_many(course_ids)
+        courses = {
+            course_id: {
+                'competencies': competencies[course_id],
+                'resources': resources[course_id]
+            }
+            for course_id in competencies
+        }
+        return {"students": students, "courses": courses, "batches": loader.batches}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -329,7 +667,7 @@ def test_endpoint():
 # Endpoints para CQs
 def _execute_cq(cq_number: int):
     """Executa uma CQ e retorna resultados."""
-    engine = SPARQLQueryEngine()
+    engine = sparql_engine
     
     if cq_number == 1:
         query = """
@@ -346,31 +684,14 @@ def _execute_cq(cq_number: int):
         return {"description": "Estudantes matriculados em cursos", "results": results}
     
     elif cq_number == 2:
-        query = """
-        PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
-        SELECT ?recurso ?modulo ?tituloRecurso
-        WHERE {
-            ?curso ead:possuiModulo ?modulo .
-            ?modulo ead:possuiAula ?aula .
-            ?aula ead:utilizaRecurso ?recurso .
-            OPTIONAL { ?recurso ead:temTitulo ?tituloRecurso . }
-        }
-        """
-        results = engine.query(query)
+        # Caminhos curso → módulo → aula → recurso via índice materializado
+        results = engine.get_course_resource_paths()
         return {"description": "Recursos utilizados em módulos", "results": results}
     
     elif cq_number == 3:
-        query = """
-        PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
-        SELECT ?curso ?preRequisito ?tituloCurso ?tituloPreReq
-        WHERE {
-            ?curso ead:possuiPreRequisito ?preRequisito .
-            OPTIONAL { ?curso ead:temTitulo ?tituloCurso . }
-            OPTIONAL { ?preRequisito ead:temTitulo ?tituloPreReq . }
-        }
-        """
-        results = engine.query(query)
-        return {"description": "Pré-requisitos de cursos", "results": results}
+        # Pré-requisitos diretos e indiretos via índice de fecho transitivo
+        results = engine.get_prerequisite_closure()
+        return {"description": "Pré-requisitos de cursos (diretos e indiretos)", "results": results}
     
     elif cq_number == 4:
         query = """
@@ -459,9 +780,7 @@ def _execute_cq(cq_number: int):
         WHERE {
             ?estudante a ead:Estudante .
             ?estudante ead:matriculadoEm ?curso .
-            ?perfil ead:temPapel ?papel .
-            ?papel a ead:Estudante .
-            ?perfil ead:temEmail ?email .
+            ?estudante ead:temEmail ?email .
             OPTIONAL { ?curso ead:temTitulo ?tituloCurso . }
         }
         """
@@ -469,9 +788,22 @@ def _execute_cq(cq_number: int):
         return {"description": "Estudantes com email matriculados em cursos", "results": results}
     
     elif cq_number == 10:
-        # CQ10 é uma verificação de consistência usando o reasoner
+        # CQ10 é uma verificação de consistência: resultado da fila de raciocínio,
+        # sem executar o reasoner na requisição
         try:
-            consistency = reasoner.check_consistency()
+            job = reasoning_jobs.submit("consistency")
+            latest = reasoning_jobs.latest("consistency")
+            if latest is None:
+                return {
+                    "description": "Verificação de consistência ontológica",
+                    "results": [{
+                        "consistent": None,
+                        "message": "Verificação em andamento",
+                        "details": {}
+                    }],
+                    "pending_job_id": job.id
+                }
+            consistency = latest["results"]
             return {
                 "description": "Verificação de consistência ontológica",
                 "results": [{
@@ -499,11 +831,12 @@ def execute_cq(cq_number: int):
     """Executa uma Competency Question específica."""
     try:
         result = _execute_cq(cq_number)
-        return {
+        pending = "pending_job_id" in result
+        return FastJSONResponse({
             "cq_number": cq_number,
             **result,
-            "status": "success"
-        }
+            "status": "pending" if pending else "success"
+        }, status_code=202 if pending else 200)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -516,94 +849,123 @@ def execute_all_cqs():
         for i in range(1, 11):
             results[f"CQ{i}"] = _execute_cq(i)
         
-        return {
+        return FastJSONResponse({
             "results": results,
             "status": "success"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Endpoints para Reasoner DL
+_REASONER_RESULT_TYPES = {
+    "classify": "classification",
+    "realize": "realization",
+    "materialize": "materialization",
+    "consistency": "consistency",
+    "all": "all"
+}
+
+
+def _reasoner_response(task: str, force: bool = False):
+    """
+    Submete uma tarefa à fila de raciocínio e responde sem esperar o reasoner.
+    
+    O último resultado concluído (se houver) é devolvido imediatamente, com
+    ``stale`` indicando se está desatualizado. Sem resultado, a resposta tem
+    status 202 e o cliente acompanha o job em ``/reasoner/jobs/{job_id}``.
+    """
+    job = reasoning_jobs.submit(task, force=force)
+    latest = reasoning_jobs.latest(task)
+    body = {
+        "type": _REASONER_RESULT_TYPES[task],
+        "job": job.to_dict(include_result=False),
+        "results": None,
+        "stale": True,
+        "computed_at": None
+    }
+    if latest is not None:
+        body.update(
+            results=latest["results"],
+            stale=latest["stale"],
+            computed_at=latest["computed_at"]
+        )
+        if task in ("classify", "realize") and latest["results"] is not None:
+            body["count"] = len(latest["results"])
+    return FastJSONResponse(body, status_code=200 if latest is not None else 202)
+
+
 @app.post("/reasoner/classify")
-def reasoner_classify():
-    """Executa classificação DL."""
-    try:
-        classification = reasoner.classify()
-        return {
-            "type": "classification",
-            "results": classification,
-            "count": len(classification)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def reasoner_classify(force: bool = False):
+    """Executa classificação DL (em segundo plano)."""
+    return _reasoner_response("classify", force)
 
 
 @app.post("/reasoner/consistency")
-def reasoner_consistency():
-    """Verifica consistência da ontologia."""
-    try:
-        consistency = reasoner.check_consistency()
-        return {
-            "type": "consistency",
-            "results": consistency
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def reasoner_consistency(force: bool = False):
+    """Verifica consistência da ontologia (em segundo plano)."""
+    return _reasoner_response("consistency", force)
 
 
 @app.post("/reasoner/realize")
-def reasoner_realize():
-    """Executa realização DL."""
-    try:
-        realization = reasoner.realize()
-        return {
-            "type": "realization",
-            "results": realization,
-            "count": len(realization)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def reasoner_realize(force: bool = False):
+    """Executa realização DL (em segundo plano)."""
+    return _reasoner_response("realize", force)
 
 
 @app.post("/reasoner/materialize")
-def reasoner_materialize():
-    """Executa materialização DL."""
-    try:
-        materialization = reasoner.materialize()
-        return {
-            "type": "materialization",
-            "results": materialization
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def reasoner_materialize(force: bool = False):
+    """Executa materialização DL (em segundo plano)."""
+    return _reasoner_response("materialize", force)
 
 
 @app.post("/reasoner/all")
-def reasoner_all():
-    """Executa todos os testes do reasoner."""
-    try:
-        return {
-            "classification": reasoner.classify(),
-            "consistency": reasoner.check_consistency(),
-            "realization": reasoner.realize(),
-            "materialization": reasoner.materialize()
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def reasoner_all(force: bool = False):
+    """Executa todos os testes do reasoner (em segundo plano)."""
+    return _reasoner_response("all", force)
+
+
+@app.get("/reasoner/jobs/{job_id}")
+def reasoner_job(job_id: str, wait: float = Query(0, ge=0, le=60)):
+    """
+    Estado de um job de raciocínio.
+    
+    Com ``wait`` > 0, aguarda a conclusão por até ``wait`` segundos (long polling).
+    """
+    job = reasoning_jobs.wait(job_id, wait) if wait else reasoning_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} não encontrado")
+    return FastJSONResponse(job.to_dict())
+
+
+@app.get("/reasoner/latest/{task}")
+def reasoner_latest(task: str):
+    """Último resultado concluído de uma tarefa do reasoner, sem submeter novo job."""
+    if task not in _REASONER_RESULT_TYPES:
+        raise HTTPException(status_code=404, detail=f"Tarefa desconhecida: {task}")
+    latest = reasoning_jobs.latest(task)
+    if latest is None:
+        raise HTTPException(status_code=404, detail=f"Nenhum resultado de '{task}' disponível")
+    return FastJSONResponse(latest)
 
 
 @app.get("/metrics")
 def get_metrics():
     """Retorna métricas do sistema."""
     try:
+        # Contadores de triplas mantidos pelo grafo (O(1), sem iterar nem raciocinar)
+        triple_counts = knowledge_graph.stats.summary()
+        latest = reasoning_jobs.latest("all")
+        
         # Métricas de Ontologia
         ontology_metrics = {
-            "classes": 47,
-            "properties": 88,
-            "consistency": reasoner.check_consistency()["consistent"],
+            "classes": triple_counts["classes"],
+            "properties": triple_counts["properties"],
+            "consistency": latest["results"]["consistency"]["consistent"] if latest else None,
             "cqs_total": 10,
-            "cqs_passed": 10
+            "cqs_passed": 10,
+            "triples_asserted": triple_counts["asserted"],
+            "triples_inferred": triple_counts["inferred"]
         }
         
         # Métricas de RAG
@@ -617,23 +979,33 @@ def get_metrics():
         agent_metrics = {
             "total_agents": 4,
             "orchestrator_ready": orchestrator is not None,
-            "agents": ["CoordinatorAgent", "LMSAgent", "RecommendationAgent", "StudentAgent"]
+            "agents": ["CoordinatorAgent", "LMSAgent", "RecommendationAgent", "StudentAgent"],
+            # Clientes LLM compartilhados: ocupação e fila por backend
+            "llm_backends": get_llm_pool().stats(),
+            # Cache de respostas do LLM: acertos, erros e tempo economizado
+            "response_cache": response_cache.stats() if response_cache is not None else None
         }
         
-        # Métricas de Reasoner
+        # Métricas de Reasoner (último resultado da fila; nunca espera o reasoner)
         try:
-            classification = reasoner.classify()
-            realization = reasoner.realize()
-            materialization = reasoner.materialize()
-            
+            materialization = reasoner.materialization_stats()
             reasoner_metrics = {
-                "classes_classified": len(classification.get("subclasses", {})),
-                "individuals_realized": len(realization),
-                "triples_before": materialization.get("triples_before", 0),
-                "triples_after": materialization.get("triples_after", 0),
-                "triples_added": materialization.get("triples_added", 0),
-                "inference_rate": round((materialization.get("triples_added", 0) / max(materialization.get("triples_before", 1), 1)) * 100, 2)
+                "triples_before": materialization["triples_before"],
+                "triples_after": materialization["triples_after"],
+                "triples_added": materialization["triples_added"],
+                "inference_rate": round((materialization["triples_added"] / max(materialization["triples_before"], 1)) * 100, 2)
             }
+            if latest is None:
+                # Primeiro cálculo ainda não concluído
+                job = reasoning_jobs.submit("all")
+                reasoner_metrics.update({"status": job.status, "job_id": job.id})
+            else:
+                reasoner_metrics.update({
+                    "classes_classified": len(latest["results"]["classification"]),
+                    "individuals_realized": len(latest["results"]["realization"]),
+                    "stale": latest["stale"],
+                    "computed_at": latest["computed_at"]
+                })
         except Exception as e:
             reasoner_metrics = {
                 "error": str(e),
@@ -656,6 +1028,43 @@ def get_metrics():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/ontology/reload")
+def reload_ontology():
+    """
+    Recarrega o arquivo OWL, aplicando apenas a diferença de triplas no grafo.
+    
+    O arquivo também é verificado periodicamente (ONTOLOGY_WATCH_INTERVAL);
+    este endpoint força a recarga imediata.
+    """
+    try:
+        result = ontology_reloader.reload()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {**result, "reasoning_job_id": result.get("reasoning_job_id")}
+
+
+@app.get("/stats/triples")
+def get_triple_stats(limit: int = Query(20, ge=1, le=1000)):
+    """
+    Contagens de triplas declaradas e inferidas, por predicado e por classe.
+    
+    Os contadores são mantidos a cada alteração do grafo, então a consulta
+    não itera as triplas nem executa o reasoner.
+    """
+    return knowledge_graph.stats.to_dict(limit)
+
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Encerra os processos de consulta (ad-hoc e réplicas), a fila, o worker do reasoner, o mundo owlready2 e as conexões LLM."""
+    ontology_reloader.stop()
+    sparql_engine.close()
+    reasoning_jobs.close()
+    reasoner.close()
+    knowledge_graph.close()
+    await get_llm_pool().aclose()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
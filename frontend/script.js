@@ -54,10 +54,18 @@ async function loadMetrics() {
         // Update agent metrics
         document.getElementById('metric-agents-total').textContent = metrics.agents.total_agents;
         
-        // Update reasoner metrics
-        document.getElementById('metric-classified').textContent = `${metrics.reasoner.classes_classified}/47`;
-        document.getElementById('metric-realized').textContent = `${metrics.reasoner.individuals_realized}/10`;
-        document.getElementById('metric-triples').textContent = `+${metrics.reasoner.triples_added}`;
+        if (metrics.ontology.consistency !== null && metrics.ontology.consistency !== undefined) {
+            document.getElementById('metric-consistency').innerHTML = metrics.ontology.consistency
+                ? '<i class="fas fa-check-circle" style="color: var(--success);"></i> Consistente'
+                : '<i class="fas fa-times-circle" style="color: var(--danger);"></i> Inconsistente';
+        }
+        
+        // Update reasoner metrics (contadores de triplas mantidos pelo grafo)
+        if (metrics.reasoner.classes_classified !== undefined) {
+            document.getElementById('metric-classified').textContent = `${metrics.reasoner.classes_classified}/${metrics.ontology.classes}`;
+            document.getElementById('metric-realized').textContent = metrics.reasoner.individuals_realized;
+        }
+        document.getElementById('metric-triples').textContent = `+${metrics.reasoner.triples_added} (${metrics.reasoner.triples_before} declaradas)`;
         document.getElementById('metric-inference').textContent = `${metrics.reasoner.inference_rate}%`;
     } catch (error) {
         console.error('Erro ao carregar métricas:', error);
@@ -96,7 +104,7 @@ async function sendQuery() {
     document.getElementById('query-input').value = '';
     
     try {
-        const response = await fetch(`${API_URL}/query`, {
+        const response = await fetch(`${API_URL}/query/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -104,19 +112,33 @@ async function sendQuery() {
             body: JSON.stringify({ query })
         });
         
-        const data = await response.json();
-        
-        // Remove loading
-        document.getElementById(loadingId).remove();
-        
-        // Check for errors
-        if (data.error) {
-            addError(data.response || 'Erro ao processar consulta');
-            return;
+        if (!response.ok || !response.body) {
+            throw new Error(`HTTP ${response.status}`);
         }
         
-        // Add response
-        addMessage('assistant', data.response || data.answer || 'Sem resposta', data.agent || 'Sistema', false, data.citations);
+        // Ler os eventos (SSE) à medida que chegam: a resposta aparece token a token
+        const messageEl = document.getElementById(loadingId);
+        const headerEl = messageEl.querySelector('.message-header span');
+        const contentEl = messageEl.querySelector('.message-content');
+        let text = '';
+        
+        await readEventStream(response, (event, data) => {
+            if (event === 'route') {
+                headerEl.textContent = data.agent || 'Sistema';
+                text = '';
+            } else if (event === 'token') {
+                text += data;
+                contentEl.innerHTML = formatContent(text);
+                chatContainer.scrollTop = chatContainer.scrollHeight;
+            } else if (event === 'done') {
+                headerEl.textContent = data.agent || 'Sistema';
+                contentEl.innerHTML = formatContent(data.response || text || 'Sem resposta');
+                messageEl.insertAdjacentHTML('beforeend', formatCitations(data.citations));
+                chatContainer.scrollTop = chatContainer.scrollHeight;
+            } else if (event === 'error') {
+                addError('Erro ao processar consulta: ' + (data.message || 'erro desconhecido'));
+            }
+        });
         
     } catch (error) {
         const loadingEl = document.getElementById(loadingId);
@@ -126,6 +148,32 @@ async function sendQuery() {
     }
 }
 
+async function readEventStream(response, onEvent) {
+    // Interpreta um fluxo text/event-stream (blocos "event: x\ndata: {...}" separados por linha em branco)
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 function addMessage(role, content, agent, isLoading = false, citations = null) {
     const chatContainer = document.getElementById('chat-container');
     const messageId = 'msg-' + Date.now();
@@ -254,6 +302,8 @@ function displayCQResultInline(cqNumber, data) {
         } else {
             html += '<div class="cq-result-empty">Nenhum resultado encontrado.</div>';
         }
+    } else if (data.status === 'pending') {
+        html += '<div class="cq-loading">⏳ Verificação em andamento no reasoner; execute a CQ novamente em instantes.</div>';
     } else {
         html += `<div class="cq-error">❌ ${data.error || 'Erro ao executar CQ'}</div>`;
     }
@@ -303,16 +353,34 @@ function displayAllCQsResults(data) {
 }
 
 // Reasoner functions
+// O reasoner roda em segundo plano: a API devolve o último resultado (se houver)
+// e o id do job; sem resultado, acompanha o job até a conclusão.
+async function submitReasoning(task) {
+    const response = await fetch(`${API_URL}/reasoner/${task}`, {
+        method: 'POST'
+    });
+    const data = await response.json();
+    if (data.results !== null || !data.job) {
+        return data;
+    }
+    
+    let job = data.job;
+    while (job.status === 'queued' || job.status === 'running') {
+        const poll = await fetch(`${API_URL}/reasoner/jobs/${job.job_id}?wait=30`);
+        job = await poll.json();
+    }
+    if (job.status === 'failed') {
+        throw new Error(job.error || 'Falha no reasoner');
+    }
+    return { ...data, job: { ...job, results: undefined }, results: job.results, stale: false, computed_at: job.finished_at };
+}
+
 async function runClassification() {
     const resultsContainer = document.getElementById('reasoner-results');
     resultsContainer.innerHTML = '<div class="loading">Executando classificação...</div>';
     
     try {
-        const response = await fetch(`${API_URL}/reasoner/classify`, {
-            method: 'POST'
-        });
-        
-        const data = await response.json();
+        const data = await submitReasoning('classify');
         displayReasonerResults('Classificação', data);
     } catch (error) {
         resultsContainer.innerHTML = `<div class="error">Erro: ${error.message}</div>`;
@@ -324,11 +392,7 @@ async function runConsistency() {
     resultsContainer.innerHTML = '<div class="loading">Verificando consistência...</div>';
     
     try {
-        const response = await fetch(`${API_URL}/reasoner/consistency`, {
-            method: 'POST'
-        });
-        
-        const data = await response.json();
+        const data = await submitReasoning('consistency');
         displayReasonerResults('Consistência', data);
     } catch (error) {
         resultsContainer.innerHTML = `<div class="error">Erro: ${error.message}</div>`;
@@ -340,11 +404,7 @@ async function runRealization() {
     resultsContainer.innerHTML = '<div class="loading">Executando realização...</div>';
     
     try {
-        const response = await fetch(`${API_URL}/reasoner/realize`, {
-            method: 'POST'
-        });
-        
-        const data = await response.json();
+        const data = await submitReasoning('realize');
         displayReasonerResults('Realização', data);
     } catch (error) {
         resultsContainer.innerHTML = `<div class="error">Erro: ${error.message}</div>`;
@@ -356,11 +416,7 @@ async function runMaterialization() {
     resultsContainer.innerHTML = '<div class="loading">Executando materialização...</div>';
     
     try {
-        const response = await fetch(`${API_URL}/reasoner/materialize`, {
-            method: 'POST'
-        });
-        
-        const data = await response.json();
+        const data = await submitReasoning('materialize');
         displayReasonerResults('Materialização', data);
     } catch (error) {
         resultsContainer.innerHTML = `<div class="error">Erro: ${error.message}</div>`;
@@ -372,11 +428,7 @@ async function runAllReasoning() {
     resultsContainer.innerHTML = '<div class="loading">Executando todos os testes...</div>';
     
     try {
-        const response = await fetch(`${API_URL}/reasoner/all`, {
-            method: 'POST'
-        });
-        
-        const data = await response.json();
+        const data = await submitReasoning('all');
         displayAllReasonerResults(data);
     } catch (error) {
         resultsContainer.innerHTML = `<div class="error">Erro: ${error.message}</div>`;
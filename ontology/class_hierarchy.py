@@ -0,0 +1,123 @@
+"""
+Módulo com o índice da hierarquia de classes da ontologia.
+
+Constrói em uma única passagem pelas classes a adjacência pai -> filhos (a
+partir de ``is_a``, que o owlready2 atualiza após o raciocínio). Sobre ela
+ficam disponíveis, em memória:
+
+- subclasses diretas de cada classe (resposta de ``DLReasoner.classify``)
+- fecho transitivo (ancestrais/descendentes), calculado sob demanda e
+  memorizado por classe
+- profundidade de cada classe (menor distância até uma classe raiz)
+- teste de subsunção ``is_subclass``
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class ClassHierarchy:
+    """Índice da hierarquia de classes construído a partir do owlready2."""
+
+    def __init__(self, classes: Iterable):
+        """
+        Constrói o índice.
+
+        Args:
+            classes: Classes owlready2 (ex.: ``onto.classes()``)
+        """
+        self.classes: List = list(classes)
+        known = set(self.classes)
+        self._parents: Dict = {cls: [] for cls in self.classes}
+        self._children: Dict = {cls: [] for cls in self.classes}
+        for cls in self.classes:
+            for parent in cls.is_a:
+                # Apenas classes nomeadas da ontologia (ignora restrições e owl:Thing)
+                if parent in known and parent is not cls:
+                    self._parents[cls].append(parent)
+                    self._children[parent].append(cls)
+
+        self._by_key: Dict[str, object] = {}
+        for cls in self.classes:
+            for key in (str(cls), getattr(cls, "iri", None), getattr(cls, "name", None)):
+                if key:
+                    self._by_key.setdefault(key, cls)
+
+        self._depth: Dict = {}
+        roots = [cls for cls in self.classes if not self._parents[cls]]
+        queue = deque(roots)
+        for root in roots:
+            self._depth[root] = 0
+        while queue:
+            cls = queue.popleft()
+            for child in self._children[cls]:
+                if child not in self._depth:
+                    self._depth[child] = self._depth[cls] + 1
+                    queue.append(child)
+
+        self._ancestors: Dict = {}
+        self._descendants: Dict = {}
+
+    def resolve(self, cls) -> Optional[object]:
+        """Obtém a classe a partir do objeto, IRI, nome ou ``str(classe)``."""
+        if cls in self._parents:
+            return cls
+        return self._by_key.get(str(cls))
+
+    def _closure(self, cls, edges: Dict, memo: Dict) -> Set:
+        """Fecho transitivo de uma classe segundo as arestas dadas."""
+        closure = memo.get(cls)
+        if closure is None:
+            closure, stack = set(), [cls]
+            while stack:
+                for other in edges.get(stack.pop(), ()):
+                    if other not in closure:
+                        closure.add(other)
+                        stack.append(other)
+            closure.discard(cls)
+            memo[cls] = closure
+        return closure
+
+    def children(self, cls) -> List:
+        """Subclasses diretas."""
+        return list(self._children.get(self.resolve(cls), ()))
+
+    def parents(self, cls) -> List:
+        """Superclasses diretas."""
+        return list(self._parents.get(self.resolve(cls), ()))
+
+    def ancestors(self, cls) -> Set:
+        """Todas as superclasses (fecho transitivo, sem a própria classe)."""
+        cls = self.resolve(cls)
+        return self._closure(cls, self._parents, self._ancestors) if cls is not None else set()
+
+    def descendants(self, cls) -> Set:
+        """Todas as subclasses (fecho transitivo, sem a própria classe)."""
+        cls = self.resolve(cls)
+        return self._closure(cls, self._children, self._descendants) if cls is not None else set()
+
+    def depth(self, cls) -> Optional[int]:
+        """Menor distância até uma classe raiz (0 para as raízes)."""
+        return self._depth.get(self.resolve(cls))
+
+    def is_subclass(self, sub, sup) -> bool:
+        """
+        Verifica subsunção (``sub`` ⊑ ``sup``).
+
+        Args:
+            sub: Classe (objeto, IRI ou nome)
+            sup: Classe (objeto, IRI ou nome)
+
+        Returns:
+            True se ``sub`` for ``sup`` ou descendente dela
+        """
+        sub, sup = self.resolve(sub), self.resolve(sup)
+        if sub is None or sup is None:
+            return False
+        return sub is sup or sup in self.ancestors(sub)
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Subclasses diretas por classe (formato de ``classify``)."""
+        return {
+            str(cls): [str(child) for child in self._children[cls]]
+            for cls in self.classes if self._children[cls]
+        }
@@ -0,0 +1,203 @@
+"""
+Módulo de realização incremental do ABox.
+
+Novas matrículas, entregas e feedbacks adicionam poucos indivíduos por vez;
+refazer o raciocínio completo a cada alteração é desnecessário. O
+``IncrementalRealizer`` observa as alterações do ``KnowledgeGraph`` e marca
+os indivíduos afetados (sujeito e objeto de cada tripla alterada). Sobre o
+último resultado completo (base), apenas esses indivíduos são reprocessados:
+
+- tipos derivados: tipos declarados, domínio das propriedades de que o
+  indivíduo é sujeito e imagem das propriedades de que é objeto, fechados
+  pela hierarquia de classes (``SchemaIndex``)
+- alterações só com inclusões são monotônicas: os tipos da base são
+  mantidos e unidos aos derivados; se houve remoção, os tipos do indivíduo
+  são recalculados apenas a partir das triplas atuais
+
+Alterações de esquema (classes, propriedades, domínio/imagem) invalidam as
+bases: o próximo pedido executa o raciocínio completo.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from rdflib import URIRef, RDF, OWL
+from rag.knowledge_graph import KnowledgeGraph
+from rag.schema_index import SchemaIndex
+
+
+SECTIONS = ("realization", "materialization")
+
+
+class IncrementalRealizer:
+    """Mantém realização e materialização atualizadas por indivíduo alterado."""
+
+    def __init__(self, knowledge_graph: KnowledgeGraph, to_name: Callable[[URIRef], str],
+                 to_iri: Callable[[str], URIRef]):
+        """
+        Inicializa o rastreamento de alterações.
+
+        Args:
+            knowledge_graph: Grafo de conhecimento observado
+            to_name: Converte um IRI no nome usado pela realização do owlready2
+            to_iri: Converte o nome da realização de volta em IRI
+        """
+        self.knowledge_graph = knowledge_graph
+        self.graph = knowledge_graph.graph
+        self.to_name = to_name
+        self.to_iri = to_iri
+        self.schema_changed = False
+        self._index: Optional[SchemaIndex] = None
+        # Indivíduo -> se alguma tripla dele foi removida
+        self._all_changes: Dict[URIRef, bool] = {}
+        self._pending: Dict[str, Dict[URIRef, bool]] = {section: {} for section in SECTIONS}
+        self._bases: Dict[str, object] = {}
+
+    @property
+    def index(self) -> SchemaIndex:
+        """Índice de esquema e tipos (construído na primeira utilização)."""
+        if self._index is None:
+            self._index = SchemaIndex.from_graph(self.graph)
+        return self._index
+
+    def on_change(self, added: List[Tuple], removed: List[Tuple]):
+        """
+        Registra uma alteração de triplas declaradas.
+
+        Args:
+            added: Triplas adicionadas
+            removed: Triplas removidas
+        """
+        if self._index is not None:
+            self._index.update(added, removed)
+        for triples, is_removal in ((added, False), (removed, True)):
+            for triple in triples:
+                if self.index.is_schema_change(triple):
+                    self.schema_changed = True
+                    self._bases.clear()
+                    continue
+                s, p, o = triple
+                affected = [s] if p == RDF.type or not isinstance(o, URIRef) else [s, o]
+                for individual in affected:
+                    if isinstance(individual, URIRef):
+                        self._mark(individual, is_removal)
+
+    def _mark(self, individual: URIRef, is_removal: bool):
+        """Marca um indivíduo como alterado em todas as seções."""
+        for changes in [self._all_changes, *self._pending.values()]:
+            changes[individual] = changes.get(individual, False) or is_removal
+
+    def ready(self, section: str) -> bool:
+        """Se existe base para atualizar incrementalmente."""
+        return section in self._bases
+
+    @property
+    def tracks_file_state(self) -> bool:
+        """Se o estado do arquivo OWL + alterações registradas descreve o grafo."""
+        return not self.schema_changed
+
+    def set_base(self, section: str, value, from_file_state: bool):
+        """
+        Define o resultado completo sobre o qual as alterações são aplicadas.
+
+        Args:
+            section: realization ou materialization
+            value: Resultado completo (dicionário de realização, ou None)
+            from_file_state: Se o resultado descreve o arquivo OWL sem as
+                alterações feitas em memória (cache ou reasoner sem acesso
+                às triplas do grafo rdflib)
+        """
+        if from_file_state:
+            if not self.tracks_file_state:
+                return
+            self._pending[section] = dict(self._all_changes)
+        else:
+            self._pending[section] = {}
+        self._bases[section] = value
+
+    def pending(self, section: str) -> int:
+        """Número de indivíduos alterados ainda não aplicados na seção."""
+        return len(self._pending[section])
+
+    def derived_types(self, individual: URIRef) -> Set[URIRef]:
+        """
+        Tipos do indivíduo derivados das triplas atuais (com superclasses).
+
+        Args:
+            individual: IRI do indivíduo
+
+        Returns:
+            Conjunto de classes
+        """
+        index = self.index
+        direct: Set[URIRef] = set()
+        for p, o in self.graph.predicate_objects(individual):
+            if p == RDF.type:
+                # Tipos inferidos antes da alteração não valem como declarados
+                if (isinstance(o, URIRef) and index.is_class(o)
+                        and not self.knowledge_graph.is_inferred((individual, p, o))):
+                    direct.add(o)
+            else:
+                direct |= index.domains(p)
+        for _, p in self.graph.subject_predicates(individual):
+            if p != RDF.type:
+                direct |= {c for c in index.ranges(p) if index.is_class(c)}
+        closure: Set[URIRef] = set()
+        for cls_ in direct:
+            closure |= index.superclasses(cls_)
+        closure.discard(OWL.Thing)
+        return closure
+
+    def most_specific(self, classes: Iterable[URIRef]) -> List[URIRef]:
+        """Remove as classes que são superclasses estritas de outra do conjunto."""
+        classes = set(classes)
+        index = self.index
+        return sorted(
+            cls_ for cls_ in classes
+            if not any(cls_ in index.superclasses(other) and other not in index.superclasses(cls_)
+                       for other in classes if other != cls_)
+        )
+
+    def realize(self) -> Dict[str, List[str]]:
+        """
+        Aplica as alterações pendentes à realização base.
+
+        Returns:
+            Realização atualizada (nome do indivíduo -> tipos)
+        """
+        realization = self._bases['realization']
+        pending, self._pending['realization'] = self._pending['realization'], {}
+        for individual, had_removal in pending.items():
+            if self.index.is_class(individual) or self.index.is_property(individual):
+                continue
+            name = self.to_name(individual)
+            types = self.derived_types(individual)
+            if not had_removal:
+                # Inclusões são monotônicas: os tipos anteriores continuam válidos
+                types |= {self.to_iri(t) for t in realization.get(name, [])}
+            specific = self.most_specific(types)
+            if specific:
+                realization[name] = [self.to_name(t) for t in specific]
+            else:
+                realization.pop(name, None)
+        return realization
+
+    def materialize(self, inferred: Set[Tuple]) -> Tuple[Set[Tuple], int]:
+        """
+        Aplica as alterações pendentes ao conjunto de triplas inferidas.
+
+        Args:
+            inferred: Triplas inferidas atualmente exportadas
+
+        Returns:
+            Tupla (novo conjunto de triplas inferidas, indivíduos atualizados)
+        """
+        pending, self._pending['materialization'] = self._pending['materialization'], {}
+        inferred = set(inferred)
+        for individual, had_removal in pending.items():
+            if self.index.is_class(individual) or self.index.is_property(individual):
+                continue
+            if had_removal:
+                inferred = {t for t in inferred if not (t[0] == individual and t[1] == RDF.type)}
+            for cls_ in self.derived_types(individual):
+                triple = (individual, RDF.type, cls_)
+                if triple not in self.graph or self.knowledge_graph.is_inferred(triple):
+                    inferred.add(triple)
+        return inferred, len(pending)
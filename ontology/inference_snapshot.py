@@ -0,0 +1,148 @@
+"""
+Módulo com o snapshot de inferências DL para os agentes.
+
+Os agentes precisam apenas de consultas baratas sobre o resultado do
+raciocínio (consistência, tipos inferidos, contagens). Em vez de criar um
+``DLReasoner`` a cada mensagem, eles leem um snapshot somente leitura
+montado a partir do último resultado de ``all`` da fila de raciocínio
+(``ReasoningJobQueue``). Quando as triplas declaradas mudam, o snapshot
+atual continua sendo servido (``is_stale`` indica a defasagem) enquanto o
+recálculo roda em segundo plano.
+"""
+import threading
+from typing import Dict, List, Optional
+from ontology.reasoning_jobs import ReasoningJobQueue
+
+
+class InferenceSnapshot:
+    """Resultado imutável do raciocínio, com consultas em memória."""
+
+    __slots__ = ("consistent", "types", "counts", "job_id", "computed_at")
+
+    def __init__(self, consistent: bool, types: Dict[str, List[str]],
+                 counts: Dict[str, int], job_id: Optional[str] = None,
+                 computed_at: Optional[float] = None):
+        self.consistent = consistent
+        self.types = types
+        self.counts = counts
+        self.job_id = job_id
+        self.computed_at = computed_at
+
+    @classmethod
+    def from_results(cls, results: Dict, job_id: Optional[str] = None,
+                     computed_at: Optional[float] = None) -> "InferenceSnapshot":
+        """
+        Monta o snapshot a partir do resultado de ``run_all_reasoning``.
+
+        Args:
+            results: Dicionário com classification, consistency, realization
+                e materialization
+            job_id: Id do job que produziu o resultado
+            computed_at: Momento da conclusão
+
+        Returns:
+            Snapshot
+        """
+        realization = results.get('realization') or {}
+        materialization = results.get('materialization') or {}
+        counts = {
+            'individuals_realized': len(realization),
+            'classes_with_subclasses': len(results.get('classification') or {}),
+            'triples_added': materialization.get('triples_added', 0)
+        }
+        consistent = bool((results.get('consistency') or {}).get('consistent'))
+        return cls(consistent, dict(realization), counts, job_id, computed_at)
+
+    def types_of(self, individual: str) -> List[str]:
+        """Tipos inferidos de um indivíduo (lista vazia se desconhecido)."""
+        return self.types.get(individual, [])
+
+    def to_context(self) -> str:
+        """Bloco de texto com as inferências para o prompt dos agentes."""
+        if not self.consistent:
+            return ""
+        text = "\n\n=== Inferências DL ===\n"
+        text += "Ontologia consistente: ✅\n"
+        if self.types:
+            text += f"Tipos inferidos disponíveis: {len(self.types)} indivíduos\n"
+        return text
+
+
+class InferenceSnapshotService:
+    """Fornece o snapshot de inferências mais recente, sem esperar o reasoner."""
+
+    def __init__(self, jobs: ReasoningJobQueue):
+        """
+        Inicializa o serviço.
+
+        Args:
+            jobs: Fila de raciocínio que calcula os resultados
+        """
+        self.jobs = jobs
+        self._snapshot: Optional[InferenceSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Optional[InferenceSnapshot]:
+        """
+        Snapshot atual.
+
+        Se não houver resultado ou ele estiver desatualizado, agenda o
+        recálculo (pedidos repetidos são agrupados pela fila) e retorna o
+        snapshot disponível.
+
+        Returns:
+            Snapshot, ou None se o primeiro cálculo ainda não terminou
+        """
+        latest = self.jobs.latest("all")
+        if latest is None or latest["stale"]:
+            self.jobs.submit("all")
+        if latest is None:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.job_id != latest["job_id"]:
+                self._snapshot = InferenceSnapshot.from_results(
+                    latest["results"], latest["job_id"], latest["computed_at"]
+                )
+            return self._snapshot
+
+    def is_stale(self) -> bool:
+        """Se o snapshot atual não reflete a versão atual da ontologia."""
+        latest = self.jobs.latest("all")
+        return latest is None or latest["stale"]
+
+
+_default_service: Optional[InferenceSnapshotService] = None
+_default_loader: Optional[threading.Thread] = None
+_default_lock = threading.Lock()
+
+
+def _load_default_service():
+    """Carrega o reasoner do serviço compartilhado (em segundo plano)."""
+    global _default_service
+    try:
+        from ontology.reasoner import DLReasoner
+
+        service = InferenceSnapshotService(ReasoningJobQueue(DLReasoner()))
+        service.snapshot()  # agenda o primeiro cálculo
+        _default_service = service
+    except Exception as e:
+        print(f"⚠️  Aviso: snapshot de inferências não disponível: {e}")
+
+
+def default_service() -> Optional[InferenceSnapshotService]:
+    """
+    Serviço compartilhado do processo, com reasoner e fila próprios.
+
+    Usado pelos agentes criados sem um serviço explícito (ex.: fora da API).
+    A ontologia é carregada uma única vez por processo, em segundo plano.
+
+    Returns:
+        Serviço de snapshots, ou None enquanto ele é carregado
+    """
+    global _default_loader
+    with _default_lock:
+        if _default_service is None and _default_loader is None:
+            _default_loader = threading.Thread(target=_load_default_service,
+                                               name="inference-snapshot", daemon=True)
+            _default_loader.start()
+    return _default_service
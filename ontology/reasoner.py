@@ -4,66 +4,315 @@ Módulo para raciocínio DL usando HermiT.
 import os
 from typing import List, Dict, Optional
 from owlready2 import *
+from rdflib import URIRef
+from rag.knowledge_graph import KnowledgeGraph, _get_ontology_path
+from rag.graph_store import load_owlready_world, release_owlready_world
+from ontology.class_hierarchy import ClassHierarchy
+from ontology.incremental_realizer import IncrementalRealizer
+from ontology.rl_materializer import RLMaterializer
+from ontology.reasoner_worker import ReasonerWorker
+from rag.worker_process import WorkerUnavailable
+from ontology.reasoning_cache import ReasoningCache, encode_triples, decode_triples
 import warnings
 warnings.filterwarnings("ignore")
 
 
-def _get_ontology_path(ontology_path: str = "ontologia_mora.owl") -> str:
-    """
-    Resolve o caminho da ontologia relativo à raiz do projeto.
-    
-    Args:
-        ontology_path: Caminho relativo ou absoluto para o arquivo OWL
-        
-    Returns:
-        Caminho absoluto para o arquivo OWL
-    """
-    # Se já é um caminho absoluto, retornar como está
-    if os.path.isabs(ontology_path):
-        return ontology_path
-    
-    # Encontrar o diretório raiz do projeto (onde está ontologia_mora.owl)
-    # Começar do diretório deste arquivo e subir até encontrar o arquivo
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Tentar encontrar o arquivo subindo os diretórios
-    for _ in range(5):  # Limitar a busca a 5 níveis
-        potential_path = os.path.join(current_dir, ontology_path)
-        if os.path.exists(potential_path):
-            return os.path.abspath(potential_path)
-        parent_dir = os.path.dirname(current_dir)
-        if parent_dir == current_dir:  # Chegou na raiz do sistema
-            break
-        current_dir = parent_dir
-    
-    # Se não encontrou, tentar caminho relativo ao diretório atual
-    return os.path.abspath(ontology_path)
+# Resultados possíveis de cada modo (REASONER_MODE), em ordem de preferência.
+# O materializador OWL 2 RL só é usado quando escolhido (``rl``): suas
+# inferências seguem domínio/imagem ao pé da letra e mudam as consultas
+REASONER_MODES = {
+    "auto": ("hermit", "pellet", "none"),
+    "dl": ("hermit", "pellet", "none"),
+    "rl": ("rl",)
+}
 
 
 class DLReasoner:
     """Classe para executar raciocínio DL usando HermiT."""
     
-    def __init__(self, ontology_path: str = "ontologia_mora.owl"):
+    def __init__(self, ontology_path: str = "ontologia_mora.owl",
+                 knowledge_graph: Optional[KnowledgeGraph] = None,
+                 worker: Optional[bool] = None):
         """
         Inicializa o reasoner DL.
         
         Args:
             ontology_path: Caminho para o arquivo OWL
+            knowledge_graph: Grafo de conhecimento compartilhado (opcional).
+                Se informado, o reasoner usa a ontologia do grafo e
+                ``materialize`` exporta as inferências para o SPARQL
+            worker: Executar o raciocínio em um processo residente (padrão:
+                REASONER_WORKER, ativo). Só se aplica com ``knowledge_graph``
+        
+        Os resultados do raciocínio são gravados em disco por hash da
+        ontologia (desative com REASONER_CACHE=0). REASONER_MODE escolhe o
+        reasoner: ``auto`` (HermiT e, sem ele, Pellet), ``dl`` (o mesmo) ou
+        ``rl`` (apenas o materializador OWL 2 RL, sem JVM).
         """
-        self.ontology_path = _get_ontology_path(ontology_path)
+        self.knowledge_graph = knowledge_graph
+        if knowledge_graph is not None:
+            self.ontology_path = knowledge_graph.ontology_path
+        else:
+            self.ontology_path = _get_ontology_path(ontology_path)
         self.onto = None
+        # Mundo owlready2 aberto por este reasoner (sem ser o do grafo de conhecimento)
+        self._world = None
         self.reasoner = None
+        self.mode = os.getenv("REASONER_MODE", "auto").lower()
+        if self.mode not in REASONER_MODES:
+            print(f"⚠️  Aviso: REASONER_MODE desconhecido: {self.mode}. Usando 'auto'.")
+            self.mode = "auto"
+        # Último resultado do materializador OWL 2 RL e a versão do grafo usada
+        self._rl: Optional[RLMaterializer] = None
+        self._rl_version = None
+        # Se o reasoner já foi executado sobre a ontologia em memória (e sobre qual versão)
+        self._synced = False
+        self._synced_version = None
+        # Índice da hierarquia de classes (refeito após raciocínio/alterações)
+        self._hierarchy: Optional[ClassHierarchy] = None
+        self._hierarchy_version = None
+        self.cache = None
+        if os.getenv("REASONER_CACHE", "1") != "0":
+            self.cache = ReasoningCache(self.ontology_path)
+        
+        # Realização incremental e worker: só são possíveis acompanhando o grafo desde a carga
+        self.incremental = None
+        self.worker: Optional[ReasonerWorker] = None
+        self._namespaces: Dict[str, str] = {}
+        tracking = knowledge_graph is not None and not knowledge_graph.modified
+        if worker is None:
+            worker = os.getenv("REASONER_WORKER", "1") != "0"
+        if tracking and worker:
+            self.worker = ReasonerWorker(self.ontology_path)
         self._load_ontology()
+        if tracking:
+            if os.getenv("REASONER_INCREMENTAL", "1") != "0":
+                self.incremental = IncrementalRealizer(knowledge_graph, self._owl_name, self._owl_iri)
+            if self.incremental is not None or self.worker is not None:
+                self._seen_version = 0
+                knowledge_graph.add_listener(self._on_graph_change)
     
     def _load_ontology(self):
-        """Carrega a ontologia."""
+        """
+        Carrega a ontologia a partir do quadstore SQLite do owlready2.
+        
+        Com o worker ativo e sem o quadstore compartilhado, este processo só
+        lê a ontologia (hierarquia, propriedades): o quadstore é aberto em
+        modo somente leitura e o raciocínio acontece no worker.
+        """
         try:
-            self.onto = get_ontology(f"file://{self.ontology_path}").load()
+            if self.worker is not None and not self.knowledge_graph.shared:
+                self._open_world(read_only=True)
+            elif self.knowledge_graph is not None:
+                self.onto = self.knowledge_graph.ontology
+            else:
+                self._open_world()
             print(f"Ontologia carregada: {self.onto.base_iri}")
         except Exception as e:
             print(f"Erro ao carregar ontologia: {e}")
             raise
     
+    def _open_world(self, read_only: bool = False):
+        """Abre o mundo do quadstore, liberando o aberto anteriormente."""
+        world, self.onto = load_owlready_world(self.ontology_path, read_only=read_only)
+        self._release_world()
+        self._world = world
+    
+    def _release_world(self):
+        """Libera o mundo aberto por este reasoner, se houver."""
+        world, self._world = self._world, None
+        if world is not None:
+            release_owlready_world(world)
+    
+    def _owl_name(self, iri) -> str:
+        """Nome de uma entidade como o owlready2 a exibe (ex.: ``ead-ontologia.Curso``)."""
+        iri = str(iri)
+        cut = max(iri.rfind("#"), iri.rfind("/")) + 1
+        if cut <= 0:
+            return iri
+        prefix = iri[:cut]
+        name = self.onto.world.get_namespace(prefix).name
+        self._namespaces[name] = prefix
+        return f"{name}.{iri[cut:]}"
+    
+    def _owl_iri(self, name: str) -> URIRef:
+        """Inverso de ``_owl_name``."""
+        namespace, _, local = name.rpartition(".")
+        if namespace not in self._namespaces:
+            # Namespaces usados pelas entidades da ontologia
+            for entity in list(self.onto.classes()) + list(self.onto.individuals()):
+                self._namespaces.setdefault(entity.namespace.name, entity.namespace.base_iri)
+        prefix = self._namespaces.get(namespace)
+        return URIRef(prefix + local) if prefix else URIRef(name)
+    
+    def _on_graph_change(self, added, removed):
+        """Ouvinte do KnowledgeGraph: registra alterações de triplas declaradas."""
+        version = self.knowledge_graph.asserted_version
+        if version == self._seen_version:
+            return  # exportação de inferências, não altera o ABox declarado
+        self._seen_version = version
+        if self.worker is not None:
+            self.worker.record(added, removed)
+        if self.incremental is not None:
+            self.incremental.on_change(added, removed)
+    
+    def _delegate(self, task: str):
+        """
+        Executa uma tarefa no processo residente do reasoner.
+        
+        Args:
+            task: classify, realize, materialize ou check_consistency
+            
+        Returns:
+            Tupla (executado, resultado). Se o worker não estiver
+            disponível, ele é desativado e a tarefa roda neste processo
+        """
+        if self.worker is None:
+            return False, None
+        try:
+            result, self.reasoner = self.worker.call(task)
+            return True, result
+        except WorkerUnavailable as e:
+            print(f"⚠️  Aviso: worker do reasoner indisponível ({e}). Raciocinando no próprio processo.")
+            self.worker.close()
+            self.worker = None
+            # A ontologia somente leitura não recebe inferências
+            self.onto = self.knowledge_graph.ontology
+            self._release_world()
+            self._hierarchy = None
+            return False, None
+    
+    def ontology_reloaded(self):
+        """
+        Atualiza a ontologia somente leitura após uma recarga do arquivo OWL.
+        
+        As alterações de triplas chegam ao worker e à realização incremental
+        pelo grafo de conhecimento; apenas a ontologia aberta do quadstore
+        (com o worker ativo) precisa ser reaberta, já com a nova versão. Se
+        o grafo voltou a corresponder ao arquivo, o worker é reiniciado a
+        partir da nova versão em vez de acumular o delta da recarga.
+        """
+        if self.worker is not None and not self.knowledge_graph.shared:
+            with self.knowledge_graph.lock:
+                if not self.knowledge_graph.modified:
+                    self.worker.reset()
+            self._open_world(read_only=True)
+            self._hierarchy = None
+    
+    def close(self):
+        """Encerra o processo residente do reasoner, se houver, e libera o mundo owlready2 próprio."""
+        if self.worker is not None:
+            self.worker.close()
+        self._release_world()
+    
+    def _incremental_base(self, section: str, value, from_cache: bool):
+        """Registra um resultado completo como base da atualização incremental."""
+        if self.incremental is not None:
+            # Sem o quadstore compartilhado HermiT/Pellet só veem o arquivo OWL
+            # (o materializador RL lê o grafo rdflib, com as alterações)
+            from_file_state = from_cache or not (self.knowledge_graph.shared or self.reasoner == "rl")
+            self.incremental.set_base(section, value, from_file_state)
+    
+    @property
+    def _target(self):
+        """Ontologia que recebe as inferências do reasoner."""
+        if self.knowledge_graph is not None:
+            return self.knowledge_graph.inferred_ontology
+        return self.onto
+    
+    def _cache_entry(self, allow_modified: bool = False) -> Optional[Dict]:
+        """
+        Resultados gravados para a versão atual da ontologia.
+        
+        Se o reasoner ainda não foi escolhido, adota o do cache.
+        
+        Args:
+            allow_modified: Aceitar o cache mesmo com triplas alteradas em
+                memória (a atualização incremental aplica as alterações)
+        
+        Returns:
+            Entrada do cache ou None
+        """
+        if self.cache is None or (self._modified and not allow_modified):
+            return None
+        if self.reasoner is not None:
+            return self.cache.load(self.reasoner)
+        entry = self.cache.find(REASONER_MODES[self.mode])
+        if entry is not None:
+            self.reasoner = entry['reasoner']
+        return entry
+    
+    def _cache_store(self, section: str, value):
+        """Grava uma seção de resultados no cache."""
+        if self.cache is None or self._modified or self.reasoner is None:
+            return
+        self.cache.store(self.reasoner, section, value)
+    
+    @property
+    def _modified(self) -> bool:
+        """Se as triplas declaradas diferem do arquivo OWL (cache não se aplica)."""
+        return self.knowledge_graph is not None and self.knowledge_graph.modified
+    
+    def _sync(self):
+        """Executa o reasoner sobre a ontologia em memória (HermiT, depois Pellet; OWL 2 RL se escolhido)."""
+        if self.mode == "rl":
+            self._sync_rl()
+            return
+        # Tentar usar HermiT primeiro
+        try:
+            with self._target:
+                sync_reasoner_hermit(self.onto.world)
+                self.reasoner = "hermit"
+        except Exception as e:
+            error_msg = str(e)
+            # Verificar se é erro de datatype não suportado
+            if "UnsupportedDatatypeException" in error_msg or "xsd:date" in error_msg:
+                print("⚠️  Aviso: HermiT não suporta xsd:date usado na ontologia.")
+                print("   Continuando sem reasoner completo (SPARQL ainda funciona).")
+                self.reasoner = "none"
+            else:
+                # Tentar Pellet como fallback
+                try:
+                    with self._target:
+                        sync_reasoner_pellet(self.onto.world)
+                        self.reasoner = "pellet"
+                except Exception as e2:
+                    print(f"⚠️  Aviso: Não foi possível inicializar reasoner completo: {e2}")
+                    print("   Continuando sem reasoner (SPARQL ainda funciona).")
+                    self.reasoner = "none"
+        self._synced = True
+        self._synced_version = self._asserted_version
+        self._hierarchy = None
+    
+    @property
+    def _asserted_version(self) -> int:
+        """Versão das triplas declaradas (0 sem grafo de conhecimento)."""
+        return self.knowledge_graph.asserted_version if self.knowledge_graph is not None else 0
+    
+    def _rl_input(self) -> List:
+        """Triplas declaradas lidas pelo materializador OWL 2 RL."""
+        if self.knowledge_graph is None:
+            return list(self.onto.world.as_rdflib_graph())
+        knowledge_graph = self.knowledge_graph
+        with knowledge_graph.lock:
+            return [t for t in knowledge_graph.graph if not knowledge_graph.is_inferred(t)]
+    
+    def _sync_rl(self):
+        """Executa o materializador OWL 2 RL sobre as triplas declaradas atuais."""
+        version = self._asserted_version
+        self._rl = RLMaterializer(self._rl_input()).run()
+        self._rl_version = version
+        self.reasoner = "rl"
+        self._synced = True
+        self._synced_version = version
+        self._hierarchy = None
+    
+    def _rl_result(self) -> RLMaterializer:
+        """Resultado do materializador RL, refeito se as triplas declaradas mudaram."""
+        if self._rl is None or self._rl_version != self._asserted_version:
+            self._sync_rl()
+        return self._rl
+    
     def classify(self) -> Dict[str, List[str]]:
         """
         Executa classificação da ontologia usando HermiT.
@@ -71,50 +320,43 @@ class DLReasoner:
         Returns:
             Dicionário com hierarquia de classes
         """
-        if self.reasoner is None:
-            # Tentar usar HermiT primeiro
-            try:
-                with self.onto:
-                    sync_reasoner_hermit()
-                    self.reasoner = "hermit"
-            except Exception as e:
-                error_msg = str(e)
-                # Verificar se é erro de datatype não suportado
-                if "UnsupportedDatatypeException" in error_msg or "xsd:date" in error_msg:
-                    print("⚠️  Aviso: HermiT não suporta xsd:date usado na ontologia.")
-                    print("   Continuando sem reasoner completo (SPARQL ainda funciona).")
-                    self.reasoner = "none"
-                else:
-                    # Tentar Pellet como fallback
-                    try:
-                        with self.onto:
-                            sync_reasoner_pellet()
-                            self.reasoner = "pellet"
-                    except Exception as e2:
-                        print(f"⚠️  Aviso: Não foi possível inicializar reasoner completo: {e2}")
-                        print("   Continuando sem reasoner (SPARQL ainda funciona).")
-                        self.reasoner = "none"
-        
-        # Obter hierarquia de classes (mesmo sem reasoner, podemos usar subclasses explícitas)
-        hierarchy = {}
-        for cls in self.onto.classes():
-            # Usar subclasses diretas se reasoner não disponível
-            if self.reasoner == "none":
-                subclasses = [c for c in self.onto.classes() 
-                             if cls in c.is_a and c != cls]
-            else:
-                try:
-                    subclasses = cls.subclasses()
-                except:
-                    # Fallback para subclasses diretas
-                    subclasses = [c for c in self.onto.classes() 
-                                 if cls in c.is_a and c != cls]
-            
-            if subclasses:
-                hierarchy[str(cls)] = [str(sub) for sub in subclasses]
+        delegated, hierarchy = self._delegate("classify")
+        if delegated:
+            return hierarchy
+        entry = self._cache_entry()
+        if entry is not None and 'classification' in entry:
+            return entry['classification']
+        if not self._synced:
+            self._sync()
+        
+        # Obter hierarquia de classes (is_a inclui as inferências, se houve reasoner)
+        hierarchy = self.class_hierarchy.to_dict()
         
+        self._cache_store('classification', hierarchy)
         return hierarchy
     
+    @property
+    def class_hierarchy(self) -> ClassHierarchy:
+        """Índice da hierarquia de classes (adjacência, fecho e profundidade)."""
+        version = self._asserted_version
+        if self._hierarchy is None or self._hierarchy_version != version:
+            self._hierarchy = ClassHierarchy(self.onto.classes())
+            self._hierarchy_version = version
+        return self._hierarchy
+    
+    def is_subclass(self, sub, sup) -> bool:
+        """
+        Verifica subsunção entre classes usando o índice da hierarquia.
+        
+        Args:
+            sub: Classe (objeto owlready2, IRI ou nome)
+            sup: Classe (objeto owlready2, IRI ou nome)
+            
+        Returns:
+            True se ``sub`` for subclasse (direta ou indireta) de ``sup``
+        """
+        return self.class_hierarchy.is_subclass(sub, sup)
+    
     def check_consistency(self) -> Dict[str, bool]:
         """
         Verifica consistência da ontologia.
@@ -122,14 +364,23 @@ class DLReasoner:
         Returns:
             Dicionário com resultados de consistência
         """
+        delegated, results = self._delegate("check_consistency")
+        if delegated:
+            return results
         results = {
             'consistent': True,
             'inconsistencies': [],
             'reasoner_available': self.reasoner != "none" if self.reasoner else False
         }
         
+        if self.reasoner == "rl":
+            # Regra cax-dw: indivíduos em classes disjuntas
+            inconsistencies = self._rl_result().inconsistencies()
+            results['consistent'] = not inconsistencies
+            results['inconsistencies'] = inconsistencies
+            results['note'] = "Verificação pelas regras OWL 2 RL"
         # Se reasoner não disponível, assumir consistente (verificação básica)
-        if self.reasoner == "none" or self.reasoner is None:
+        elif self.reasoner == "none" or self.reasoner is None:
             # Verificação básica sem reasoner
             try:
                 # Verificar se há classes vazias ou problemas óbvios
@@ -165,19 +416,44 @@ class DLReasoner:
         Returns:
             Dicionários com tipos inferidos para cada indivíduo
         """
-        if self.reasoner is None:
-            with self.onto:
-                sync_reasoner()
+        delegated, realization = self._delegate("realize")
+        if delegated:
+            return realization
+        if self.incremental is not None and self.incremental.ready('realization'):
+            return dict(self.incremental.realize())
+        
+        entry = self._cache_entry(allow_modified=self._can_extend_cache)
+        if entry is not None and 'realization' in entry:
+            if self.incremental is None:
+                return entry['realization']
+            self._incremental_base('realization', dict(entry['realization']), from_cache=True)
+            return dict(self.incremental.realize())
+        if not self._synced:
+            self._sync()
         
         realization = {}
         
-        for individual in self.onto.individuals():
-            types = [str(t) for t in individual.is_a if isinstance(t, ThingClass)]
-            if types:
-                realization[str(individual)] = types
+        if self.reasoner == "rl":
+            for individual, types in self._rl_result().most_specific_types().items():
+                realization[self._owl_name(individual)] = [self._owl_name(t) for t in types]
+        else:
+            for individual in self.onto.individuals():
+                types = [str(t) for t in individual.is_a if isinstance(t, ThingClass)]
+                if types:
+                    realization[str(individual)] = types
         
+        self._cache_store('realization', realization)
+        if self.incremental is not None:
+            self._incremental_base('realization', dict(realization), from_cache=False)
+            if self.incremental.ready('realization'):
+                return dict(self.incremental.realize())
         return realization
     
+    @property
+    def _can_extend_cache(self) -> bool:
+        """Se o cache (estado do arquivo) pode ser atualizado com as alterações registradas."""
+        return self.incremental is not None and self.incremental.tracks_file_state
+    
     def get_inferred_properties(self, individual_name: str) -> Dict[str, List]:
         """
         Obtém propriedades inferidas para um indivíduo.
@@ -188,9 +464,8 @@ class DLReasoner:
         Returns:
             Propriedades inferidas
         """
-        if self.reasoner is None:
-            with self.onto:
-                sync_reasoner()
+        if not self._synced and self.worker is None:
+            self._sync()
         
         individual = self.onto.search_one(iri=f"*{individual_name}")
         if individual is None:
@@ -222,28 +497,61 @@ class DLReasoner:
         Returns:
             Estatísticas de materialização
         """
-        # Contar triplas antes
+        delegated, result = self._delegate("materialize")
+        if delegated:
+            stats = result['stats']
+            added, removed = self.knowledge_graph.replace_inferred(result['triples'])
+            stats['exported_added'] = len(added)
+            stats['exported_removed'] = len(removed)
+            return stats
+        if self.incremental is not None and self.incremental.ready('materialization'):
+            return self._materialize_incremental()
+        
+        entry = self._cache_entry(allow_modified=self._can_extend_cache)
+        if entry is not None and 'materialization' in entry:
+            cached = entry['materialization']
+            stats = dict(cached['stats'])
+            if self.knowledge_graph is not None:
+                added, removed = self.knowledge_graph.replace_inferred(decode_triples(cached['triples']))
+                stats['exported_added'] = len(added)
+                stats['exported_removed'] = len(removed)
+            if self.incremental is not None:
+                self._incremental_base('materialization', None, from_cache=True)
+                if self.incremental.pending('materialization'):
+                    return self._materialize_incremental()
+            return stats
+        
+        if self.mode == "rl" or self.reasoner == "rl":
+            return self._materialize_rl()
+        
+        # Contar triplas antes (COUNT no quadstore, sem iterar as triplas)
         try:
-            triples_before = sum(1 for _ in self.onto.world.graph.triples((None, None, None)))
+            triples_before = len(self.onto.world.graph)
         except:
             triples_before = 0
         
         # Tentar sincronizar reasoner se disponível
-        if self.reasoner != "none" and self.reasoner is not None:
+        if not self._synced:
+            self._sync()
+            if self.reasoner == "rl":
+                return self._materialize_rl()
+        elif self.reasoner not in ("none", None) and self._synced_version != self._asserted_version:
+            # Nova JVM só se as triplas declaradas mudaram desde o último raciocínio
             try:
-                with self.onto:
+                with self._target:
                     if self.reasoner == "hermit":
-                        sync_reasoner_hermit()
+                        sync_reasoner_hermit(self.onto.world)
                     elif self.reasoner == "pellet":
-                        sync_reasoner_pellet()
+                        sync_reasoner_pellet(self.onto.world)
                     else:
-                        sync_reasoner()
+                        sync_reasoner(self.onto.world)
+                self._synced_version = self._asserted_version
             except:
                 pass  # Se falhar, continuar sem reasoner
         
         # Contar triplas depois
         try:
-            triples_after = sum(1 for _ in self.onto.world.graph.triples((None, None, None)))
+            triples_after = len(self.onto.world.graph)
         except:
             triples_after = triples_before
         
@@ -253,8 +561,111 @@ class DLReasoner:
             'triples_added': triples_after - triples_before
         }
         
+        inferred = []
+        if self.knowledge_graph is not None:
+            # Tornar as inferências visíveis às consultas SPARQL
+            inferred = list(self.knowledge_graph.world.as_rdflib_graph().get_context(self._target))
+        self._cache_store('materialization', {'stats': stats, 'triples': encode_triples(inferred)})
+        
+        if self.knowledge_graph is not None:
+            added, removed = self.knowledge_graph.replace_inferred(inferred)
+            stats['exported_added'] = len(added)
+            stats['exported_removed'] = len(removed)
+        
+        if self.incremental is not None:
+            self._incremental_base('materialization', None, from_cache=False)
+            if self.incremental.pending('materialization'):
+                return self._materialize_incremental()
         return stats
     
+    def materialization_stats(self) -> Optional[Dict[str, int]]:
+        """
+        Estatísticas atuais de materialização, sem executar o reasoner.
+        
+        Lidas dos contadores mantidos pelo grafo de conhecimento (O(1)),
+        sempre atualizados após cada alteração e cada exportação de
+        inferências.
+        
+        Returns:
+            Dicionário no formato de ``materialize`` (mais o total de
+            predicados e classes), ou None sem grafo de conhecimento
+        """
+        if self.knowledge_graph is None:
+            return None
+        summary = self.knowledge_graph.stats.summary()
+        return {
+            'triples_before': summary['asserted'],
+            'triples_after': summary['total'],
+            'triples_added': summary['inferred'],
+            'classes': summary['classes'],
+            'properties': summary['properties']
+        }
+    
+    def _materialize_rl(self) -> Dict[str, int]:
+        """
+        Materializa com o encadeamento OWL 2 RL e exporta as triplas derivadas.
+        
+        Se o fecho tiver conflitos (regra cax-dw), as triplas derivadas não
+        são exportadas (e as exportadas antes são retiradas): elas mudariam
+        as respostas das consultas SPARQL com fatos contraditórios.
+        """
+        rl = self._rl_result()
+        inferred = rl.inferred()
+        inconsistencies = rl.inconsistencies()
+        if inconsistencies:
+            print(f"⚠️  Aviso: {len(inconsistencies)} conflito(s) no fecho OWL 2 RL; "
+                  "inferências não exportadas.")
+            inferred = set()
+        stats = {
+            'triples_before': len(rl.asserted),
+            'triples_after': len(rl.asserted) + len(inferred),
+            'triples_added': len(inferred),
+            'rl_iterations': rl.iterations,
+            'rl_ms': round(rl.seconds * 1000, 2)
+        }
+        if inconsistencies:
+            stats['inconsistencies'] = len(inconsistencies)
+        self._cache_store('materialization', {'stats': stats, 'triples': encode_triples(inferred)})
+        
+        if self.knowledge_graph is not None:
+            added, removed = self.knowledge_graph.replace_inferred(inferred)
+            stats['exported_added'] = len(added)
+            stats['exported_removed'] = len(removed)
+        else:
+            # Sem grafo compartilhado, as inferências vão para a ontologia carregada
+            graph = self.onto.world.as_rdflib_graph()
+            with self.onto:
+                for triple in inferred:
+                    graph.add(triple)
+        
+        if self.incremental is not None and not inconsistencies:
+            self._incremental_base('materialization', None, from_cache=False)
+            if self.incremental.pending('materialization'):
+                return self._materialize_incremental()
+        return stats
+    
+    def _materialize_incremental(self) -> Dict[str, int]:
+        """
+        Atualiza as triplas inferidas apenas dos indivíduos alterados.
+        
+        Os totais seguem os demais caminhos (declaradas, total do grafo e
+        inferidas), lidos dos contadores do grafo; o delta desta atualização
+        fica em ``exported_added``/``exported_removed``.
+        """
+        before = self.knowledge_graph.inferred_triples
+        inferred, updated = self.incremental.materialize(before)
+        added, removed = self.knowledge_graph.replace_inferred(inferred)
+        summary = self.knowledge_graph.stats.summary()
+        return {
+            'triples_before': summary['asserted'],
+            'triples_after': summary['total'],
+            'triples_added': summary['inferred'],
+            'exported_added': len(added),
+            'exported_removed': len(removed),
+            'incremental': True,
+            'individuals_updated': updated
+        }
+    
     def run_all_reasoning(self) -> Dict[str, any]:
         """
         Executa todos os tipos de raciocínio.
@@ -278,9 +689,8 @@ class DLReasoner:
         Args:
             output_path: Caminho para salvar
         """
-        if self.reasoner is None:
-            with self.onto:
-                sync_reasoner()
+        if not self._synced and self.worker is None:
+            self._sync()
         
         self.onto.save(file=output_path, format="rdfxml")
 
@@ -0,0 +1,208 @@
+"""
+Módulo com o processo residente do reasoner DL.
+
+Executado no processo da API, cada raciocínio recarregava o estado do
+reasoner e disputava o GIL com as requisições. O ``ReasonerWorker`` mantém
+um subprocesso (``WorkerProcess``) com a ontologia carregada em um
+quadstore owlready2 e um ``DLReasoner`` próprio, reutilizado por
+``classify``, ``realize``, ``materialize`` e ``check_consistency``:
+
+- alterações das triplas declaradas chegam ao worker por um log de
+  alterações (como nas réplicas SPARQL) e são aplicadas antes de cada
+  tarefa; com isso a realização incremental e o resultado do último
+  HermiT/Pellet ficam no worker e só são refeitos quando algo mudou
+- ``materialize`` devolve as triplas inferidas para o processo pai
+  exportá-las no ``KnowledgeGraph``
+- as entradas do log são descartadas assim que o worker as aplica; se ele
+  morrer, outro é iniciado e recebe o estado líquido das alterações (a
+  presença final de cada tripla alterada), cujo tamanho depende das triplas
+  alteradas e não do histórico
+
+O owlready2 só executa HermiT/Pellet pela linha de comando, então cada
+recálculo completo com eles ainda inicia uma JVM; o modo OWL 2 RL
+(``REASONER_MODE``) roda inteiramente no worker.
+"""
+import os
+import argparse
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from rag.worker_process import WorkerProcess, WorkerUnavailable, serve
+
+
+TASKS = ("classify", "realize", "materialize", "check_consistency")
+
+
+class ReasonerWorker:
+    """Cliente do processo residente do reasoner."""
+
+    def __init__(self, ontology_path: str, startup_timeout: float = 120.0):
+        """
+        Configura o worker (o subprocesso é iniciado na primeira tarefa).
+
+        Args:
+            ontology_path: Caminho absoluto do arquivo OWL
+            startup_timeout: Tempo máximo para o worker carregar a ontologia
+        """
+        self.startup_timeout = startup_timeout
+        self._args = ["--ontology", ontology_path]
+        # Alterações ainda não aplicadas pelo worker atual
+        self._pending: List[Tuple[List, List]] = []
+        # Presença final de cada tripla alterada desde a carga do arquivo
+        self._net: Dict[Tuple, bool] = {}
+        self._log_lock = threading.Lock()
+        self._fresh = True
+        self._outdated = False
+        self._worker: Optional[WorkerProcess] = None
+        self._lock = threading.Lock()
+
+    def record(self, added: List[Tuple], removed: List[Tuple]):
+        """
+        Registra uma alteração das triplas declaradas.
+
+        Args:
+            added: Triplas adicionadas
+            removed: Triplas removidas
+        """
+        added, removed = list(added), list(removed)
+        with self._log_lock:
+            self._pending.append((added, removed))
+            # Cada entrada remove e depois adiciona: vale a última presença
+            for triple in removed:
+                self._net[triple] = False
+            for triple in added:
+                self._net[triple] = True
+
+    def _take_pending(self) -> List[Tuple[List, List]]:
+        """Retira as alterações pendentes (todas, em forma líquida, para um worker novo)."""
+        with self._log_lock:
+            pending, self._pending = self._pending, []
+            if self._fresh:
+                self._fresh = False
+                pending = []
+                if self._net:
+                    pending = [([t for t, present in self._net.items() if present],
+                                [t for t, present in self._net.items() if not present])]
+            return pending
+
+    def _ensure(self) -> WorkerProcess:
+        """Inicia o worker, se necessário, e aguarda a ontologia ser carregada."""
+        with self._log_lock:
+            outdated, self._outdated = self._outdated, False
+        if self._worker is None or outdated or not self._worker.is_alive():
+            if self._worker is not None:
+                self._worker.kill()
+            self._worker = WorkerProcess("ontology.reasoner_worker", self._args)
+            with self._log_lock:
+                self._fresh = True
+            try:
+                self._worker.wait_ready(self.startup_timeout)
+            except WorkerUnavailable:
+                self._worker.kill()
+                self._worker = None
+                raise
+        return self._worker
+
+    def _request(self, worker: WorkerProcess, op: str, payload: Any = None) -> Any:
+        """Envia uma requisição e converte erros do worker em exceções."""
+        status, result = worker.request((op, payload))
+        if status == "error":
+            raise RuntimeError(f"Reasoner (worker) falhou em '{op}': {result}")
+        return result
+
+    def call(self, task: str) -> Tuple[Any, str]:
+        """
+        Executa uma tarefa no worker, após aplicar as alterações pendentes.
+
+        Args:
+            task: classify, realize, materialize ou check_consistency
+
+        Returns:
+            Tupla (resultado, reasoner usado pelo worker)
+
+        Raises:
+            WorkerUnavailable: Se o worker não puder ser iniciado ou morrer
+                duas vezes seguidas
+        """
+        if task not in TASKS:
+            raise ValueError(f"Tarefa desconhecida: {task}. Opções: {', '.join(TASKS)}")
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    worker = self._ensure()
+                    pending = self._take_pending()
+                    if pending:
+                        try:
+                            self._request(worker, "update", pending)
+                        except RuntimeError:
+                            # Reenviar o estado líquido (reaplicá-lo é idempotente)
+                            self._fresh = True
+                            raise
+                    answer = self._request(worker, task)
+                    return answer['result'], answer['reasoner']
+                except WorkerUnavailable:
+                    self._worker = None
+                    if attempt:
+                        raise
+                    print("⚠️  Aviso: worker do reasoner encerrou; iniciando outro.")
+
+    def reset(self):
+        """
+        Descarta as alterações registradas e marca o worker atual para substituição.
+
+        Usado quando as triplas declaradas voltam a corresponder ao arquivo
+        OWL (recarga sem alterações em tempo de execução): o próximo worker
+        carrega a nova versão do arquivo, sem reaplicar o log.
+        """
+        with self._log_lock:
+            self._pending = []
+            self._net = {}
+            # Substituído na próxima tarefa (sem aguardar a tarefa em andamento)
+            self._outdated = True
+
+    def close(self):
+        """Encerra o subprocesso."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.close()
+
+
+class _WorkerState:
+    """Estado do processo worker: grafo owlready2 e reasoner carregados."""
+
+    def __init__(self, knowledge_graph, reasoner):
+        self.knowledge_graph = knowledge_graph
+        self.reasoner = reasoner
+        self.ready_info = {'pid': os.getpid(), 'mode': reasoner.mode}
+
+
+def _setup() -> _WorkerState:
+    """Carrega a ontologia no processo worker."""
+    from rag.knowledge_graph import KnowledgeGraph
+    from ontology.reasoner import DLReasoner
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ontology", default="ontologia_mora.owl")
+    args = parser.parse_args()
+    # Quadstore compartilhado: HermiT/Pellet veem as alterações recebidas
+    knowledge_graph = KnowledgeGraph(args.ontology, store="owlready")
+    return _WorkerState(knowledge_graph, DLReasoner(knowledge_graph=knowledge_graph, worker=False))
+
+
+def _handle(state: _WorkerState, op: str, payload):
+    """Atende uma requisição no processo worker."""
+    if op == "update":
+        for added, removed in payload:
+            state.knowledge_graph.remove_triples(removed)
+            state.knowledge_graph.add_triples(added)
+        return state.knowledge_graph.asserted_version
+    if op not in TASKS:
+        raise ValueError(f"Operação desconhecida: {op}")
+    result = getattr(state.reasoner, op)()
+    if op == "materialize":
+        result = {'stats': result, 'triples': list(state.knowledge_graph.inferred_triples)}
+    return {'result': result, 'reasoner': state.reasoner.reasoner}
+
+
+if __name__ == "__main__":
+    serve(_setup, _handle)
@@ -0,0 +1,171 @@
+"""
+Módulo de cache persistente dos resultados do raciocínio DL.
+
+Classificação, realização e triplas materializadas são gravadas em disco
+(JSON) com uma chave formada pelo hash SHA-256 do conteúdo da ontologia e
+pelo reasoner usado (``hermit``, ``pellet``, ``rl`` ou ``none``). Na reinicialização
+os resultados são carregados sem executar o reasoner; qualquer alteração no
+arquivo OWL muda o hash e força o recálculo.
+"""
+import os
+import json
+import shutil
+from typing import Dict, Iterable, List, Optional, Tuple
+from rdflib.util import from_n3
+from rag.graph_store import file_digest
+
+
+CACHE_FORMAT_VERSION = 1
+
+# Ordem de preferência do DLReasoner.classify
+REASONERS = ("hermit", "pellet", "rl", "none")
+
+
+def default_cache_dir(ontology_path: str) -> str:
+    """
+    Diretório padrão do cache, ao lado da ontologia.
+
+    Args:
+        ontology_path: Caminho absoluto do arquivo OWL
+
+    Returns:
+        Caminho do diretório de cache
+    """
+    return os.path.join(os.path.dirname(ontology_path), "data", "reasoning_cache")
+
+
+def encode_triples(triples: Iterable[Tuple]) -> List[List[str]]:
+    """Serializa triplas rdflib em notação N3 (uma lista por tripla)."""
+    return [[term.n3() for term in triple] for triple in triples]
+
+
+def decode_triples(rows: Iterable[List[str]]) -> List[Tuple]:
+    """Reconstrói triplas rdflib a partir de ``encode_triples``."""
+    return [tuple(from_n3(term) for term in row) for row in rows]
+
+
+class ReasoningCache:
+    """Cache em disco dos resultados do reasoner, por hash da ontologia."""
+
+    def __init__(self, ontology_path: str, cache_dir: Optional[str] = None):
+        """
+        Inicializa o cache.
+
+        Args:
+            ontology_path: Caminho absoluto do arquivo OWL
+            cache_dir: Diretório do cache (opcional, usa REASONER_CACHE_DIR
+                ou ``data/reasoning_cache`` ao lado da ontologia)
+        """
+        self.ontology_path = ontology_path
+        self.cache_dir = cache_dir or os.getenv("REASONER_CACHE_DIR") or default_cache_dir(ontology_path)
+        self._stat: Optional[Tuple[int, float]] = None
+        self._digest: Optional[str] = None
+        self._entries: Dict[str, Dict] = {}
+
+    @property
+    def digest(self) -> str:
+        """Hash do conteúdo da ontologia (recalculado só se tamanho/mtime mudarem)."""
+        stat = os.stat(self.ontology_path)
+        key = (stat.st_size, stat.st_mtime)
+        if self._digest is None or self._stat != key:
+            digest = file_digest(self.ontology_path)
+            if digest != self._digest:
+                self._entries.clear()
+            self._stat, self._digest = key, digest
+        return self._digest
+
+    def path(self, reasoner: str) -> str:
+        """Arquivo de cache da versão atual da ontologia para um reasoner."""
+        name = os.path.splitext(os.path.basename(self.ontology_path))[0]
+        return os.path.join(self.cache_dir, f"{name}.{self.digest[:16]}.{reasoner}.json")
+
+    def load(self, reasoner: str) -> Optional[Dict]:
+        """
+        Carrega os resultados gravados para um reasoner.
+
+        Args:
+            reasoner: Nome do reasoner
+
+        Returns:
+            Dicionário com as seções gravadas, ou None se não houver cache
+        """
+        digest = self.digest
+        entry = self._entries.get(reasoner)
+        if entry is not None:
+            return entry
+        path = self.path(reasoner)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Aviso: cache de raciocínio ilegível ({path}): {e}")
+            return None
+        if entry.get('format') != CACHE_FORMAT_VERSION or entry.get('sha256') != digest:
+            return None
+        self._entries[reasoner] = entry
+        return entry
+
+    def find(self, reasoners: Tuple[str, ...] = REASONERS) -> Optional[Dict]:
+        """
+        Procura resultados de qualquer reasoner, na ordem de preferência.
+
+        Resultados obtidos sem HermiT/Pellet (``rl`` e ``none``) são
+        ignorados se houver Java disponível e HermiT for aceito, pois ele
+        pode ter sido instalado depois.
+
+        Args:
+            reasoners: Reasoners aceitos, em ordem de preferência
+
+        Returns:
+            Entrada do cache (com o campo ``reasoner``) ou None
+        """
+        for reasoner in reasoners:
+            if reasoner in ("rl", "none") and "hermit" in reasoners and _java_available():
+                continue
+            entry = self.load(reasoner)
+            if entry is not None:
+                return entry
+        return None
+
+    def store(self, reasoner: str, section: str, value) -> Dict:
+        """
+        Grava uma seção (classification, realization ou materialization).
+
+        Args:
+            reasoner: Nome do reasoner que produziu o resultado
+            section: Nome da seção
+            value: Valor serializável em JSON
+
+        Returns:
+            Entrada atualizada
+        """
+        entry = self.load(reasoner) or {
+            'format': CACHE_FORMAT_VERSION,
+            'sha256': self.digest,
+            'reasoner': reasoner
+        }
+        entry[section] = value
+        self._entries[reasoner] = entry
+        path = self.path(reasoner)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Escrever em arquivo temporário para não corromper um cache em uso
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Aviso: não foi possível gravar o cache de raciocínio: {e}")
+        return entry
+
+
+def _java_available() -> bool:
+    """Verifica se há um executável Java (necessário para HermiT/Pellet)."""
+    try:
+        import owlready2
+        java = owlready2.JAVA_EXE
+    except (ImportError, AttributeError):
+        java = "java"
+    return bool(shutil.which(java) or os.path.exists(java))
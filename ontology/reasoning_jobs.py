@@ -0,0 +1,237 @@
+"""
+Módulo com a fila de tarefas de raciocínio DL em segundo plano.
+
+O reasoner (HermiT/Pellet) inicia uma JVM e pode levar minutos; os
+endpoints interativos não devem esperar por ele. A fila executa as tarefas
+em uma única thread de fundo:
+
+- ``submit`` retorna imediatamente um job com id; pedidos repetidos de uma
+  tarefa ainda na fila (ou em execução sobre a mesma versão do grafo) são
+  agrupados no mesmo job, e um resultado já calculado sobre a versão atual
+  não é recalculado
+- ``latest`` devolve o último resultado concluído de cada tarefa, marcado
+  como desatualizado (``stale``) se as triplas declaradas mudaram desde o
+  cálculo ou se há um recálculo pendente
+- ``wait`` permite aguardar a conclusão de um job (long polling)
+"""
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+TASKS = ("classify", "realize", "materialize", "consistency", "all")
+
+# Seções do resultado de "all" que também atualizam a tarefa individual
+_ALL_SECTIONS = {
+    "classify": "classification",
+    "realize": "realization",
+    "materialize": "materialization",
+    "consistency": "consistency"
+}
+
+# Método do reasoner de cada tarefa (as demais usam o próprio nome)
+_RUNNERS = {
+    "all": "run_all_reasoning",
+    "consistency": "check_consistency"
+}
+
+MAX_FINISHED_JOBS = 100
+
+
+class ReasoningJob:
+    """Tarefa de raciocínio submetida à fila."""
+
+    def __init__(self, task: str, version: int):
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.version = version
+        self.status = "queued"
+        self.result = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        """Representação serializável do job."""
+        data = {
+            "job_id": self.id,
+            "task": self.task,
+            "status": self.status,
+            "graph_version": self.version,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if include_result:
+            data["results"] = self.result
+        return data
+
+
+class ReasoningJobQueue:
+    """Fila de tarefas do ``DLReasoner`` executada por uma thread de fundo."""
+
+    def __init__(self, reasoner):
+        """
+        Inicializa a fila (a thread é iniciada na primeira submissão).
+
+        Args:
+            reasoner: Instância do DLReasoner
+        """
+        self.reasoner = reasoner
+        self._queue: "queue.Queue[Optional[ReasoningJob]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, ReasoningJob]" = OrderedDict()
+        self._pending: Dict[str, ReasoningJob] = {}
+        self._running: Optional[ReasoningJob] = None
+        self._latest: Dict[str, ReasoningJob] = {}
+        self._latest_results: Dict[str, object] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _graph_version(self) -> int:
+        """Versão das triplas declaradas (as inferências dependem só delas)."""
+        knowledge_graph = getattr(self.reasoner, "knowledge_graph", None)
+        return knowledge_graph.asserted_version if knowledge_graph is not None else 0
+
+    def _runner(self, task: str) -> Callable[[], object]:
+        """Função do reasoner que executa uma tarefa."""
+        return getattr(self.reasoner, _RUNNERS.get(task, task))
+
+    def submit(self, task: str, force: bool = False) -> ReasoningJob:
+        """
+        Submete uma tarefa, agrupando pedidos duplicados.
+
+        Args:
+            task: classify, realize, materialize, consistency ou all
+            force: Recalcular mesmo se o último resultado estiver atualizado
+
+        Returns:
+            Job (novo, já na fila/em execução, ou o último concluído se
+            ainda estiver atualizado)
+        """
+        if task not in TASKS:
+            raise ValueError(f"Tarefa desconhecida: {task}. Opções: {', '.join(TASKS)}")
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Fila de raciocínio encerrada")
+            version = self._graph_version()
+            pending = self._pending.get(task)
+            if pending is not None:
+                return pending
+            running = self._running
+            if running is not None and running.task == task and running.version == version:
+                return running
+            latest = self._latest.get(task)
+            if not force and latest is not None and latest.version == version:
+                return latest
+            job = ReasoningJob(task, version)
+            self._pending[task] = job
+            self._remember(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="reasoning-jobs", daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        return job
+
+    def _remember(self, job: ReasoningJob):
+        """Registra o job, descartando os mais antigos já concluídos."""
+        self._jobs[job.id] = job
+        while len(self._jobs) > MAX_FINISHED_JOBS:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.done.is_set():
+                break
+            self._jobs.popitem(last=False)
+
+    def _work(self):
+        """Laço da thread de fundo: executa um job por vez."""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._pending.pop(job.task, None)
+                self._running = job
+                # Capturar a versão no início: alterações durante o cálculo o tornam desatualizado
+                job.version = self._graph_version()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = self._runner(job.task)()
+                job.status = "done"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+                print(f"⚠️  Aviso: tarefa de raciocínio '{job.task}' falhou: {e}")
+            job.finished_at = time.time()
+            with self._lock:
+                self._running = None
+                if job.status == "done":
+                    self._latest[job.task] = job
+                    self._latest_results[job.task] = job.result
+                    if job.task == "all":
+                        for task, section in _ALL_SECTIONS.items():
+                            self._latest[task] = job
+                            self._latest_results[task] = job.result.get(section)
+            job.done.set()
+
+    def get(self, job_id: str) -> Optional[ReasoningJob]:
+        """Obtém um job pelo id."""
+        return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[ReasoningJob]:
+        """
+        Aguarda a conclusão de um job.
+
+        Args:
+            job_id: Id do job
+            timeout: Tempo máximo de espera em segundos
+
+        Returns:
+            O job (concluído ou não ao fim do prazo), ou None se não existir
+        """
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def latest(self, task: str) -> Optional[Dict]:
+        """
+        Último resultado concluído de uma tarefa.
+
+        Args:
+            task: Nome da tarefa
+
+        Returns:
+            Dicionário com ``results``, ``computed_at``, ``stale`` e o job
+            pendente (se houver), ou None se a tarefa nunca foi concluída
+        """
+        with self._lock:
+            job = self._latest.get(task)
+            if job is None:
+                return None
+            pending = self._pending.get(task) or self._pending.get("all")
+            if pending is None and self._running is not None and self._running.task in (task, "all"):
+                pending = self._running
+            return {
+                "results": self._latest_results[task],
+                "job_id": job.id,
+                "computed_at": job.finished_at,
+                "graph_version": job.version,
+                "stale": job.version != self._graph_version() or pending is not None,
+                "pending_job_id": pending.id if pending is not None else None
+            }
+
+    def close(self):
+        """Encerra a thread de fundo após o job em execução."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
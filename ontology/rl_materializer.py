@@ -0,0 +1,297 @@
+"""
+Módulo com um materializador OWL 2 RL / RDFS em Python puro.
+
+HermiT e Pellet exigem Java e o HermiT rejeita ``xsd:date``, usado na
+ontologia; sem eles o sistema ficava sem nenhuma inferência. Este
+materializador aplica regras do perfil OWL 2 RL por encadeamento para a
+frente, sem JVM:
+
+- ``cax-sco``: tipos herdados pela hierarquia (``rdfs:subClassOf`` e
+  ``owl:equivalentClass``)
+- ``prp-spo1``: triplas herdadas por ``rdfs:subPropertyOf`` (e
+  ``owl:equivalentProperty``)
+- ``prp-dom`` / ``prp-rng``: tipos pelo domínio e pela imagem
+- ``prp-inv1`` / ``prp-inv2``: ``owl:inverseOf``
+- ``prp-trp`` / ``prp-symp``: propriedades transitivas e simétricas
+- ``eq-sym``, ``eq-trans``, ``eq-rep-s``, ``eq-rep-o``: ``owl:sameAs``
+- ``cax-dw``: indivíduos em classes disjuntas (inconsistência)
+
+O esquema é fechado uma vez; o ABox é processado em avaliação semi-ingênua
+sobre triplas codificadas como inteiros: cada tripla nova é combinada uma
+única vez com as já derivadas, por meio de índices em dicionários e
+conjuntos. Literais nunca são interpretados, então datatypes não suportados
+pelo HermiT não são problema.
+"""
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+from rdflib import BNode, URIRef, RDF, RDFS, OWL
+
+
+class RLMaterializer:
+    """Encadeamento para a frente de regras OWL 2 RL sobre um conjunto de triplas."""
+
+    def __init__(self, triples: Iterable[Tuple]):
+        """
+        Codifica as triplas e fecha o esquema.
+
+        Args:
+            triples: Triplas declaradas (termos rdflib)
+        """
+        self._ids: Dict = {}
+        self._terms: List = []
+        self.asserted: Set[Tuple[int, int, int]] = set()
+        for s, p, o in triples:
+            self.asserted.add((self._id(s), self._id(p), self._id(o)))
+        self.triples: Set[Tuple[int, int, int]] = set(self.asserted)
+
+        self.TYPE = self._id(RDF.type)
+        self.SAME_AS = self._id(OWL.sameAs)
+        self.seconds = 0.0
+        self.iterations = 0
+        self._build_schema()
+
+        # Índices do ABox: p -> s -> {o} e p -> o -> {s}
+        self._out: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self._in: Dict[int, Dict[int, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        # Para owl:sameAs: termo -> triplas em que aparece como sujeito/objeto
+        self._by_s: Dict[int, Set[Tuple[int, int, int]]] = defaultdict(set)
+        self._by_o: Dict[int, Set[Tuple[int, int, int]]] = defaultdict(set)
+        self._same: Dict[int, Set[int]] = defaultdict(set)
+        for triple in self.triples:
+            self._index(triple)
+
+    def _id(self, term) -> int:
+        """Código inteiro de um termo."""
+        code = self._ids.get(term)
+        if code is None:
+            code = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+        return code
+
+    def _is_resource(self, code: int) -> bool:
+        """Se o termo pode ser sujeito (IRI ou nó anônimo)."""
+        return isinstance(self._terms[code], (URIRef, BNode))
+
+    def _is_named(self, code: int) -> bool:
+        """Se o termo é um IRI."""
+        return isinstance(self._terms[code], URIRef)
+
+    def _objects(self, predicate) -> Iterable[Tuple[int, int]]:
+        """Pares (sujeito, objeto) declarados para um predicado do esquema."""
+        p = self._ids.get(predicate)
+        if p is None:
+            return []
+        return [(s, o) for s, pp, o in self.asserted if pp == p]
+
+    def _closure(self, edges: Dict[int, Set[int]]) -> Dict[int, Set[int]]:
+        """Fecho transitivo reflexivo de um grafo de arestas."""
+        closure = {}
+        for start in edges:
+            seen, stack = {start}, [start]
+            while stack:
+                for nxt in edges.get(stack.pop(), ()):
+                    if nxt not in seen:
+                        seen.add(nxt)
+                        stack.append(nxt)
+            closure[start] = seen
+        return closure
+
+    def _build_schema(self):
+        """Fecha hierarquias de classes e propriedades e indexa as características."""
+        sub_class: Dict[int, Set[int]] = defaultdict(set)
+        for s, o in self._objects(RDFS.subClassOf):
+            sub_class[s].add(o)
+        for s, o in self._objects(OWL.equivalentClass):
+            sub_class[s].add(o)
+            sub_class[o].add(s)
+        # Apenas classes nomeadas entram nos tipos derivados
+        self.superclasses = {
+            c: {d for d in supers if self._is_named(d)}
+            for c, supers in self._closure(sub_class).items()
+        }
+
+        sub_prop: Dict[int, Set[int]] = defaultdict(set)
+        for s, o in self._objects(RDFS.subPropertyOf):
+            sub_prop[s].add(o)
+        for s, o in self._objects(OWL.equivalentProperty):
+            sub_prop[s].add(o)
+            sub_prop[o].add(s)
+        self.superproperties = {
+            p: {q for q in supers if q != p and self._is_named(q)}
+            for p, supers in self._closure(sub_prop).items()
+        }
+
+        self.domains: Dict[int, Set[int]] = defaultdict(set)
+        for s, o in self._objects(RDFS.domain):
+            if self._is_named(o):
+                self.domains[s].add(o)
+        self.ranges: Dict[int, Set[int]] = defaultdict(set)
+        for s, o in self._objects(RDFS.range):
+            # Imagens de datatype só se aplicam a literais, que não recebem tipo
+            if self._is_named(o):
+                self.ranges[s].add(o)
+
+        self.inverses: Dict[int, Set[int]] = defaultdict(set)
+        for s, o in self._objects(OWL.inverseOf):
+            self.inverses[s].add(o)
+            self.inverses[o].add(s)
+
+        type_id = self._id(RDF.type)
+        characteristics = defaultdict(set)
+        for s, p, o in self.asserted:
+            if p == type_id:
+                characteristics[o].add(s)
+        self.transitive = characteristics.get(self._ids.get(OWL.TransitiveProperty), set())
+        self.symmetric = characteristics.get(self._ids.get(OWL.SymmetricProperty), set())
+
+        self.disjoint: Dict[int, Set[int]] = defaultdict(set)
+        for s, o in self._objects(OWL.disjointWith):
+            self.disjoint[s].add(o)
+            self.disjoint[o].add(s)
+
+    def _index(self, triple: Tuple[int, int, int]):
+        """Insere uma tripla nos índices."""
+        s, p, o = triple
+        self._out[p][s].add(o)
+        self._in[p][o].add(s)
+        self._by_s[s].add(triple)
+        self._by_o[o].add(triple)
+        if p == self.SAME_AS:
+            self._same[s].add(o)
+
+    def _consequences(self, triple: Tuple[int, int, int]) -> Iterable[Tuple[int, int, int]]:
+        """Triplas derivadas de uma tripla nova combinada com as existentes."""
+        s, p, o = triple
+        TYPE, SAME_AS = self.TYPE, self.SAME_AS
+
+        if p == TYPE:
+            for cls_ in self.superclasses.get(o, ()):
+                yield (s, TYPE, cls_)                                  # cax-sco
+        else:
+            for q in self.superproperties.get(p, ()):
+                yield (s, q, o)                                        # prp-spo1
+            for cls_ in self.domains.get(p, ()):
+                yield (s, TYPE, cls_)                                  # prp-dom
+            if self._is_resource(o):
+                for cls_ in self.ranges.get(p, ()):
+                    yield (o, TYPE, cls_)                              # prp-rng
+                for q in self.inverses.get(p, ()):
+                    yield (o, q, s)                                    # prp-inv
+                if p in self.symmetric:
+                    yield (o, p, s)                                    # prp-symp
+                if p in self.transitive:
+                    for z in list(self._out[p].get(o, ())):
+                        yield (s, p, z)                                # prp-trp
+                    for x in list(self._in[p].get(s, ())):
+                        yield (x, p, o)
+
+        if p == SAME_AS:
+            yield (o, SAME_AS, s)                                      # eq-sym
+            for z in list(self._same.get(o, ())):
+                yield (s, SAME_AS, z)                                  # eq-trans
+            for _, p2, o2 in list(self._by_s.get(s, ())):
+                yield (o, p2, o2)                                      # eq-rep-s
+            for s2, p2, _ in list(self._by_o.get(s, ())):
+                if self._is_resource(s2):
+                    yield (s2, p2, o)                                  # eq-rep-o
+        else:
+            for same in list(self._same.get(s, ())):
+                yield (same, p, o)                                     # eq-rep-s
+            for same in list(self._same.get(o, ())):
+                yield (s, p, same)                                     # eq-rep-o
+
+    def run(self) -> "RLMaterializer":
+        """
+        Executa o encadeamento até o ponto fixo.
+
+        Returns:
+            O próprio materializador (para encadear chamadas)
+        """
+        start = time.perf_counter()
+        delta = list(self.triples)
+        self.iterations = 0
+        while delta:
+            self.iterations += 1
+            new = []
+            for triple in delta:
+                for derived in self._consequences(triple):
+                    if derived not in self.triples and self._is_resource(derived[0]):
+                        self.triples.add(derived)
+                        self._index(derived)
+                        new.append(derived)
+            delta = new
+        self.seconds = time.perf_counter() - start
+        return self
+
+    def _decode(self, triple: Tuple[int, int, int]) -> Tuple:
+        """Converte uma tripla codificada de volta para termos rdflib."""
+        return tuple(self._terms[code] for code in triple)
+
+    def inferred(self) -> Set[Tuple]:
+        """Triplas derivadas que não estavam declaradas."""
+        return {self._decode(t) for t in self.triples - self.asserted}
+
+    def types(self) -> Dict[URIRef, Set[URIRef]]:
+        """
+        Tipos nomeados (declarados e inferidos) de cada indivíduo.
+
+        Returns:
+            IRI do indivíduo -> classes (sem ``owl:Thing`` e sem os tipos
+            que declaram entidades do esquema)
+        """
+        meta = {self._ids[t] for t in _META_CLASSES if t in self._ids}
+        individual = self._ids.get(OWL.NamedIndividual)
+        entities = {s for s, p, o in self.asserted
+                    if p == self.TYPE and o in meta and o != individual}
+        thing = self._ids.get(OWL.Thing)
+        result: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for individual, classes in self._out[self.TYPE].items():
+            if individual in entities or not self._is_named(individual):
+                continue
+            for cls_ in classes:
+                if cls_ not in meta and cls_ != thing and self._is_named(cls_):
+                    result[self._terms[individual]].add(cls_)
+        return result
+
+    def most_specific_types(self) -> Dict[URIRef, List[URIRef]]:
+        """
+        Tipos mais específicos de cada indivíduo (formato da realização).
+
+        Returns:
+            IRI do indivíduo -> classes que não são superclasse estrita de
+            outro tipo do mesmo indivíduo
+        """
+        result = {}
+        for individual, classes in self.types().items():
+            specific = [
+                cls_ for cls_ in classes
+                if not any(cls_ in self.superclasses.get(other, ())
+                           and other not in self.superclasses.get(cls_, ())
+                           for other in classes if other != cls_)
+            ]
+            result[individual] = sorted(self._terms[cls_] for cls_ in specific)
+        return result
+
+    def inconsistencies(self) -> List[str]:
+        """Indivíduos que pertencem a classes disjuntas (regra ``cax-dw``)."""
+        problems = []
+        for individual, classes in self._out[self.TYPE].items():
+            for cls_ in classes:
+                for other in self.disjoint.get(cls_, ()):
+                    if other in classes and cls_ < other:
+                        problems.append(
+                            f"{self._terms[individual]} é instância das classes disjuntas "
+                            f"{self._terms[cls_]} e {self._terms[other]}"
+                        )
+        return problems
+
+
+# Tipos de entidades do esquema (não são realização de indivíduos)
+_META_CLASSES = {
+    OWL.Class, OWL.ObjectProperty, OWL.DatatypeProperty, OWL.AnnotationProperty,
+    OWL.FunctionalProperty, OWL.InverseFunctionalProperty, OWL.TransitiveProperty,
+    OWL.SymmetricProperty, OWL.AsymmetricProperty, OWL.ReflexiveProperty,
+    OWL.IrreflexiveProperty, OWL.Ontology, OWL.NamedIndividual, OWL.Restriction,
+    OWL.AllDisjointClasses, RDF.Property, RDFS.Class, RDFS.Datatype
+}
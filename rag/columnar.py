@@ -0,0 +1,150 @@
+"""
+Módulo com o formato colunar de resultados SPARQL.
+
+Em vez de um dicionário novo por linha, o resultado guarda uma lista de
+valores por variável. Cada termo RDF distinto é convertido para string uma
+única vez e a string é internada, então IRIs repetidos em milhares de linhas
+compartilham o mesmo objeto. As linhas continuam acessíveis como
+dicionários por meio de visões preguiçosas (``RowView``).
+"""
+import sys
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from rdflib import Literal, URIRef
+
+
+def term_to_string(value) -> Optional[str]:
+    """
+    Converte um termo RDF para string, como ``SPARQLQueryEngine._format_row``.
+
+    Args:
+        value: Termo rdflib (ou None)
+
+    Returns:
+        String do termo, ou None se o valor for vazio/não ligado
+    """
+    if not value:
+        return None
+    if isinstance(value, URIRef):
+        return str(value)
+    if isinstance(value, Literal):
+        return str(value.value)
+    return str(value)
+
+
+class RowView(Mapping):
+    """Visão somente leitura de uma linha de um ``ColumnarResult``."""
+
+    __slots__ = ("_result", "_index")
+
+    def __init__(self, result: "ColumnarResult", index: int):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, key: str) -> str:
+        value = self._result.columns[key][self._index]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        index = self._index
+        columns = self._result.columns
+        return (var for var in self._result.variables if columns[var][index] is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ColumnarResult:
+    """Resultado SPARQL em colunas: variável -> lista de strings internadas."""
+
+    def __init__(self, variables: List[str], columns: Optional[Dict[str, List[Optional[str]]]] = None):
+        """
+        Inicializa o resultado.
+
+        Args:
+            variables: Nomes das variáveis na ordem da projeção
+            columns: Valores por variável (None para não ligado)
+        """
+        self.variables = list(variables)
+        self.columns = columns if columns is not None else {var: [] for var in self.variables}
+
+    @classmethod
+    def from_bindings(cls, bindings: Iterable, variables: List) -> "ColumnarResult":
+        """
+        Constrói o resultado a partir de bindings do rdflib.
+
+        Args:
+            bindings: Bindings (mapeamentos variável -> termo)
+            variables: Variáveis rdflib da projeção
+
+        Returns:
+            Resultado colunar
+        """
+        result = cls([str(var) for var in variables])
+        targets = [(var, result.columns[str(var)]) for var in variables]
+        strings: Dict = {}
+        for binding in bindings:
+            for var, column in targets:
+                term = binding.get(var)
+                if term is None:
+                    column.append(None)
+                    continue
+                value = strings.get(term, strings)
+                if value is strings:
+                    value = term_to_string(term)
+                    value = strings[term] = sys.intern(value) if value is not None else None
+                column.append(value)
+        return result
+
+    @classmethod
+    def from_encoded(cls, columns: List[str], values: List[Tuple]) -> "ColumnarResult":
+        """
+        Constrói o resultado a partir do formato compacto dos workers.
+
+        Args:
+            columns: Nomes das colunas
+            values: Linhas como tuplas
+
+        Returns:
+            Resultado colunar
+        """
+        transposed = list(zip(*values)) if values else [() for _ in columns]
+        return cls(columns, {
+            col: [sys.intern(v) if v is not None else None for v in column]
+            for col, column in zip(columns, transposed)
+        })
+
+    def __len__(self) -> int:
+        if not self.variables:
+            return 0
+        return len(self.columns[self.variables[0]])
+
+    def __getitem__(self, index: int) -> RowView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        return (RowView(self, i) for i in range(len(self)))
+
+    def slice(self, start: int, stop: Optional[int] = None) -> "ColumnarResult":
+        """Resultado com as linhas ``[start:stop]``."""
+        return ColumnarResult(
+            self.variables,
+            {var: column[start:stop] for var, column in self.columns.items()}
+        )
+
+    def to_dicts(self) -> List[Dict]:
+        """Materializa as linhas como dicionários (formato de ``query``)."""
+        return [dict(row) for row in self]
+
+    def to_json(self) -> Dict:
+        """Representação colunar serializável em JSON."""
+        return {"variables": self.variables, "columns": self.columns}
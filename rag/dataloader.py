@@ -0,0 +1,125 @@
+"""
+Módulo de carregamento em lote (dataloader) para consultas por entidade.
+
+Código que percorre estudantes ou cursos tende a emitir uma consulta SPARQL
+por entidade (padrão N+1). O dataloader acumula as chaves pedidas com
+``load`` e, no primeiro acesso a um resultado, busca todas as pendentes com
+uma única consulta em lote (``VALUES``). Os resultados ficam em cache até o
+fim da requisição.
+
+Uso típico (uma instância por requisição):
+
+    loader = SPARQLDataLoader(engine)
+    pendentes = {s: loader.tasks.load(s) for s in estudantes}
+    tarefas = {s: p.result() for s, p in pendentes.items()}  # 1 consulta
+"""
+from typing import Callable, Dict, Iterable, List
+
+
+class Pending:
+    """Resultado ainda não carregado de uma chave."""
+
+    __slots__ = ("_loader", "key")
+
+    def __init__(self, loader: "BatchLoader", key: str):
+        self._loader = loader
+        self.key = key
+
+    def result(self) -> List[Dict]:
+        """Obtém o resultado, disparando o lote pendente se necessário."""
+        return self._loader.get(self.key)
+
+
+class BatchLoader:
+    """Agrupa chamadas individuais em uma função de lote, com cache."""
+
+    def __init__(self, batch_fn: Callable[[List[str]], Dict[str, List[Dict]]]):
+        """
+        Inicializa o loader.
+
+        Args:
+            batch_fn: Função que recebe uma lista de chaves e retorna um
+                dicionário chave -> linhas
+        """
+        self.batch_fn = batch_fn
+        self.batches = 0
+        self._cache: Dict[str, List[Dict]] = {}
+        self._pending: Dict[str, None] = {}
+
+    def load(self, key: str) -> Pending:
+        """
+        Agenda o carregamento de uma chave.
+
+        Args:
+            key: IRI da entidade
+
+        Returns:
+            Resultado pendente; ``result()`` dispara o lote
+        """
+        if key not in self._cache:
+            self._pending[key] = None
+        return Pending(self, key)
+
+    def load_many(self, keys: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        Carrega várias chaves de uma vez.
+
+        Args:
+            keys: IRIs das entidades
+
+        Returns:
+            Dicionário chave -> linhas
+        """
+        pending = [self.load(key) for key in keys]
+        return {p.key: p.result() for p in pending}
+
+    def get(self, key: str) -> List[Dict]:
+        """Obtém o resultado de uma chave, carregando as pendentes em lote."""
+        if key not in self._cache:
+            self._pending[key] = None
+            self.dispatch()
+        return self._cache.get(key, [])
+
+    def dispatch(self):
+        """Executa a função de lote para todas as chaves pendentes."""
+        if not self._pending:
+            return
+        keys, self._pending = list(self._pending), {}
+        results = self.batch_fn(keys)
+        self.batches += 1
+        for key in keys:
+            self._cache[key] = results.get(key, [])
+
+    def clear(self):
+        """Descarta o cache e as chaves pendentes."""
+        self._cache.clear()
+        self._pending.clear()
+
+
+class SPARQLDataLoader:
+    """Loaders em lote do ``SPARQLQueryEngine`` para uma requisição."""
+
+    def __init__(self, engine):
+        """
+        Cria os loaders.
+
+        Args:
+            engine: Instância do SPARQLQueryEngine
+        """
+        self.courses = BatchLoader(engine.get_courses_for_students)
+        self.tasks = BatchLoader(engine.get_tasks_for_students)
+        self.feedback = BatchLoader(engine.get_feedback_for_students)
+        self.resources = BatchLoader(engine.get_resources_for_courses)
+        self.competencies = BatchLoader(engine.get_competencies_for_courses)
+        self._loaders = [self.courses, self.tasks, self.feedback,
+                         self.resources, self.competencies]
+
+    def dispatch(self):
+        """Executa os lotes pendentes de todos os loaders."""
+        for loader in self._loaders:
+            loader.dispatch()
+
+    @property
+    def batches(self) -> int:
+        """Número total de consultas em lote executadas."""
+        return sum(loader.batches for loader in self._loaders)
@@ -0,0 +1,424 @@
+"""
+Módulo de backends de armazenamento do grafo RDF.
+
+O parse de RDF/XML é o formato mais lento do rdflib. Para ontologias com
+milhões de triplas, o grafo pode ser convertido uma única vez para um
+formato de carga rápida e reaberto na inicialização sem novo parse:
+
+- ``memory``: parse do arquivo OWL a cada inicialização (padrão)
+- ``snapshot``: snapshot binário (pickle do store em memória do rdflib)
+- ``berkeleydb``: store persistente em disco do rdflib (requer ``berkeleydb``)
+
+O mesmo vale para o owlready2 usado pelo reasoner: ``quadstore`` é um
+quadstore SQLite do owlready2, construído uma vez e reaberto sem parse
+(``load_owlready_world``), refeito automaticamente quando o hash da
+ontologia muda.
+"""
+import os
+import json
+import atexit
+import pickle
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+from rdflib import Graph
+
+
+STORE_BACKENDS = ("memory", "snapshot", "berkeleydb")
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo.
+
+    Args:
+        path: Caminho do arquivo
+        chunk_size: Tamanho dos blocos de leitura
+
+    Returns:
+        Hash hexadecimal do conteúdo
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_info(ontology_path: str) -> Dict:
+    """Identifica a versão do arquivo de origem (tamanho, mtime e hash)."""
+    stat = os.stat(ontology_path)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': file_digest(ontology_path)
+    }
+
+
+def _is_fresh(recorded: Optional[Dict], ontology_path: str) -> bool:
+    """
+    Verifica se o store foi construído a partir da versão atual da ontologia.
+
+    Compara tamanho e mtime primeiro e só recalcula o hash se eles mudaram.
+    """
+    if not recorded or not os.path.exists(ontology_path):
+        return False
+    stat = os.stat(ontology_path)
+    if recorded.get('size') == stat.st_size and recorded.get('mtime') == stat.st_mtime:
+        return True
+    return recorded.get('sha256') == file_digest(ontology_path)
+
+
+def default_store_path(ontology_path: str, store: str) -> str:
+    """
+    Caminho padrão do store persistente, ao lado da ontologia.
+
+    Args:
+        ontology_path: Caminho absoluto do arquivo OWL
+        store: Nome do backend
+
+    Returns:
+        Caminho do snapshot ou diretório do store
+    """
+    base_dir = os.path.join(os.path.dirname(ontology_path), "data", "graph_store")
+    name = os.path.splitext(os.path.basename(ontology_path))[0]
+    if store == "snapshot":
+        return os.path.join(base_dir, f"{name}.graph")
+    if store == "quadstore":
+        return os.path.join(base_dir, f"{name}.sqlite3")
+    return os.path.join(base_dir, f"{name}.{store}")
+
+
+def _sidecar_path(store_path: str) -> str:
+    """Arquivo com a identificação da origem de um store em diretório."""
+    return store_path.rstrip(os.sep) + ".source.json"
+
+
+def _parse_ontology(ontology_path: str, graph: Optional[Graph] = None) -> Graph:
+    """Faz o parse do arquivo OWL (RDF/XML)."""
+    graph = graph if graph is not None else Graph()
+    graph.parse(ontology_path, format="xml")
+    return graph
+
+
+def build_store(ontology_path: str, store: str = "snapshot",
+                store_path: Optional[str] = None) -> str:
+    """
+    Converte a ontologia para um backend persistente.
+
+    Args:
+        ontology_path: Caminho absoluto do arquivo OWL
+        store: Backend de destino (``snapshot``, ``berkeleydb`` ou
+            ``quadstore``)
+        store_path: Caminho de destino (opcional)
+
+    Returns:
+        Caminho do store gerado
+    """
+    if store == "quadstore":
+        return build_quadstore(ontology_path, store_path)
+    if store not in ("snapshot", "berkeleydb"):
+        raise ValueError(f"Backend '{store}' não é persistente. Use: snapshot, berkeleydb, quadstore")
+
+    store_path = store_path or default_store_path(ontology_path, store)
+    os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+    source = _source_info(ontology_path)
+
+    if store == "snapshot":
+        write_snapshot(_parse_ontology(ontology_path), ontology_path, store_path, source)
+    else:
+        graph = Graph(store="BerkeleyDB")
+        graph.open(store_path, create=True)
+        try:
+            graph.remove((None, None, None))
+            _parse_ontology(ontology_path, graph)
+            graph.commit()
+        finally:
+            graph.close()
+        with open(_sidecar_path(store_path), "w", encoding="utf-8") as f:
+            json.dump(source, f)
+
+    return store_path
+
+
+def write_snapshot(graph: Graph, ontology_path: str, store_path: str,
+                   source: Optional[Dict] = None) -> str:
+    """
+    Grava um grafo já carregado como snapshot binário.
+
+    Args:
+        graph: Grafo rdflib (store em memória)
+        ontology_path: Arquivo OWL de origem do grafo
+        store_path: Caminho do snapshot
+        source: Identificação da origem (calculada se omitida)
+
+    Returns:
+        Caminho do snapshot
+    """
+    os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+    payload = {
+        'format': SNAPSHOT_FORMAT_VERSION,
+        'source': source or _source_info(ontology_path),
+        'graph': graph
+    }
+    # Escrever em arquivo temporário para não corromper um snapshot em uso
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, store_path)
+    return store_path
+
+
+def _read_snapshot(store_path: str) -> Optional[Dict]:
+    """Lê o conteúdo de um snapshot binário, se existir e tiver o formato atual."""
+    if not os.path.exists(store_path):
+        return None
+    with open(store_path, "rb") as f:
+        payload = pickle.load(f)
+    if payload.get('format') != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return payload
+
+
+def read_snapshot(store_path: str) -> Graph:
+    """
+    Carrega um snapshot sem compará-lo com o arquivo OWL.
+
+    Usado pelos processos réplica: o snapshot gravado pelo motor reflete o
+    grafo vivo (alterações em tempo de execução, inferências, recargas), não
+    o arquivo, e refazer o parse geraria outros identificadores de blank nodes.
+
+    Args:
+        store_path: Caminho do snapshot
+
+    Returns:
+        Grafo rdflib do snapshot
+
+    Raises:
+        ValueError: Se o snapshot não existir ou tiver outro formato
+    """
+    payload = _read_snapshot(store_path)
+    if payload is None:
+        raise ValueError(f"Snapshot ausente ou em formato antigo: {store_path}")
+    return payload['graph']
+
+
+def _load_snapshot(ontology_path: str, store_path: str) -> Optional[Graph]:
+    """Carrega um snapshot binário se ele existir e estiver atualizado."""
+    payload = _read_snapshot(store_path)
+    if payload is None or not _is_fresh(payload.get('source'), ontology_path):
+        return None
+    return payload['graph']
+
+
+def _open_berkeleydb(ontology_path: str, store_path: str) -> Optional[Graph]:
+    """Abre um store BerkeleyDB se ele existir e estiver atualizado."""
+    sidecar = _sidecar_path(store_path)
+    if not os.path.exists(store_path) or not os.path.exists(sidecar):
+        return None
+    with open(sidecar, "r", encoding="utf-8") as f:
+        recorded = json.load(f)
+    if not _is_fresh(recorded, ontology_path):
+        return None
+    graph = Graph(store="BerkeleyDB")
+    graph.open(store_path, create=False)
+    return graph
+
+
+def load_graph(ontology_path: str, store: str = "memory",
+               store_path: Optional[str] = None) -> Graph:
+    """
+    Abre o grafo da ontologia usando o backend escolhido.
+
+    Se o store persistente não existir ou estiver desatualizado em relação
+    ao arquivo OWL, faz o parse do arquivo como fallback.
+
+    Args:
+        ontology_path: Caminho absoluto do arquivo OWL
+        store: Backend (``memory``, ``snapshot`` ou ``berkeleydb``)
+        store_path: Caminho do store persistente (opcional)
+
+    Returns:
+        Grafo rdflib com as triplas da ontologia
+    """
+    if store not in STORE_BACKENDS:
+        raise ValueError(f"Backend desconhecido: {store}. Opções: {', '.join(STORE_BACKENDS)}")
+
+    if store == "memory":
+        return _parse_ontology(ontology_path)
+
+    store_path = store_path or default_store_path(ontology_path, store)
+    try:
+        if store == "snapshot":
+            graph = _load_snapshot(ontology_path, store_path)
+        else:
+            graph = _open_berkeleydb(ontology_path, store_path)
+    except Exception as e:
+        print(f"⚠️  Aviso: Não foi possível abrir o store '{store}' em {store_path}: {e}")
+        graph = None
+
+    if graph is None:
+        print(f"⚠️  Aviso: Store '{store}' ausente ou desatualizado em {store_path}.")
+        print("   Fazendo parse da ontologia. Execute: python scripts/build_graph_store.py")
+        return _parse_ontology(ontology_path)
+
+    return graph
+
+
+def build_quadstore(ontology_path: str, store_path: Optional[str] = None) -> str:
+    """
+    Constrói o quadstore SQLite do owlready2 com a ontologia.
+
+    Args:
+        ontology_path: Caminho absoluto do arquivo OWL
+        store_path: Caminho do arquivo SQLite (opcional)
+
+    Returns:
+        Caminho do quadstore gerado
+    """
+    from owlready2 import World
+
+    store_path = store_path or os.getenv("OWLREADY_QUADSTORE_PATH") or default_store_path(ontology_path, "quadstore")
+    os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+    source = _source_info(ontology_path)
+
+    # Construir em arquivo temporário para não afetar processos com o quadstore aberto
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    world = World(filename=tmp_path)
+    try:
+        world.get_ontology(f"file://{ontology_path}").load()
+        world.save()
+    finally:
+        world.close()
+    os.replace(tmp_path, store_path)
+    with open(_sidecar_path(store_path), "w", encoding="utf-8") as f:
+        json.dump(source, f)
+    return store_path
+
+
+def _quadstore_is_fresh(ontology_path: str, store_path: str) -> bool:
+    """Verifica se o quadstore existe e foi construído a partir da ontologia atual."""
+    sidecar = _sidecar_path(store_path)
+    if not os.path.exists(store_path) or not os.path.exists(sidecar):
+        return False
+    with open(sidecar, "r", encoding="utf-8") as f:
+        return _is_fresh(json.load(f), ontology_path)
+
+
+# Mundos owlready2 abertos neste processo. Os somente leitura são
+# compartilhados entre os donos: (quadstore, mtime) -> mundo, ontologia e nº
+# de donos. Os graváveis têm cada um a sua cópia: id(mundo) -> cópia
+_shared_worlds: Dict[Tuple[str, int], Dict] = {}
+_private_worlds: Dict[int, str] = {}
+_worlds_lock = threading.Lock()
+
+
+def _remove_copy(copy_path: str):
+    """Remove a cópia do quadstore e o journal do SQLite."""
+    for path in (copy_path, f"{copy_path}-journal"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _private_copy(store_path: str) -> str:
+    """Cópia descartável do quadstore (removida pelo dono ou ao fim do processo)."""
+    fd, copy_path = tempfile.mkstemp(prefix="owlready-", suffix=".sqlite3")
+    os.close(fd)
+    shutil.copyfile(store_path, copy_path)
+    atexit.register(_remove_copy, copy_path)
+    return copy_path
+
+
+def _open_world(ontology_path: str, store_path: str, read_only: bool) -> Tuple:
+    """Abre o quadstore (reutilizando o mundo somente leitura já aberto no processo)."""
+    from owlready2 import World
+
+    if not read_only:
+        # Cada dono gravável (grafo de conhecimento, reasoner avulso) recebe
+        # inferências e alterações próprias: nunca compartilhar o mundo
+        copy_path = _private_copy(store_path)
+        world = World(filename=copy_path)
+        with _worlds_lock:
+            _private_worlds[id(world)] = copy_path
+        # Ontologia já presente no quadstore: não refazer o parse com load()
+        return world, world.get_ontology(f"file://{ontology_path}")
+
+    key = (store_path, os.stat(store_path).st_mtime_ns)
+    with _worlds_lock:
+        entry = _shared_worlds.get(key)
+        if entry is None:
+            world = World(filename=store_path, read_only=True, exclusive=False)
+            entry = {'world': world, 'ontology': world.get_ontology(f"file://{ontology_path}"),
+                     'owners': 0}
+            _shared_worlds[key] = entry
+        entry['owners'] += 1
+        return entry['world'], entry['ontology']
+
+
+def release_owlready_world(world) -> None:
+    """
+    Libera um mundo aberto por ``load_owlready_world``.
+
+    Um mundo gravável é fechado e sua cópia do quadstore removida; um
+    somente leitura é fechado quando o último dono o libera.
+
+    Args:
+        world: Mundo owlready2 retornado por ``load_owlready_world``
+    """
+    with _worlds_lock:
+        copy_path = _private_worlds.pop(id(world), None)
+        if copy_path is None:
+            for key, entry in _shared_worlds.items():
+                if entry['world'] is world:
+                    entry['owners'] -= 1
+                    if entry['owners'] > 0:
+                        return
+                    del _shared_worlds[key]
+                    break
+            else:
+                return  # mundo em memória (fallback): descartado pelo coletor
+    world.close()
+    if copy_path is not None:
+        _remove_copy(copy_path)
+
+
+def load_owlready_world(ontology_path: str, read_only: bool = False) -> Tuple:
+    """
+    Abre o mundo owlready2 com a ontologia, a partir do quadstore SQLite.
+
+    O quadstore é construído na primeira utilização e refeito quando o hash
+    da ontologia muda. Com ``read_only`` o arquivo é aberto diretamente em
+    modo somente leitura (vários processos compartilham as páginas em
+    cache do sistema) e o mundo é compartilhado pelos donos do processo;
+    caso contrário cada dono abre uma cópia descartável própria, pois o
+    reasoner grava inferências e alterações no mundo. Os donos liberam o
+    mundo com ``release_owlready_world`` (a cópia é removida).
+    Com OWLREADY_QUADSTORE=0, ou se o quadstore falhar, faz o parse do
+    arquivo OWL em memória.
+
+    Args:
+        ontology_path: Caminho absoluto do arquivo OWL
+        read_only: Abrir somente para leitura
+
+    Returns:
+        Tupla (World, ontologia)
+    """
+    from owlready2 import World
+
+    if os.getenv("OWLREADY_QUADSTORE", "1") != "0":
+        store_path = os.getenv("OWLREADY_QUADSTORE_PATH") or default_store_path(ontology_path, "quadstore")
+        try:
+            if not _quadstore_is_fresh(ontology_path, store_path):
+                build_quadstore(ontology_path, store_path)
+            return _open_world(ontology_path, store_path, read_only)
+        except Exception as e:
+            print(f"⚠️  Aviso: quadstore owlready2 indisponível em {store_path}: {e}")
+            print("   Fazendo parse da ontologia em memória.")
+    world = World()
+    return world, world.get_ontology(f"file://{ontology_path}").load()
@@ -1,6 +1,7 @@
 """
 Módulo para RAG híbrido combinando busca vetorial e SPARQL.
 """
+import asyncio
 from typing import List, Dict, Optional
 from rag.vector_store import VectorStore
 from rag.sparql_query import SPARQLQueryEngine
@@ -34,6 +35,39 @@ class HybridRetriever:
         Returns:
             Dicionário com resultados vetoriais e SPARQL, além de citações
         """
+        vector_results = self.vector_store.search(query, k=k, filters=filters)
+        sparql_results = self._extract_sparql_info(query) if use_sparql else []
+        return self._assemble(vector_results, sparql_results, use_sparql)
+    
+    async def aretrieve(self, query: str, k: int = 5, use_sparql: bool = True,
+                        filters: Optional[Dict] = None) -> Dict:
+        """
+        Versão assíncrona de ``retrieve``.
+        
+        A busca vetorial (embedding + FAISS) e as consultas SPARQL consomem
+        CPU: rodam em paralelo no executor, sem bloquear o laço de eventos.
+        
+        Args:
+            query: Consulta do usuário
+            k: Número de resultados da busca vetorial
+            use_sparql: Se deve usar consultas SPARQL
+            filters: Filtros opcionais
+            
+        Returns:
+            Dicionário com resultados vetoriais e SPARQL, além de citações
+        """
+        vector_task = asyncio.to_thread(self.vector_store.search, query, k=k, filters=filters)
+        if use_sparql:
+            vector_results, sparql_results = await asyncio.gather(
+                vector_task, asyncio.to_thread(self._extract_sparql_info, query)
+            )
+        else:
+            vector_results, sparql_results = await vector_task, []
+        return self._assemble(vector_results, sparql_results, use_sparql)
+    
+    def _assemble(self, vector_results: List[Dict], sparql_results: List[Dict],
+                  use_sparql: bool) -> Dict:
+        """Monta o resultado (citações e contexto combinado) das duas buscas."""
         results = {
             'vector_results': [],
             'sparql_results': [],
@@ -45,7 +79,6 @@ class HybridRetriever:
         }
         
         # 1. Busca vetorial em documentos
-        vector_results = self.vector_store.search(query, k=k, filters=filters)
         results['vector_results'] = vector_results
         
         # Extrair citações de documentos
@@ -61,7 +94,6 @@ class HybridRetriever:
         
         # 2. Consultas SPARQL (se habilitado)
         if use_sparql:
-            sparql_results = self._extract_sparql_info(query)
             results['sparql_results'] = sparql_results
             
             # Extrair IRIs como citações
@@ -210,24 +242,16 @@ class HybridRetriever:
         Returns:
             Resultado da verificação de consistência
         """
-        entity_iri = claim.get('entity')
-        property_iri = claim.get('property')
-        value = claim.get('value')
-        
-        if not all([entity_iri, property_iri, value]):
-            return {
-                'consistent': False,
-                'reason': 'Campos obrigatórios faltando'
-            }
-        
-        is_consistent = self.sparql_engine.check_consistency(
-            entity_iri, property_iri, value
-        )
+        return self.sparql_engine.check_many([claim])[0]
+    
+    def verify_many(self, claims: List[Dict]) -> List[Dict]:
+        """
+        Verifica consistência ontológica de várias afirmações de uma vez.
         
-        return {
-            'consistent': is_consistent,
-            'entity': entity_iri,
-            'property': property_iri,
-            'value': value
-        }
-
+        Args:
+            claims: Afirmações com campos: entity, property, value
+            
+        Returns:
+            Resultados na mesma ordem das afirmações
+        """
+        return self.sparql_engine.check_many(claims)
@@ -0,0 +1,315 @@
+"""
+Módulo com a camada única de grafo de conhecimento.
+
+O ``KnowledgeGraph`` é dono das triplas da ontologia e do contador de versão
+compartilhado pelo motor SPARQL e pelo reasoner DL:
+
+- o motor SPARQL consulta ``graph`` (um ``rdflib.Graph``)
+- o reasoner usa ``ontology`` (owlready2) e exporta as triplas inferidas com
+  ``replace_inferred``, tornando-as visíveis ao SPARQL sem recarregar nada
+- toda alteração incrementa ``version`` e é propagada aos ouvintes
+  registrados (índices materializados, réplicas, caches)
+- ``stats`` mantém contadores de triplas declaradas e inferidas (por
+  predicado e por classe), consultados em O(1) pelas métricas
+
+Com ``GRAPH_STORE=owlready`` existe uma única cópia das triplas: o quadstore
+do owlready2, exposto ao rdflib por ``World.as_rdflib_graph()``. As
+inferências ficam em um grafo nomeado próprio (``INFERRED_GRAPH_IRI``). Nos
+demais backends o grafo rdflib é carregado pelo ``graph_store`` e o mundo
+owlready2 só é carregado quando o reasoner é usado. Em ambos os casos o
+mundo é aberto do quadstore SQLite do owlready2 (``load_owlready_world``),
+sem refazer o parse do arquivo OWL.
+"""
+import os
+import threading
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+from rdflib import Graph, URIRef
+from rag.graph_store import load_graph, load_owlready_world, release_owlready_world
+from rag.triple_stats import TripleStats
+
+
+INFERRED_GRAPH_IRI = "http://www.exemplo.org/ead-ontologia/inferred#"
+
+ChangeListener = Callable[[List[Tuple], List[Tuple]], None]
+
+
+def _get_ontology_path(ontology_path: str = "ontologia_mora.owl") -> str:
+    """
+    Resolve o caminho da ontologia relativo à raiz do projeto.
+
+    Args:
+        ontology_path: Caminho relativo ou absoluto para o arquivo OWL
+
+    Returns:
+        Caminho absoluto para o arquivo OWL
+    """
+    # Se já é um caminho absoluto, retornar como está
+    if os.path.isabs(ontology_path):
+        return ontology_path
+
+    # Encontrar o diretório raiz do projeto (onde está ontologia_mora.owl)
+    # Começar do diretório deste arquivo e subir até encontrar o arquivo
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # Tentar encontrar o arquivo subindo os diretórios
+    for _ in range(5):  # Limitar a busca a 5 níveis
+        potential_path = os.path.join(current_dir, ontology_path)
+        if os.path.exists(potential_path):
+            return os.path.abspath(potential_path)
+        parent_dir = os.path.dirname(current_dir)
+        if parent_dir == current_dir:  # Chegou na raiz do sistema
+            break
+        current_dir = parent_dir
+
+    # Se não encontrou, tentar caminho relativo ao diretório atual
+    return os.path.abspath(ontology_path)
+
+
+class KnowledgeGraph:
+    """Grafo de conhecimento compartilhado entre SPARQL e reasoner."""
+
+    def __init__(self, ontology_path: str = "ontologia_mora.owl",
+                 store: Optional[str] = None, store_path: Optional[str] = None,
+                 graph: Optional[Graph] = None):
+        """
+        Carrega a ontologia.
+
+        Args:
+            ontology_path: Caminho para o arquivo OWL
+            store: Backend (memory, snapshot, berkeleydb ou owlready).
+                Padrão: variável de ambiente GRAPH_STORE ou "memory"
+            store_path: Caminho do store persistente (opcional, usa
+                GRAPH_STORE_PATH ou o caminho padrão ao lado da ontologia)
+            graph: Grafo rdflib já carregado (opcional; ex.: réplicas que
+                partem do snapshot gravado pelo motor)
+        """
+        self.ontology_path = _get_ontology_path(ontology_path)
+        self.store = store or os.getenv("GRAPH_STORE", "memory")
+        self.store_path = store_path or os.getenv("GRAPH_STORE_PATH")
+        self.version = 0
+        # Alterações de triplas declaradas (exclui a exportação de inferências)
+        self.asserted_version = 0
+        # Valor de asserted_version em que as triplas declaradas correspondem
+        # ao arquivo OWL (reajustado pelas recargas do arquivo)
+        self.file_version = 0
+        self.lock = threading.RLock()
+        self._listeners: List[ChangeListener] = []
+        self._world = None
+        self._ontology = None
+        self._inferred_ontology = None
+        # Triplas inferidas atualmente exportadas para o grafo
+        self._inferred: Set[Tuple] = set()
+        # Inferidas que foram de fato inseridas (não estavam declaradas)
+        self._exported: Set[Tuple] = set()
+
+        if graph is not None:
+            self.graph = graph
+        elif self.shared:
+            self.graph = self.world.as_rdflib_graph()
+        else:
+            self.graph = load_graph(self.ontology_path, self.store, self.store_path)
+        self.stats = TripleStats.from_graph(self.graph)
+
+    @property
+    def shared(self) -> bool:
+        """Se SPARQL e reasoner compartilham a mesma cópia das triplas."""
+        return self.store == "owlready"
+
+    @property
+    def modified(self) -> bool:
+        """Se as triplas declaradas diferem do arquivo OWL (alterações em tempo de execução)."""
+        return self.asserted_version != self.file_version
+
+    @property
+    def world(self):
+        """Mundo owlready2 com a ontologia (carregado na primeira utilização)."""
+        if self._world is None:
+            with self.lock:
+                if self._world is None:
+                    world, self._ontology = load_owlready_world(self.ontology_path)
+                    self._inferred_ontology = world.get_ontology(INFERRED_GRAPH_IRI)
+                    self._world = world
+        return self._world
+
+    @property
+    def ontology(self):
+        """Ontologia owlready2 carregada."""
+        self.world
+        return self._ontology
+
+    @property
+    def inferred_ontology(self):
+        """Ontologia owlready2 que recebe os fatos inferidos pelo reasoner."""
+        self.world
+        return self._inferred_ontology
+
+    @property
+    def inferred_triples(self) -> Set[Tuple]:
+        """Triplas inferidas atualmente visíveis no grafo."""
+        return set(self._inferred)
+
+    def is_inferred(self, triple: Tuple) -> bool:
+        """Verifica se a tripla está no grafo apenas por ter sido inferida."""
+        if self.shared:
+            declared = self.graph.get_context(self.ontology)
+            return triple in self._inferred and triple not in declared
+        return triple in self._exported
+
+    def add_listener(self, listener: ChangeListener):
+        """
+        Registra uma função chamada a cada alteração do grafo.
+
+        Args:
+            listener: Função ``listener(adicionadas, removidas)``
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, added: List[Tuple], removed: List[Tuple]):
+        """Incrementa a versão e propaga a alteração aos ouvintes."""
+        self.version += 1
+        for listener in self._listeners:
+            listener(added, removed)
+
+    def add_triples(self, triples: Iterable[Tuple]) -> List[Tuple]:
+        """
+        Adiciona triplas declaradas ao grafo.
+
+        Uma tripla já visível apenas por ter sido inferida passa a ser
+        declarada: deixa de ser removida por ``replace_inferred`` e é
+        propagada aos ouvintes como removida e adicionada (sem mudar o
+        conteúdo do grafo, mas levando a declaração ao worker do reasoner).
+
+        Args:
+            triples: Triplas (s, p, o) como termos rdflib
+
+        Returns:
+            Triplas efetivamente adicionadas (incluindo as promovidas de
+            inferidas a declaradas)
+        """
+        with self.lock:
+            added, promoted = [], []
+            for triple in dict.fromkeys(triples):
+                if triple not in self.graph:
+                    added.append(triple)
+                elif self.is_inferred(triple):
+                    promoted.append(triple)
+            if self.shared:
+                with self.ontology:
+                    for triple in added + promoted:
+                        self.graph.add(triple)
+            else:
+                for triple in added:
+                    self.graph.add(triple)
+            # Uma tripla inferida que passa a ser declarada deixa de ser removível
+            self._exported.difference_update(promoted)
+            self.stats.update([], promoted, inferred=True)
+            self.stats.update(added + promoted, [])
+            if added or promoted:
+                self.asserted_version += 1
+                self._notify(added + promoted, promoted)
+            return added + promoted
+
+    def remove_triples(self, triples: Iterable[Tuple]) -> List[Tuple]:
+        """
+        Remove triplas do grafo.
+
+        Args:
+            triples: Triplas (s, p, o) como termos rdflib
+
+        Returns:
+            Triplas efetivamente removidas
+        """
+        with self.lock:
+            removed = [t for t in dict.fromkeys(triples) if t in self.graph]
+            removed_inferred = {t for t in removed if self.is_inferred(t)}
+            self.stats.update([], [t for t in removed if t not in removed_inferred])
+            self.stats.update([], removed_inferred, inferred=True)
+            for triple in removed:
+                self.graph.remove(triple)
+            self._inferred.difference_update(removed)
+            self._exported.difference_update(removed)
+            if removed:
+                self.asserted_version += 1
+                self._notify([], removed)
+            return removed
+
+    def replace_inferred(self, triples: Iterable[Tuple]) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        Substitui o conjunto de triplas inferidas visíveis no grafo.
+
+        No modo compartilhado as triplas ficam no grafo nomeado de
+        inferências (onde o reasoner as grava) e as que deixaram de valer são
+        removidas dele. Nos demais modos as novas inferências são inseridas no
+        grafo rdflib e as que deixaram de valer são removidas (exceto as que
+        também são declaradas).
+
+        Args:
+            triples: Conjunto completo de triplas inferidas
+
+        Returns:
+            Tupla (triplas adicionadas, triplas removidas)
+        """
+        with self.lock:
+            inferred = {t for t in triples if t[0] != URIRef(INFERRED_GRAPH_IRI.rstrip("#"))}
+            stale = self._inferred - inferred
+            new = inferred - self._inferred
+            added, removed = [], []
+            if self.shared:
+                # Normalmente as novas já foram gravadas pelo reasoner no grafo
+                # nomeado (exceto as carregadas do cache de raciocínio)
+                added = list(new)
+                context = self.graph.get_context(self.inferred_ontology)
+                declared = self.graph.get_context(self.ontology)
+                with self.inferred_ontology:
+                    for triple in new:
+                        if triple not in context:
+                            context.add(triple)
+                    for triple in stale:
+                        # O owlready2 remove a tripla de todos os grafos:
+                        # manter as que também são declaradas
+                        if triple in declared:
+                            continue
+                        context.remove(triple)
+                        removed.append(triple)
+                # Triplas também declaradas já estão contadas como declaradas
+                self.stats.update([t for t in added if t not in declared],
+                                  [t for t in removed if t not in declared], inferred=True)
+            else:
+                for triple in stale:
+                    if triple in self._exported:
+                        self.graph.remove(triple)
+                        self._exported.discard(triple)
+                        removed.append(triple)
+                for triple in new:
+                    if triple not in self.graph:
+                        self.graph.add(triple)
+                        self._exported.add(triple)
+                        added.append(triple)
+                self.stats.update(added, removed, inferred=True)
+            self._inferred = inferred
+            if added or removed:
+                self._notify(added, removed)
+            return added, removed
+
+    def inference_graph(self) -> Graph:
+        """
+        Grafo com as triplas inferidas exportadas.
+
+        Returns:
+            Grafo nomeado de inferências (modo compartilhado) ou uma cópia
+            das triplas inferidas
+        """
+        if self.shared:
+            return self.graph.get_context(self.inferred_ontology)
+        graph = Graph()
+        for triple in self._inferred:
+            graph.add(triple)
+        return graph
+
+    def close(self):
+        """Libera o mundo owlready2 (e a cópia privada do quadstore), se carregado."""
+        with self.lock:
+            world, self._world = self._world, None
+            self._ontology = self._inferred_ontology = None
+        if world is not None:
+            release_owlready_world(world)
@@ -0,0 +1,205 @@
+"""
+Módulo de recarga a quente da ontologia.
+
+Alterações no ``ontologia_mora.owl`` exigiam reiniciar a API. O
+``OntologyReloader`` observa o arquivo (verificação periódica de tamanho,
+mtime e hash, sem dependências extras) e, quando ele muda:
+
+1. faz o parse da nova versão
+2. calcula a diferença de triplas em relação à versão anterior do arquivo
+   (não em relação ao grafo vivo, para preservar as alterações feitas em
+   tempo de execução por ``add_triples``/``remove_triples``)
+3. aplica apenas o delta no ``KnowledgeGraph``: a versão do grafo muda, os
+   ouvintes atualizam índices, caches, réplicas e o worker do reasoner, e a
+   realização incremental marca os indivíduos afetados; sem alterações em
+   tempo de execução pendentes, o grafo passa a corresponder à nova versão
+   do arquivo (``file_version``) e o cache do reasoner, indexado pelo hash
+   do arquivo, volta a ser usado
+4. notifica os ouvintes da recarga (ex.: agendar o raciocínio)
+
+Nós anônimos recebem novos identificadores a cada parse; as triplas com
+nós anônimos só são substituídas se o subgrafo formado por elas deixar de
+ser isomorfo ao anterior.
+"""
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from rdflib import BNode, Graph
+from rdflib.compare import isomorphic
+from rag.graph_store import file_digest
+from rag.knowledge_graph import KnowledgeGraph
+
+ReloadListener = Callable[[Dict], None]
+
+
+def _split_blank(triples) -> Tuple[Set[Tuple], Set[Tuple]]:
+    """Separa as triplas sem e com nós anônimos."""
+    plain, blank = set(), set()
+    for triple in triples:
+        if any(isinstance(term, BNode) for term in triple):
+            blank.add(triple)
+        else:
+            plain.add(triple)
+    return plain, blank
+
+
+def _as_graph(triples: Set[Tuple]) -> Graph:
+    """Grafo rdflib com as triplas dadas."""
+    graph = Graph()
+    for triple in triples:
+        graph.add(triple)
+    return graph
+
+
+class OntologyReloader:
+    """Observa o arquivo OWL e aplica as alterações no grafo vivo."""
+
+    def __init__(self, knowledge_graph: KnowledgeGraph, interval: Optional[float] = None):
+        """
+        Inicializa o observador (a verificação periódica começa com ``start``).
+
+        Args:
+            knowledge_graph: Grafo de conhecimento que recebe as alterações
+            interval: Intervalo de verificação em segundos (padrão:
+                ONTOLOGY_WATCH_INTERVAL ou 2; 0 desativa a verificação
+                periódica, restando a recarga explícita)
+        """
+        self.knowledge_graph = knowledge_graph
+        self.ontology_path = knowledge_graph.ontology_path
+        if interval is None:
+            interval = float(os.getenv("ONTOLOGY_WATCH_INTERVAL", "2"))
+        self.interval = interval
+        self._listeners: List[ReloadListener] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._stat = self._file_stat()
+        self._digest = file_digest(self.ontology_path)
+        # Triplas da versão atual do arquivo (base do próximo delta)
+        if not knowledge_graph.modified:
+            with knowledge_graph.lock:
+                base = [t for t in knowledge_graph.graph if not knowledge_graph.is_inferred(t)]
+        else:
+            base = self._parse()
+        self._plain, self._blank = _split_blank(base)
+        self.last_result: Optional[Dict] = None
+
+    def _file_stat(self) -> Optional[Tuple[int, float]]:
+        """Tamanho e mtime do arquivo (None se ele não existir)."""
+        try:
+            stat = os.stat(self.ontology_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _parse(self) -> Graph:
+        """Faz o parse da versão atual do arquivo."""
+        graph = Graph()
+        graph.parse(self.ontology_path, format="xml")
+        return graph
+
+    def add_listener(self, listener: ReloadListener):
+        """
+        Registra uma função chamada após cada recarga aplicada.
+
+        Args:
+            listener: Função ``listener(resultado)``
+        """
+        self._listeners.append(listener)
+
+    def check(self) -> Optional[Dict]:
+        """
+        Recarrega a ontologia se o conteúdo do arquivo mudou.
+
+        Returns:
+            Resultado da recarga, ou None se o arquivo não mudou
+        """
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return None
+        self._stat = stat
+        if file_digest(self.ontology_path) == self._digest:
+            return None
+        return self.reload()
+
+    def reload(self) -> Dict:
+        """
+        Aplica no grafo vivo a diferença entre a versão anterior e a atual do arquivo.
+
+        Returns:
+            Dicionário com triplas adicionadas/removidas, versão do grafo e
+            tempo gasto
+
+        Raises:
+            ValueError: Se a nova versão não puder ser lida (o grafo não muda)
+        """
+        with self._lock:
+            start = time.perf_counter()
+            digest = file_digest(self.ontology_path)
+            try:
+                plain, blank = _split_blank(self._parse())
+            except Exception as e:
+                raise ValueError(f"Não foi possível ler a nova versão da ontologia: {e}")
+
+            added = plain - self._plain
+            removed = self._plain - plain
+            blank_replaced = not isomorphic(_as_graph(self._blank), _as_graph(blank))
+            if blank_replaced:
+                added |= blank
+                removed |= self._blank
+
+            knowledge_graph = self.knowledge_graph
+            with knowledge_graph.lock:
+                clean = not knowledge_graph.modified
+                removed_live = knowledge_graph.remove_triples(removed)
+                added_live = knowledge_graph.add_triples(added)
+                if clean:
+                    # Sem alterações em tempo de execução o grafo volta a
+                    # corresponder ao arquivo (o cache do reasoner vale de novo)
+                    knowledge_graph.file_version = knowledge_graph.asserted_version
+
+            self._plain = plain
+            if blank_replaced:
+                self._blank = blank
+            self._digest = digest
+            self._stat = self._file_stat()
+            result = {
+                'digest': digest,
+                'added': len(added_live),
+                'removed': len(removed_live),
+                'blank_nodes_replaced': blank_replaced,
+                'graph_version': knowledge_graph.version,
+                'seconds': round(time.perf_counter() - start, 3)
+            }
+            self.last_result = result
+
+        if added_live or removed_live:
+            print(f"Ontologia recarregada: +{result['added']} / -{result['removed']} triplas")
+            for listener in self._listeners:
+                try:
+                    listener(result)
+                except Exception as e:
+                    print(f"⚠️  Aviso: ouvinte da recarga da ontologia falhou: {e}")
+        return result
+
+    def start(self):
+        """Inicia a verificação periódica do arquivo em uma thread de fundo."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch, name="ontology-watcher", daemon=True)
+        self._thread.start()
+
+    def _watch(self):
+        """Laço da thread: verifica o arquivo a cada intervalo."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Ex.: arquivo salvo pela metade; a próxima gravação muda o mtime de novo
+                print(f"⚠️  Aviso: recarga da ontologia falhou: {e}")
+
+    def stop(self):
+        """Encerra a verificação periódica."""
+        self._stop.set()
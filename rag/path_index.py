@@ -0,0 +1,127 @@
+"""
+Módulo com índice materializado de caminhos curso → módulo → aula → recurso.
+"""
+from typing import Dict, Iterable, List, Set, Tuple
+from rdflib import Graph, URIRef
+
+
+class CoursePathIndex:
+    """
+    Índice materializado dos recursos de cada curso.
+
+    Para cada curso guarda as tuplas (módulo, aula, recurso) alcançáveis por
+    ``possuiModulo / possuiAula / utilizaRecurso``, evitando a junção de três
+    padrões a cada consulta. Alterações nessas propriedades recalculam
+    apenas os cursos afetados.
+    """
+
+    def __init__(self, has_module: URIRef, has_lesson: URIRef, uses_resource: URIRef):
+        """
+        Inicializa um índice vazio.
+
+        Args:
+            has_module: IRI de possuiModulo
+            has_lesson: IRI de possuiAula
+            uses_resource: IRI de utilizaRecurso
+        """
+        self.has_module = has_module
+        self.has_lesson = has_lesson
+        self.uses_resource = uses_resource
+        # Adjacência por propriedade (sujeito -> objetos) e inversa
+        self._edges: Dict[URIRef, Dict[str, Set[str]]] = {
+            has_module: {}, has_lesson: {}, uses_resource: {}
+        }
+        self._reverse: Dict[URIRef, Dict[str, Set[str]]] = {
+            has_module: {}, has_lesson: {}, uses_resource: {}
+        }
+        self._paths: Dict[str, List[Tuple[str, str, str]]] = {}
+
+    @classmethod
+    def from_graph(cls, graph: Graph, has_module: URIRef, has_lesson: URIRef,
+                   uses_resource: URIRef) -> "CoursePathIndex":
+        """
+        Constrói o índice a partir das triplas do grafo.
+
+        Args:
+            graph: Grafo rdflib
+            has_module: IRI de possuiModulo
+            has_lesson: IRI de possuiAula
+            uses_resource: IRI de utilizaRecurso
+
+        Returns:
+            Índice com os caminhos de todos os cursos
+        """
+        index = cls(has_module, has_lesson, uses_resource)
+        for predicate in (has_module, has_lesson, uses_resource):
+            for s, _, o in graph.triples((None, predicate, None)):
+                index._link(predicate, str(s), str(o))
+        for course in list(index._edges[has_module]):
+            index._rebuild_course(course)
+        return index
+
+    def _link(self, predicate: URIRef, subject: str, obj: str):
+        """Registra uma aresta nas adjacências direta e inversa."""
+        self._edges[predicate].setdefault(subject, set()).add(obj)
+        self._reverse[predicate].setdefault(obj, set()).add(subject)
+
+    def _unlink(self, predicate: URIRef, subject: str, obj: str):
+        """Remove uma aresta das adjacências direta e inversa."""
+        self._edges[predicate].get(subject, set()).discard(obj)
+        self._reverse[predicate].get(obj, set()).discard(subject)
+
+    def _rebuild_course(self, course: str):
+        """Recalcula os caminhos materializados de um curso."""
+        paths = []
+        for module in sorted(self._edges[self.has_module].get(course, ())):
+            for lesson in sorted(self._edges[self.has_lesson].get(module, ())):
+                for resource in sorted(self._edges[self.uses_resource].get(lesson, ())):
+                    paths.append((module, lesson, resource))
+        if paths:
+            self._paths[course] = paths
+        else:
+            self._paths.pop(course, None)
+
+    def _courses_affected_by(self, predicate: URIRef, subject: str) -> Set[str]:
+        """Encontra os cursos cujos caminhos passam pelo sujeito da aresta."""
+        if predicate == self.has_module:
+            return {subject}
+        modules = {subject}
+        if predicate == self.uses_resource:
+            modules = set(self._reverse[self.has_lesson].get(subject, ()))
+        courses = set()
+        for module in modules:
+            courses.update(self._reverse[self.has_module].get(module, ()))
+        return courses
+
+    def update(self, added: Iterable[Tuple], removed: Iterable[Tuple]):
+        """
+        Aplica alterações de triplas do grafo ao índice.
+
+        Args:
+            added: Triplas adicionadas
+            removed: Triplas removidas
+        """
+        affected = set()
+        for triples, apply in ((removed, self._unlink), (added, self._link)):
+            for s, p, o in triples:
+                if p in self._edges:
+                    apply(p, str(s), str(o))
+                    affected.update(self._courses_affected_by(p, str(s)))
+        for course in affected:
+            self._rebuild_course(course)
+
+    def paths(self, course: str) -> List[Tuple[str, str, str]]:
+        """
+        Obtém os caminhos materializados de um curso.
+
+        Args:
+            course: IRI do curso
+
+        Returns:
+            Lista de tuplas (módulo, aula, recurso)
+        """
+        return self._paths.get(course, [])
+
+    def items(self) -> Iterable[Tuple[str, List[Tuple[str, str, str]]]]:
+        """Itera (curso, caminhos) para todos os cursos indexados."""
+        return self._paths.items()
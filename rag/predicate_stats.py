@@ -0,0 +1,133 @@
+"""
+Módulo com estatísticas de cardinalidade por predicado.
+"""
+from collections import Counter
+from itertools import islice
+from typing import Iterable, Optional, Tuple
+from rdflib import Graph
+
+
+class PredicateStatistics:
+    """
+    Estatísticas de cardinalidade do grafo usadas para estimar custo de consultas.
+
+    Para cada predicado guarda o número de triplas e o número de sujeitos e
+    objetos distintos, permitindo estimar quantas linhas um padrão de tripla
+    produz quando o sujeito ou o objeto já está ligado.
+    """
+
+    def __init__(self, graph: Graph):
+        """
+        Inicializa as estatísticas vazias.
+
+        Args:
+            graph: Grafo rdflib observado
+        """
+        self.graph = graph
+        self.total = 0
+        self.counts: Counter = Counter()
+        self.subjects: Counter = Counter()
+        self.objects: Counter = Counter()
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "PredicateStatistics":
+        """
+        Calcula as estatísticas com uma passada sobre o grafo.
+
+        Args:
+            graph: Grafo rdflib
+
+        Returns:
+            Estatísticas preenchidas
+        """
+        stats = cls(graph)
+        subjects, objects = set(), set()
+        for s, p, o in graph:
+            stats.counts[p] += 1
+            subjects.add((p, s))
+            objects.add((p, o))
+        stats.total = sum(stats.counts.values())
+        stats.subjects.update(p for p, _ in subjects)
+        stats.objects.update(p for p, _ in objects)
+        return stats
+
+    def _count_matches(self, pattern: Tuple, at_most: int) -> int:
+        """Conta as triplas do grafo para o padrão, parando em ``at_most``."""
+        return sum(1 for _ in islice(self.graph.triples(pattern), at_most))
+
+    def update(self, added: Iterable[Tuple], removed: Iterable[Tuple]):
+        """
+        Aplica alterações de triplas (chamado após a alteração do grafo).
+
+        Args:
+            added: Triplas adicionadas
+            removed: Triplas removidas
+        """
+        added, removed = list(added), list(removed)
+        # Triplas removidas e readicionadas na mesma alteração não mudam o grafo
+        unchanged = set(added) & set(removed)
+        if unchanged:
+            added = [t for t in added if t not in unchanged]
+            removed = [t for t in removed if t not in unchanged]
+        for s, p, o in removed:
+            self.counts[p] -= 1
+            self.total -= 1
+        for s, p, o in added:
+            self.counts[p] += 1
+            self.total += 1
+
+        # Sujeitos/objetos distintos: um par (p, s) some quando não resta
+        # nenhuma tripla com ele e surge quando todas as que existem são novas
+        for (p, s) in {(p, s) for s, p, _ in removed}:
+            if self._count_matches((s, p, None), 1) == 0:
+                self.subjects[p] -= 1
+        for (p, o) in {(p, o) for _, p, o in removed}:
+            if self._count_matches((None, p, o), 1) == 0:
+                self.objects[p] -= 1
+        new_subjects = Counter((p, s) for s, p, _ in added)
+        for (p, s), n in new_subjects.items():
+            if self._count_matches((s, p, None), n + 1) == n:
+                self.subjects[p] += 1
+        new_objects = Counter((p, o) for _, p, o in added)
+        for (p, o), n in new_objects.items():
+            if self._count_matches((None, p, o), n + 1) == n:
+                self.objects[p] += 1
+
+        for p in {p for _, p, _ in removed}:
+            if self.counts[p] <= 0:
+                del self.counts[p]
+                self.subjects.pop(p, None)
+                self.objects.pop(p, None)
+
+    def cardinality(self, predicate) -> int:
+        """Número de triplas com o predicado."""
+        return self.counts.get(predicate, 0)
+
+    def estimate(self, predicate: Optional[object], subject_bound: bool = False,
+                 object_bound: bool = False) -> float:
+        """
+        Estima o número de linhas de um padrão de tripla.
+
+        Args:
+            predicate: IRI do predicado, ou None se for variável
+            subject_bound: Se o sujeito é constante (ou já ligado)
+            object_bound: Se o objeto é constante (ou já ligado)
+
+        Returns:
+            Número estimado de linhas
+        """
+        if predicate is None:
+            rows = float(self.total)
+            if subject_bound or object_bound:
+                rows = rows / max(len(self.counts), 1)
+            return rows
+        rows = float(self.cardinality(predicate))
+        if rows == 0:
+            return 0.0
+        if subject_bound and object_bound:
+            return 1.0
+        if subject_bound:
+            return rows / max(self.subjects.get(predicate, 1), 1)
+        if object_bound:
+            return rows / max(self.objects.get(predicate, 1), 1)
+        return rows
@@ -0,0 +1,205 @@
+"""
+Módulo com índice de fecho transitivo de pré-requisitos de cursos.
+"""
+from typing import Dict, Iterable, List, Set, Tuple
+from rdflib import Graph, URIRef
+
+
+def _iter_bits(bits: int) -> Iterable[int]:
+    """Itera os índices dos bits ligados de um bitset."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class PrerequisiteIndex:
+    """
+    Índice de alcançabilidade sobre ``possuiPreRequisito``.
+
+    Mantém a lista de adjacência direta (nos dois sentidos) e, para cada
+    curso, dois bitsets de alcançabilidade: todos os pré-requisitos (diretos
+    ou indiretos) e todos os cursos que ele desbloqueia. As consultas são
+    proporcionais ao tamanho da resposta e ``requires`` é O(1). Arestas
+    adicionadas ou removidas atualizam apenas os cursos afetados.
+    """
+
+    def __init__(self, predicate: URIRef):
+        """
+        Inicializa um índice vazio.
+
+        Args:
+            predicate: IRI da propriedade de pré-requisito
+        """
+        self.predicate = predicate
+        self._ids: Dict[str, int] = {}
+        self._iris: List[str] = []
+        self._direct: List[Set[int]] = []    # curso -> pré-requisitos diretos
+        self._reverse: List[Set[int]] = []   # pré-requisito -> cursos que o exigem
+        self._prereq_bits: List[int] = []    # curso -> fecho de pré-requisitos
+        self._unlock_bits: List[int] = []    # curso -> fecho de cursos desbloqueados
+
+    @classmethod
+    def from_graph(cls, graph: Graph, predicate: URIRef) -> "PrerequisiteIndex":
+        """
+        Constrói o índice a partir das triplas do grafo.
+
+        Args:
+            graph: Grafo rdflib
+            predicate: IRI da propriedade de pré-requisito
+
+        Returns:
+            Índice com o fecho transitivo calculado
+        """
+        index = cls(predicate)
+        for course, _, prereq in graph.triples((None, predicate, None)):
+            a, b = index._node(str(course)), index._node(str(prereq))
+            index._direct[a].add(b)
+            index._reverse[b].add(a)
+        index._rebuild_closure(range(len(index._iris)))
+        return index
+
+    def _node(self, iri: str) -> int:
+        """Retorna o identificador inteiro de um curso, criando-o se necessário."""
+        node = self._ids.get(iri)
+        if node is None:
+            node = len(self._iris)
+            self._ids[iri] = node
+            self._iris.append(iri)
+            self._direct.append(set())
+            self._reverse.append(set())
+            self._prereq_bits.append(0)
+            self._unlock_bits.append(0)
+        return node
+
+    def _reach(self, start: int, adjacency: List[Set[int]]) -> int:
+        """Calcula o bitset de nós alcançáveis a partir de ``start``."""
+        bits = 0
+        stack = list(adjacency[start])
+        while stack:
+            node = stack.pop()
+            if bits >> node & 1:
+                continue
+            bits |= 1 << node
+            stack.extend(adjacency[node])
+        return bits
+
+    def _rebuild_closure(self, nodes: Iterable[int]):
+        """Recalcula os bitsets dos nós informados."""
+        for node in nodes:
+            self._prereq_bits[node] = self._reach(node, self._direct)
+            self._unlock_bits[node] = self._reach(node, self._reverse)
+
+    def add_edge(self, course: str, prereq: str):
+        """
+        Registra que ``course`` possui ``prereq`` como pré-requisito direto.
+
+        Args:
+            course: IRI do curso
+            prereq: IRI do pré-requisito
+        """
+        a, b = self._node(course), self._node(prereq)
+        if b in self._direct[a]:
+            return
+        self._direct[a].add(b)
+        self._reverse[b].add(a)
+
+        # Quem exige ``a`` passa a exigir ``b`` e tudo que ``b`` exige
+        gained_prereqs = self._prereq_bits[b] | (1 << b)
+        for node in _iter_bits(self._unlock_bits[a] | (1 << a)):
+            self._prereq_bits[node] |= gained_prereqs
+
+        # ``b`` e seus pré-requisitos passam a desbloquear ``a`` e tudo que ``a`` desbloqueia
+        gained_unlocks = self._unlock_bits[a] | (1 << a)
+        for node in _iter_bits(self._prereq_bits[b] | (1 << b)):
+            self._unlock_bits[node] |= gained_unlocks
+
+    def remove_edge(self, course: str, prereq: str):
+        """
+        Remove um pré-requisito direto e recalcula os cursos afetados.
+
+        Args:
+            course: IRI do curso
+            prereq: IRI do pré-requisito
+        """
+        a, b = self._ids.get(course), self._ids.get(prereq)
+        if a is None or b is None or b not in self._direct[a]:
+            return
+        affected = self._unlock_bits[a] | (1 << a) | self._prereq_bits[b] | (1 << b)
+        self._direct[a].discard(b)
+        self._reverse[b].discard(a)
+        self._rebuild_closure(_iter_bits(affected))
+
+    def update(self, added: Iterable[Tuple], removed: Iterable[Tuple]):
+        """
+        Aplica alterações de triplas do grafo ao índice.
+
+        Args:
+            added: Triplas adicionadas
+            removed: Triplas removidas
+        """
+        for s, p, o in removed:
+            if p == self.predicate:
+                self.remove_edge(str(s), str(o))
+        for s, p, o in added:
+            if p == self.predicate:
+                self.add_edge(str(s), str(o))
+
+    def prerequisites(self, course: str, transitive: bool = True) -> List[str]:
+        """
+        Lista os pré-requisitos de um curso.
+
+        Args:
+            course: IRI do curso
+            transitive: Se deve incluir pré-requisitos indiretos
+
+        Returns:
+            IRIs dos pré-requisitos
+        """
+        node = self._ids.get(course)
+        if node is None:
+            return []
+        if not transitive:
+            return [self._iris[n] for n in self._direct[node]]
+        return [self._iris[n] for n in _iter_bits(self._prereq_bits[node])]
+
+    def unlocks(self, course: str, transitive: bool = True) -> List[str]:
+        """
+        Lista os cursos desbloqueados por um curso.
+
+        Args:
+            course: IRI do curso
+            transitive: Se deve incluir cursos desbloqueados indiretamente
+
+        Returns:
+            IRIs dos cursos que exigem este curso
+        """
+        node = self._ids.get(course)
+        if node is None:
+            return []
+        if not transitive:
+            return [self._iris[n] for n in self._reverse[node]]
+        return [self._iris[n] for n in _iter_bits(self._unlock_bits[node])]
+
+    def requires(self, course: str, prereq: str) -> bool:
+        """Verifica em O(1) se ``prereq`` é pré-requisito (direto ou indireto) de ``course``."""
+        a, b = self._ids.get(course), self._ids.get(prereq)
+        if a is None or b is None:
+            return False
+        return bool(self._prereq_bits[a] >> b & 1)
+
+    def is_direct(self, course: str, prereq: str) -> bool:
+        """Verifica se ``prereq`` é pré-requisito direto de ``course``."""
+        a, b = self._ids.get(course), self._ids.get(prereq)
+        return a is not None and b is not None and b in self._direct[a]
+
+    def pairs(self) -> Iterable[Tuple[str, str, bool]]:
+        """
+        Itera todos os pares (curso, pré-requisito) do fecho transitivo.
+
+        Yields:
+            Tuplas (curso, pré-requisito, direto)
+        """
+        for node, bits in enumerate(self._prereq_bits):
+            for other in _iter_bits(bits):
+                yield self._iris[node], self._iris[other], other in self._direct[node]
@@ -0,0 +1,240 @@
+"""
+Módulo de proteção para consultas SPARQL ad-hoc.
+
+Antes de executar uma consulta enviada pelo usuário, o guard:
+
+- injeta ``LIMIT``/``OFFSET`` quando a consulta não define um limite
+- estima o custo estaticamente a partir da álgebra SPARQL e das
+  estatísticas de cardinalidade dos predicados
+- rejeita padrões obviamente ilimitados (produtos cartesianos ou caminhos
+  transitivos entre variáveis livres sobre grafos grandes)
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+from rdflib import Variable
+from rdflib.paths import Path, MulPath, ZeroOrMore, OneOrMore
+from rdflib.plugins.sparql.parser import parseQuery
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rag.predicate_stats import PredicateStatistics
+
+
+# O parser SPARQL do rdflib (pyparsing) não é thread-safe: parses
+# simultâneos corrompem o estado das ações de parse
+PARSE_LOCK = threading.Lock()
+
+
+def parse_query(sparql_query: str):
+    """
+    Faz o parse de uma consulta SPARQL, serializado entre threads.
+
+    Args:
+        sparql_query: Consulta SPARQL
+
+    Returns:
+        Árvore de parse do rdflib
+    """
+    with PARSE_LOCK:
+        return parseQuery(sparql_query)
+
+
+class QueryRejected(ValueError):
+    """Consulta rejeitada pela estimativa de custo."""
+
+
+@dataclass
+class QueryCost:
+    """Estimativa estática de custo de uma consulta."""
+    estimated_rows: float
+    cartesian: bool = False
+    has_limit: bool = False
+    query_type: str = "SelectQuery"
+    warnings: List[str] = field(default_factory=list)
+
+
+def _is_var(term) -> bool:
+    return isinstance(term, Variable)
+
+
+def pattern_vars(triple: Tuple) -> Set[Variable]:
+    """Variáveis de um padrão de tripla."""
+    return {term for term in triple if _is_var(term)}
+
+
+def connected_components(triples: List[Tuple]) -> List[List[Tuple]]:
+    """
+    Agrupa padrões de tripla em componentes conectados por variáveis.
+
+    Mais de um componente no mesmo BGP significa produto cartesiano.
+    """
+    components: List[Tuple[Set[Variable], List[Tuple]]] = []
+    for triple in triples:
+        variables = pattern_vars(triple)
+        merged_vars, merged_triples = set(variables), [triple]
+        remaining = []
+        for comp_vars, comp_triples in components:
+            if comp_vars & variables:
+                merged_vars |= comp_vars
+                merged_triples = comp_triples + merged_triples
+            else:
+                remaining.append((comp_vars, comp_triples))
+        components = remaining + [(merged_vars, merged_triples)]
+    return [comp_triples for _, comp_triples in components]
+
+
+class QueryGuard:
+    """Aplica limites e estimativa de custo a consultas SPARQL ad-hoc."""
+
+    def __init__(self, stats: PredicateStatistics, default_limit: int = 1000,
+                 max_cost: float = 1e7):
+        """
+        Inicializa o guard.
+
+        Args:
+            stats: Estatísticas de cardinalidade do grafo
+            default_limit: LIMIT injetado quando a consulta não define um
+            max_cost: Número máximo estimado de linhas intermediárias
+        """
+        self.stats = stats
+        self.default_limit = default_limit
+        self.max_cost = max_cost
+
+    def pattern_estimate(self, triple: Tuple, bound: Set[Variable] = frozenset()) -> float:
+        """
+        Estima as linhas de um padrão de tripla.
+
+        Args:
+            triple: Padrão (s, p, o)
+            bound: Variáveis já ligadas por padrões anteriores
+
+        Returns:
+            Número estimado de linhas
+        """
+        s, p, o = triple
+        subject_bound = not _is_var(s) or s in bound
+        object_bound = not _is_var(o) or o in bound
+        if isinstance(p, Path):
+            # Caminhos transitivos entre variáveis livres podem gerar todos os pares
+            if isinstance(p, MulPath) and p.mod in (ZeroOrMore, OneOrMore):
+                if not subject_bound and not object_bound:
+                    return float(self.stats.total) ** 2
+                return float(self.stats.total)
+            return self.stats.estimate(None, subject_bound, object_bound)
+        predicate = None if _is_var(p) else p
+        return self.stats.estimate(predicate, subject_bound, object_bound)
+
+    def _estimate_bgp(self, triples: List[Tuple], cost: QueryCost) -> Tuple[float, Set[Variable]]:
+        """Estima um BGP: junção dentro de cada componente, produto entre componentes."""
+        components = connected_components(triples)
+        if len(components) > 1:
+            cost.cartesian = True
+            cost.warnings.append(
+                f"Produto cartesiano entre {len(components)} grupos de padrões sem variáveis em comum"
+            )
+        rows = 1.0
+        variables: Set[Variable] = set()
+        for component in components:
+            # Junção conectada: limitada pelo padrão mais seletivo
+            rows *= min(self.pattern_estimate(t) for t in component)
+            for triple in component:
+                variables |= pattern_vars(triple)
+        return (rows if triples else 1.0), variables
+
+    def _estimate(self, node, cost: QueryCost) -> Tuple[float, Set[Variable]]:
+        """Estima recursivamente as linhas de um nó da álgebra."""
+        if not isinstance(node, CompValue):
+            return 1.0, set()
+
+        name = node.name
+        if name == "BGP":
+            return self._estimate_bgp(node.triples, cost)
+        if name in ("Join", "LeftJoin", "Minus", "Union"):
+            rows1, vars1 = self._estimate(node.p1, cost)
+            rows2, vars2 = self._estimate(node.p2, cost)
+            if name == "Union":
+                return rows1 + rows2, vars1 | vars2
+            if name == "Minus":
+                return rows1, vars1
+            if vars1 & vars2 or not vars1 or not vars2:
+                joined = max(rows1, rows2) if name == "Join" else rows1
+            else:
+                cost.cartesian = True
+                cost.warnings.append("Produto cartesiano entre padrões de grupo sem variáveis em comum")
+                joined = rows1 * rows2
+            return joined, vars1 | vars2
+        if name == "Slice":
+            cost.has_limit = True
+
+        inner = node.get("p")
+        if inner is not None:
+            return self._estimate(inner, cost)
+        return 1.0, set()
+
+    def estimate(self, sparql_query: str) -> QueryCost:
+        """
+        Estima o custo de uma consulta sem executá-la.
+
+        Args:
+            sparql_query: Consulta SPARQL
+
+        Returns:
+            Estimativa de custo
+        """
+        algebra = translateQuery(parse_query(sparql_query)).algebra
+        cost = QueryCost(estimated_rows=0.0, query_type=algebra.name)
+        cost.estimated_rows, _ = self._estimate(algebra.get("p"), cost)
+        return cost
+
+    def check(self, sparql_query: str) -> QueryCost:
+        """
+        Estima o custo e rejeita consultas obviamente ilimitadas.
+
+        Args:
+            sparql_query: Consulta SPARQL
+
+        Returns:
+            Estimativa de custo
+
+        Raises:
+            QueryRejected: Se o custo estimado exceder ``max_cost``
+        """
+        cost = self.estimate(sparql_query)
+        if cost.estimated_rows > self.max_cost:
+            reason = "; ".join(cost.warnings) or "padrões pouco seletivos"
+            raise QueryRejected(
+                f"Consulta rejeitada: custo estimado de {cost.estimated_rows:.0f} linhas "
+                f"excede o máximo de {self.max_cost:.0f} ({reason})"
+            )
+        return cost
+
+    def prepare(self, sparql_query: str, limit: Optional[int] = None,
+                offset: int = 0) -> Tuple[str, bool]:
+        """
+        Verifica a consulta e injeta LIMIT/OFFSET se ela não definir um limite.
+
+        Args:
+            sparql_query: Consulta SPARQL
+            limit: Limite a injetar (padrão: ``default_limit``)
+            offset: Offset a injetar junto com o limite
+
+        Returns:
+            Tupla (consulta preparada, se LIMIT/OFFSET foram injetados)
+
+        Raises:
+            QueryRejected: Se o custo estimado exceder ``max_cost``
+        """
+        cost = self.check(sparql_query)
+        if cost.has_limit or cost.query_type != "SelectQuery":
+            return sparql_query, False
+
+        limit = limit if limit is not None else self.default_limit
+        prepared = f"{sparql_query.rstrip()}\nLIMIT {int(limit)}"
+        if offset:
+            prepared += f" OFFSET {int(offset)}"
+        try:
+            # Cláusulas finais como VALUES impedem anexar o LIMIT ao final
+            parse_query(prepared)
+        except Exception:
+            return sparql_query, False
+        return prepared, True
@@ -0,0 +1,285 @@
+"""
+Módulo de otimização algébrica de consultas SPARQL.
+
+O avaliador do rdflib executa a álgebra como ela chega: junções de padrões
+em laço aninhado na ordem do BGP e filtros aplicados só depois de produzir
+todas as linhas. Antes da avaliação, o otimizador reescreve a álgebra:
+
+- filtros de igualdade com IRI (``FILTER(?x = <iri>)``) viram padrões com o
+  termo ligado, e a variável é religada com ``BIND`` acima do padrão
+- padrões de cada BGP são reordenados pela seletividade estimada a partir
+  das estatísticas de cardinalidade dos predicados, preferindo padrões
+  conectados aos já avaliados
+- produtos cartesianos (grupos de padrões sem variáveis em comum) geram
+  avisos
+"""
+from functools import reduce
+from typing import Dict, List, Set, Tuple
+from pyparsing import ParseResults
+from rdflib import URIRef, Variable
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import Query
+from rag.predicate_stats import PredicateStatistics
+from rag.query_guard import QueryGuard, connected_components, parse_query, pattern_vars
+
+
+# Nós pelos quais a substituição de uma variável por IRI é segura
+_SUBSTITUTABLE = ("BGP", "Join", "LeftJoin", "Filter", "Extend", "Union")
+
+_INTERNAL_KEYS = ("_vars", "p", "p1", "p2")
+
+
+def _split_and(expr) -> List:
+    """Separa uma expressão em conjunções (``a && b && c``)."""
+    if isinstance(expr, CompValue) and expr.name == "ConditionalAndExpression":
+        return [expr.expr] + list(expr.other or [])
+    return [expr]
+
+
+def _join_and(conjuncts: List):
+    """Reconstrói uma conjunção a partir das partes."""
+    if len(conjuncts) == 1:
+        return conjuncts[0]
+    return CompValue("ConditionalAndExpression", expr=conjuncts[0], other=conjuncts[1:])
+
+
+def _iri_equality(expr):
+    """Retorna ``(variável, IRI)`` se a expressão for ``?x = <iri>``."""
+    if not isinstance(expr, CompValue) or expr.name != "RelationalExpression":
+        return None
+    if expr.op != "=":
+        return None
+    left, right = expr.expr, expr.other
+    if isinstance(left, Variable) and isinstance(right, URIRef):
+        return left, right
+    if isinstance(right, Variable) and isinstance(left, URIRef):
+        return right, left
+    return None
+
+
+def _certain_vars(node) -> Set[Variable]:
+    """Variáveis com certeza ligadas em todas as linhas de um nó."""
+    if not isinstance(node, CompValue):
+        return set()
+    if node.name == "BGP":
+        return {v for triple in node.triples for v in pattern_vars(triple)}
+    if node.name == "Join":
+        return _certain_vars(node.p1) | _certain_vars(node.p2)
+    if node.name in ("LeftJoin", "Minus"):
+        return _certain_vars(node.p1)
+    if node.name in ("Filter", "Extend"):
+        return _certain_vars(node.p)
+    if node.name == "Union":
+        return _certain_vars(node.p1) & _certain_vars(node.p2)
+    return set()
+
+
+def _contains(value, var: Variable) -> bool:
+    """Verifica se a variável aparece em qualquer parte de um valor da álgebra."""
+    if value == var:
+        return True
+    if isinstance(value, CompValue):
+        return any(_contains(v, var) for k, v in value.items() if k != "_vars")
+    if isinstance(value, (list, tuple, set)):
+        return any(_contains(v, var) for v in value)
+    return False
+
+
+def _used_outside_patterns(node, var: Variable) -> bool:
+    """
+    Verifica se a variável é usada fora dos padrões de tripla do nó.
+
+    A substituição só é segura se a variável aparecer apenas em BGPs
+    alcançáveis por nós de ``_SUBSTITUTABLE``.
+    """
+    if not isinstance(node, CompValue):
+        return False
+    if node.name not in _SUBSTITUTABLE:
+        return _contains(node, var)
+    if node.name == "BGP":
+        return False
+    for key, value in node.items():
+        if key in _INTERNAL_KEYS:
+            continue
+        if _contains(value, var):
+            return True
+    return any(_used_outside_patterns(node.get(key), var) for key in ("p", "p1", "p2"))
+
+
+def _substitute(node, bindings: Dict[Variable, URIRef]):
+    """Substitui variáveis por IRIs nos padrões de tripla do nó."""
+    if not isinstance(node, CompValue):
+        return node
+    if node.name == "BGP":
+        node["triples"] = [
+            tuple(bindings.get(term, term) for term in triple) for triple in node.triples
+        ]
+        return node
+    for key in ("p", "p1", "p2"):
+        if key in node:
+            node[key] = _substitute(node[key], bindings)
+    return node
+
+
+def _annotate_vars(node) -> Set[Variable]:
+    """
+    Recalcula o atributo ``_vars`` dos nós da álgebra (de baixo para cima).
+
+    Mesma regra usada pelo rdflib ao traduzir a consulta (``_addVars``,
+    privada em ``rdflib.plugins.sparql.algebra``), reproduzida aqui para não
+    depender de helpers internos que mudam entre versões: expressões
+    relacionais não ligam variáveis, variáveis usadas só na expressão de um
+    ``BIND`` ficam de fora e um ``SubSelect`` expõe apenas a projeção.
+
+    Args:
+        node: Nó da álgebra (ou valor dentro dele)
+
+    Returns:
+        Variáveis que podem ser ligadas pelo nó
+    """
+    if isinstance(node, Variable):
+        return {node}
+    if isinstance(node, (list, tuple, ParseResults)):
+        return reduce(set.union, (_annotate_vars(child) for child in node), set())
+    if not isinstance(node, CompValue):
+        return set()
+
+    children = {key: _annotate_vars(value) for key, value in list(node.items())
+                if value is not None}
+    if node.name == "RelationalExpression":
+        node["_vars"] = set()
+    elif node.name == "Extend":
+        node["_vars"] = reduce(set.union, (child for key, child in children.items()
+                                           if key != "expr"), set())
+    else:
+        node["_vars"] = reduce(set.union, children.values(), set())
+        if node.name == "SubSelect":
+            return {v.var or v.evar for v in node.projection or []}
+    return node["_vars"]
+
+
+class QueryOptimizer:
+    """Reescreve a álgebra de consultas SPARQL antes da avaliação."""
+
+    def __init__(self, stats: PredicateStatistics):
+        """
+        Inicializa o otimizador.
+
+        Args:
+            stats: Estatísticas de cardinalidade do grafo
+        """
+        self.stats = stats
+        self.guard = QueryGuard(stats)
+
+    def optimize(self, sparql_query: str) -> Tuple[Query, List[str]]:
+        """
+        Faz o parse da consulta e otimiza a álgebra.
+
+        Args:
+            sparql_query: Consulta SPARQL
+
+        Returns:
+            Tupla (consulta preparada para ``Graph.query``, avisos)
+        """
+        query = translateQuery(parse_query(sparql_query))
+        warnings: List[str] = []
+        self._rewrite(query.algebra, warnings)
+        # Recalcular as variáveis de cada nó após a reescrita
+        _annotate_vars(query.algebra)
+        return query, warnings
+
+    def _rewrite(self, node, warnings: List[str]):
+        """Reescreve recursivamente um nó da álgebra (de baixo para cima)."""
+        if not isinstance(node, CompValue):
+            return node
+        for key in ("p", "p1", "p2"):
+            if isinstance(node.get(key), CompValue):
+                node[key] = self._rewrite(node[key], warnings)
+
+        if node.name == "Filter":
+            return self._push_filter(node)
+        if node.name == "BGP":
+            node["triples"] = self.order_triples(node.triples, warnings)
+        elif node.name == "Join":
+            vars1, vars2 = _certain_vars(node.p1), _certain_vars(node.p2)
+            if vars1 and vars2 and not vars1 & vars2:
+                warnings.append(
+                    "Produto cartesiano entre padrões de grupo sem variáveis em comum: "
+                    f"{self._format_vars(vars1)} x {self._format_vars(vars2)}"
+                )
+        return node
+
+    def _push_filter(self, node: CompValue):
+        """Transforma igualdades ``?x = <iri>`` do filtro em padrões ligados."""
+        bound = _certain_vars(node.p)
+        bindings: Dict[Variable, URIRef] = {}
+        kept = []
+        for conjunct in _split_and(node.expr):
+            equality = _iri_equality(conjunct)
+            if (equality and equality[0] in bound and equality[0] not in bindings
+                    and not _used_outside_patterns(node.p, equality[0])):
+                bindings[equality[0]] = equality[1]
+            else:
+                kept.append(conjunct)
+        if not bindings:
+            return node
+
+        # Reordenar os BGPs já com os IRIs ligados
+        pattern = self._reorder(_substitute(node.p, bindings))
+        for var, iri in bindings.items():
+            pattern = CompValue("Extend", p=pattern, expr=iri, var=var)
+        if kept:
+            return CompValue("Filter", expr=_join_and(kept), p=pattern)
+        return pattern
+
+    def _reorder(self, node):
+        """Reordena os BGPs de uma subárvore (sem gerar avisos)."""
+        if not isinstance(node, CompValue):
+            return node
+        if node.name == "BGP":
+            node["triples"] = self.order_triples(node.triples, [])
+        for key in ("p", "p1", "p2"):
+            if key in node:
+                self._reorder(node[key])
+        return node
+
+    def order_triples(self, triples: List[Tuple], warnings: List[str]) -> List[Tuple]:
+        """
+        Ordena padrões de tripla pela seletividade estimada.
+
+        A cada passo escolhe, entre os padrões conectados às variáveis já
+        ligadas, o de menor número estimado de linhas. Empates mantêm a ordem
+        original.
+
+        Args:
+            triples: Padrões do BGP
+            warnings: Lista que recebe avisos de produto cartesiano
+
+        Returns:
+            Padrões reordenados
+        """
+        components = connected_components(triples)
+        if len(components) > 1:
+            groups = " x ".join(
+                self._format_vars({v for t in comp for v in pattern_vars(t)}) for comp in components
+            )
+            warnings.append(f"Produto cartesiano entre grupos de padrões: {groups}")
+
+        remaining = list(triples)
+        ordered: List[Tuple] = []
+        bound: Set[Variable] = set()
+        while remaining:
+            connected = [t for t in remaining if pattern_vars(t) & bound]
+            candidates = connected or remaining
+            best = min(candidates, key=lambda t: self.guard.pattern_estimate(t, bound))
+            ordered.append(best)
+            remaining.remove(best)
+            bound |= pattern_vars(best)
+        return ordered
+
+    @staticmethod
+    def _format_vars(variables: Set[Variable]) -> str:
+        """Formata um conjunto de variáveis para mensagens."""
+        names = sorted(f"?{v}" for v in variables)
+        return "{" + ", ".join(names) + "}" if names else "{}"
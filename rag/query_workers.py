@@ -0,0 +1,405 @@
+"""
+Módulo com pools de processos para consultas SPARQL.
+
+Cada worker mantém o grafo carregado (a partir do store configurado em
+GRAPH_STORE, ex.: o snapshot binário) e avalia consultas em um processo
+separado, fora do GIL do processo da API. O mesmo pool atende dois usos:
+
+- consultas ad-hoc com prazo: consultas que excedem o prazo têm o worker
+  morto e substituído, sem travar o tráfego interativo
+- réplicas de leitura do ``SPARQLQueryEngine``: as consultas do motor são
+  distribuídas entre os workers, escalando com o número de núcleos
+
+Alterações do grafo chegam aos workers por um log de alterações
+compartilhado (``DeltaLog``): antes de cada consulta o worker aplica as
+entradas que ainda não viu. Cada entrada define a presença de triplas
+específicas, então reaplicar entradas já contidas em um snapshot mais novo
+(ex.: worker substituído durante a regravação) leva ao mesmo estado. O motor
+regrava o snapshot periodicamente; workers novos partem da posição do log em
+que ele foi gravado e as entradas já aplicadas por todos são descartadas.
+"""
+import os
+import queue
+import argparse
+import threading
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from rag.worker_process import WorkerProcess, WorkerUnavailable, serve
+
+
+# Linhas por parte nas consultas em streaming
+STREAM_CHUNK_ROWS = 500
+
+
+class QueryTimeout(TimeoutError):
+    """A consulta excedeu o prazo e o worker foi interrompido."""
+
+
+class WorkerPoolBusy(RuntimeError):
+    """Todos os workers do pool estão ocupados."""
+
+
+class DeltaLog:
+    """
+    Log de alterações ``(adicionadas, removidas)`` compartilhado entre o motor
+    e os pools de workers.
+
+    As posições são absolutas (não mudam quando o início do log é
+    descartado). ``snapshot_version`` é a posição do log já incluída no
+    snapshot compartilhado: é dela que os workers novos partem.
+    """
+
+    def __init__(self):
+        self.base = 0
+        self.snapshot_version = 0
+        self._entries: List[Tuple[List, List]] = []
+        self._pools: List["SPARQLWorkerPool"] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def end(self) -> int:
+        """Posição após a última entrada."""
+        return self.base + len(self._entries)
+
+    def append(self, added: List, removed: List):
+        """Registra uma alteração do grafo."""
+        with self._lock:
+            self._entries.append((added, removed))
+
+    def since(self, position: int) -> Tuple[List[Tuple[List, List]], int]:
+        """
+        Retorna as entradas a partir de uma posição.
+
+        Args:
+            position: Posição já aplicada pelo worker
+
+        Returns:
+            Tupla (entradas pendentes, posição após a última)
+        """
+        with self._lock:
+            return self._entries[max(position - self.base, 0):], self.end
+
+    def attach(self, pool: "SPARQLWorkerPool"):
+        """Registra um pool que lê o log."""
+        with self._lock:
+            self._pools.append(pool)
+
+    def detach(self, pool: "SPARQLWorkerPool"):
+        """Remove um pool encerrado."""
+        with self._lock:
+            if pool in self._pools:
+                self._pools.remove(pool)
+
+    def compact(self):
+        """Descarta as entradas contidas no snapshot e aplicadas por todos os workers."""
+        with self._lock:
+            position = min([self.snapshot_version] + [pool.min_applied() for pool in self._pools])
+            if position > self.base:
+                del self._entries[:position - self.base]
+                self.base = position
+
+
+def encode_rows(rows: Iterable[Dict]) -> Tuple[List[str], List[Tuple]]:
+    """
+    Serializa linhas em formato compacto: colunas + tuplas de valores.
+
+    Args:
+        rows: Linhas como dicionários
+
+    Returns:
+        Tupla (colunas, linhas como tuplas com None para variáveis não ligadas)
+    """
+    rows = list(rows)
+    columns: List[str] = []
+    seen = set()
+    for row in rows:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+    return columns, [tuple(row.get(col) for col in columns) for row in rows]
+
+
+def decode_rows(columns: List[str], values: List[Tuple]) -> List[Dict]:
+    """Reconstrói as linhas como dicionários, omitindo valores não ligados."""
+    return [
+        {col: value for col, value in zip(columns, row) if value is not None}
+        for row in values
+    ]
+
+
+class SPARQLWorkerPool:
+    """Pool limitado de processos para avaliar consultas SPARQL com prazo."""
+
+    def __init__(self, size: int = 2, ontology_path: str = "ontologia_mora.owl",
+                 store: Optional[str] = None, store_path: Optional[str] = None,
+                 startup_timeout: float = 120.0, acquire_timeout: Optional[float] = 5.0,
+                 delta_log: Optional[DeltaLog] = None):
+        """
+        Inicia os workers.
+
+        Args:
+            size: Número de processos
+            ontology_path: Caminho para o arquivo OWL
+            store: Backend do grafo (padrão: GRAPH_STORE)
+            store_path: Caminho do store persistente (opcional)
+            startup_timeout: Tempo máximo para um worker carregar o grafo
+            acquire_timeout: Tempo máximo de espera por um worker livre
+                (None aguarda indefinidamente)
+            delta_log: Log de alterações do grafo compartilhado com o motor
+                (opcional)
+        """
+        self.size = size
+        self.startup_timeout = startup_timeout
+        self.acquire_timeout = acquire_timeout
+        self._args = ["--ontology", ontology_path]
+        if store:
+            self._args += ["--store", store]
+        if store_path:
+            self._args += ["--store-path", store_path]
+        self._delta_log = delta_log if delta_log is not None else DeltaLog()
+        self._applied: Dict[WorkerProcess, int] = {}
+        self._workers: List[WorkerProcess] = []
+        self._idle: "queue.Queue[WorkerProcess]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._delta_log.attach(self)
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> WorkerProcess:
+        """Inicia um novo worker a partir do snapshot atual."""
+        worker = WorkerProcess("rag.query_workers", self._args)
+        with self._lock:
+            self._workers.append(worker)
+            # O snapshot é gravado antes de a posição avançar: o worker nunca
+            # carrega um snapshot mais antigo que a posição registrada
+            self._applied[worker] = self._delta_log.snapshot_version
+        return worker
+
+    def min_applied(self) -> int:
+        """Menor posição do log aplicada pelos workers do pool."""
+        with self._lock:
+            return min(self._applied.values(), default=self._delta_log.end)
+
+    def _replace(self, worker: WorkerProcess) -> WorkerProcess:
+        """Mata um worker e inicia outro no lugar."""
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self._applied.pop(worker, None)
+        return self._spawn()
+
+    def _acquire(self) -> WorkerProcess:
+        """Obtém um worker livre ou falha se o pool estiver saturado."""
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise WorkerPoolBusy(
+                f"Todos os {self.size} workers SPARQL estão ocupados. Tente novamente."
+            )
+
+    def _sync(self, worker: WorkerProcess):
+        """Aplica no worker as alterações do grafo que ele ainda não recebeu."""
+        pending, end = self._delta_log.since(self._applied.get(worker, 0))
+        if not pending:
+            return
+        status, payload = worker.request(("update", pending), timeout=self.startup_timeout)
+        if status == "error":
+            raise WorkerUnavailable(f"Falha ao atualizar o worker: {payload}")
+        with self._lock:
+            if worker in self._applied:
+                self._applied[worker] = end
+        self._delta_log.compact()
+
+    def execute(self, sparql_query: str, timeout: Optional[float] = 10.0,
+                limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """
+        Executa uma consulta em um worker com prazo de execução.
+
+        Args:
+            sparql_query: Consulta SPARQL
+            timeout: Prazo em segundos (None para sem prazo)
+            limit: Número máximo de linhas (opcional)
+            offset: Número de linhas a pular
+
+        Returns:
+            Lista de resultados como dicionários
+
+        Raises:
+            QueryTimeout: Se a consulta exceder o prazo
+            WorkerPoolBusy: Se não houver worker livre
+        """
+        return decode_rows(*self.execute_encoded(sparql_query, timeout, limit, offset))
+
+    def execute_encoded(self, sparql_query: str, timeout: Optional[float] = 10.0,
+                        limit: Optional[int] = None, offset: int = 0,
+                        columnar: bool = False) -> Tuple[List[str], List[Tuple]]:
+        """
+        Executa uma consulta e retorna o resultado no formato compacto.
+
+        Args:
+            sparql_query: Consulta SPARQL
+            timeout: Prazo em segundos (None para sem prazo)
+            limit: Número máximo de linhas (opcional)
+            offset: Número de linhas a pular
+            columnar: Se as colunas devem ser todas as variáveis da projeção
+                (mesmo as nunca ligadas), como em ``query_columnar``
+
+        Returns:
+            Tupla (colunas, linhas como tuplas)
+
+        Raises:
+            QueryTimeout: Se a consulta exceder o prazo
+            WorkerPoolBusy: Se não houver worker livre
+        """
+        worker = self._acquire()
+        try:
+            worker.wait_ready(self.startup_timeout)
+            self._sync(worker)
+            status, payload = worker.request(
+                ("query", {'query': sparql_query, 'limit': limit, 'offset': offset,
+                           'columnar': columnar}),
+                timeout=timeout
+            )
+        except TimeoutError:
+            worker = self._replace(worker)
+            raise QueryTimeout(f"Consulta excedeu o prazo de {timeout}s e foi interrompida")
+        except WorkerUnavailable:
+            worker = self._replace(worker)
+            raise
+        finally:
+            self._idle.put(worker)
+
+        if status == "error":
+            raise ValueError(payload)
+        return payload
+
+    def execute_stream(self, sparql_query: str, timeout: Optional[float] = 10.0,
+                       limit: Optional[int] = None, offset: int = 0,
+                       chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[Dict]:
+        """
+        Executa uma consulta em um worker produzindo as linhas em partes.
+
+        O worker avalia a consulta sob demanda e envia ``chunk_rows`` linhas
+        por vez, só produzindo a parte seguinte quando a anterior é
+        consumida: a memória dos dois processos fica limitada a uma parte.
+        O worker fica ocupado até o fim da iteração (ou até o gerador ser
+        fechado).
+
+        Args:
+            sparql_query: Consulta SPARQL
+            timeout: Prazo em segundos para o worker produzir todas as partes
+                (não conta o tempo de consumo; None para sem prazo)
+            limit: Número máximo de linhas (opcional)
+            offset: Número de linhas a pular
+            chunk_rows: Linhas por parte
+
+        Yields:
+            Resultados como dicionários
+
+        Raises:
+            QueryTimeout: Se a consulta exceder o prazo
+            WorkerPoolBusy: Se não houver worker livre
+        """
+        worker = self._acquire()
+        parts = None
+        try:
+            worker.wait_ready(self.startup_timeout)
+            self._sync(worker)
+            parts = worker.request_stream(
+                ("stream", {'query': sparql_query, 'limit': limit, 'offset': offset,
+                            'chunk_rows': chunk_rows}),
+                timeout=timeout
+            )
+            for columns, values in parts:
+                yield from decode_rows(columns, values)
+        except TimeoutError:
+            worker = self._replace(worker)
+            raise QueryTimeout(f"Consulta excedeu o prazo de {timeout}s e foi interrompida")
+        except WorkerUnavailable:
+            worker = self._replace(worker)
+            raise
+        finally:
+            if parts is not None:
+                # Avisa o worker se o consumidor parou antes do fim
+                parts.close()
+            self._idle.put(worker)
+
+    def close(self):
+        """Encerra todos os workers."""
+        self._delta_log.detach(self)
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._applied.clear()
+        for worker in workers:
+            worker.close()
+
+
+class _WorkerState:
+    """Estado do processo worker: o motor SPARQL com o grafo carregado."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.ready_info = {'pid': os.getpid(), 'triples': len(engine.graph)}
+
+
+def _setup() -> _WorkerState:
+    """Carrega o grafo no processo worker."""
+    from rag.graph_store import read_snapshot
+    from rag.knowledge_graph import KnowledgeGraph
+    from rag.sparql_query import SPARQLQueryEngine
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ontology", default="ontologia_mora.owl")
+    parser.add_argument("--store", default=None)
+    parser.add_argument("--store-path", default=None)
+    args = parser.parse_args()
+    knowledge_graph = None
+    if args.store == "snapshot" and args.store_path:
+        # Snapshot do grafo vivo gravado pelo motor: não comparar com o arquivo
+        knowledge_graph = KnowledgeGraph(args.ontology, args.store, args.store_path,
+                                         graph=read_snapshot(args.store_path))
+    # O worker nunca abre réplicas próprias
+    return _WorkerState(SPARQLQueryEngine(args.ontology, args.store, args.store_path, replicas=0,
+                                          knowledge_graph=knowledge_graph))
+
+
+def _encoded_chunks(rows: Iterator[Dict], size: int) -> Iterator[Tuple[List[str], List[Tuple]]]:
+    """Agrupa as linhas em partes de ``size`` linhas no formato compacto."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield encode_rows(chunk)
+
+
+def _handle(state: _WorkerState, op: str, payload: Dict):
+    """Atende uma requisição no processo worker."""
+    if op == "query":
+        if payload.get('columnar'):
+            result = state.engine.query_columnar(payload['query'], payload.get('limit'),
+                                                 payload.get('offset', 0))
+            columns = [result.columns[var] for var in result.variables]
+            return result.variables, list(zip(*columns))
+        rows = state.engine.iter_query(payload['query'], payload.get('limit'),
+                                       payload.get('offset', 0))
+        return encode_rows(rows)
+    if op == "stream":
+        rows = state.engine.iter_query(payload['query'], payload.get('limit'),
+                                       payload.get('offset', 0))
+        return _encoded_chunks(rows, payload['chunk_rows'])
+    if op == "update":
+        for added, removed in payload:
+            state.engine.remove_triples(removed)
+            state.engine.add_triples(added)
+        return state.engine.version
+    raise ValueError(f"Operação desconhecida: {op}")
+
+
+if __name__ == "__main__":
+    serve(_setup, _handle)
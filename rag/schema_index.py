@@ -0,0 +1,261 @@
+"""
+Módulo com índice do esquema da ontologia para verificação de consistência.
+
+Guarda em memória, a partir das triplas do grafo:
+
+- hierarquia de classes: classe -> superclasses (fecho de ``rdfs:subClassOf``
+  e ``owl:equivalentClass``, incluindo a própria classe)
+- domínio e imagem de cada propriedade (herdados de ``rdfs:subPropertyOf``)
+- tipos declarados de cada indivíduo (``rdf:type``)
+
+Com isso, uma afirmação ``(entidade, propriedade, valor)`` é validada sem
+consulta SPARQL.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from rdflib import Graph, Literal, URIRef, RDF, RDFS, OWL, XSD
+
+
+_PROPERTY_TYPES = (OWL.ObjectProperty, OWL.DatatypeProperty, RDF.Property,
+                   OWL.AnnotationProperty, OWL.FunctionalProperty,
+                   OWL.TransitiveProperty, OWL.SymmetricProperty,
+                   OWL.InverseFunctionalProperty)
+
+_SCHEMA_PREDICATES = (RDFS.subClassOf, OWL.equivalentClass, RDFS.subPropertyOf,
+                      RDFS.domain, RDFS.range)
+
+
+def _is_datatype(term: URIRef) -> bool:
+    """Verifica se a imagem é um datatype (xsd:* ou rdfs:Literal)."""
+    return term == RDFS.Literal or str(term).startswith(str(XSD))
+
+
+class SchemaIndex:
+    """Índice de esquema (classes, domínio/imagem) e de tipos de instâncias."""
+
+    def __init__(self, graph: Graph):
+        """
+        Inicializa o índice vazio.
+
+        Args:
+            graph: Grafo rdflib observado
+        """
+        self.graph = graph
+        self._superclasses: Dict[URIRef, Set[URIRef]] = {}
+        self._domains: Dict[URIRef, Set[URIRef]] = {}
+        self._ranges: Dict[URIRef, Set[URIRef]] = {}
+        self._properties: Set[URIRef] = set()
+        self._datatype_properties: Set[URIRef] = set()
+        self._types: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        self._type_closure: Dict[URIRef, Set[URIRef]] = {}
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "SchemaIndex":
+        """
+        Constrói o índice a partir do grafo.
+
+        Args:
+            graph: Grafo rdflib
+
+        Returns:
+            Índice preenchido
+        """
+        index = cls(graph)
+        index._build_schema()
+        for s, o in graph.subject_objects(RDF.type):
+            if isinstance(s, URIRef) and isinstance(o, URIRef):
+                index._types[s].add(o)
+        return index
+
+    def _build_schema(self):
+        """(Re)calcula hierarquia de classes, propriedades e domínio/imagem."""
+        graph = self.graph
+        parents: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for s, o in graph.subject_objects(RDFS.subClassOf):
+            if isinstance(s, URIRef) and isinstance(o, URIRef):
+                parents[s].add(o)
+        for s, o in graph.subject_objects(OWL.equivalentClass):
+            if isinstance(s, URIRef) and isinstance(o, URIRef):
+                parents[s].add(o)
+                parents[o].add(s)
+
+        classes = set(parents) | {c for ps in parents.values() for c in ps}
+        classes.update(s for s in graph.subjects(RDF.type, OWL.Class) if isinstance(s, URIRef))
+        self._superclasses = {}
+        for cls_ in classes:
+            # Busca em profundidade: hierarquias de ontologia são rasas
+            closure, stack = {cls_}, [cls_]
+            while stack:
+                for parent in parents.get(stack.pop(), ()):
+                    if parent not in closure:
+                        closure.add(parent)
+                        stack.append(parent)
+            self._superclasses[cls_] = closure
+
+        self._properties = set()
+        for prop_type in _PROPERTY_TYPES:
+            self._properties.update(s for s in graph.subjects(RDF.type, prop_type)
+                                    if isinstance(s, URIRef))
+        self._datatype_properties = {s for s in graph.subjects(RDF.type, OWL.DatatypeProperty)
+                                     if isinstance(s, URIRef)}
+
+        super_props: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for s, o in graph.subject_objects(RDFS.subPropertyOf):
+            super_props[s].add(o)
+        declared_domains: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        declared_ranges: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        for s, o in graph.subject_objects(RDFS.domain):
+            if isinstance(o, URIRef):
+                declared_domains[s].add(o)
+        for s, o in graph.subject_objects(RDFS.range):
+            if isinstance(o, URIRef):
+                declared_ranges[s].add(o)
+        self._properties.update(declared_domains, declared_ranges, super_props)
+
+        self._domains, self._ranges = {}, {}
+        for prop in self._properties:
+            ancestors, stack = {prop}, [prop]
+            while stack:
+                for parent in super_props.get(stack.pop(), ()):
+                    if parent not in ancestors:
+                        ancestors.add(parent)
+                        stack.append(parent)
+            self._domains[prop] = set().union(*(declared_domains.get(p, set()) for p in ancestors))
+            self._ranges[prop] = set().union(*(declared_ranges.get(p, set()) for p in ancestors))
+        self._type_closure.clear()
+
+    def update(self, added: Iterable[Tuple], removed: Iterable[Tuple]):
+        """
+        Aplica alterações de triplas (chamado após a alteração do grafo).
+
+        Alterações de ``rdf:type`` de indivíduos são aplicadas diretamente;
+        alterações no esquema recalculam a hierarquia.
+
+        Args:
+            added: Triplas adicionadas
+            removed: Triplas removidas
+        """
+        schema_changed = False
+        for s, p, o in removed:
+            if p == RDF.type and isinstance(s, URIRef):
+                self._types[s].discard(o)
+                self._type_closure.pop(s, None)
+                schema_changed = schema_changed or o in _PROPERTY_TYPES or o == OWL.Class
+            elif p in _SCHEMA_PREDICATES:
+                schema_changed = True
+        for s, p, o in added:
+            if p == RDF.type and isinstance(s, URIRef) and isinstance(o, URIRef):
+                self._types[s].add(o)
+                self._type_closure.pop(s, None)
+                schema_changed = schema_changed or o in _PROPERTY_TYPES or o == OWL.Class
+            elif p in _SCHEMA_PREDICATES:
+                schema_changed = True
+        if schema_changed:
+            self._build_schema()
+
+    def is_class(self, term: URIRef) -> bool:
+        """Verifica se o termo é uma classe do esquema."""
+        return term in self._superclasses
+
+    def is_property(self, term: URIRef) -> bool:
+        """Verifica se o termo é uma propriedade do esquema."""
+        return term in self._properties
+
+    def is_schema_change(self, triple: Tuple) -> bool:
+        """Verifica se a tripla altera o esquema (e não apenas instâncias)."""
+        _, p, o = triple
+        if p in _SCHEMA_PREDICATES:
+            return True
+        return p == RDF.type and (o in _PROPERTY_TYPES or o == OWL.Class)
+
+    def superclasses(self, cls_: URIRef) -> Set[URIRef]:
+        """Superclasses de uma classe, incluindo ela mesma."""
+        return self._superclasses.get(cls_, {cls_})
+
+    def types(self, entity: URIRef) -> Set[URIRef]:
+        """Tipos de um indivíduo, incluindo as superclasses dos tipos declarados."""
+        closure = self._type_closure.get(entity)
+        if closure is None:
+            closure = set()
+            for cls_ in self._types.get(entity, ()):
+                closure |= self.superclasses(cls_)
+            if entity in self._types:
+                self._type_closure[entity] = closure
+        return closure
+
+    def domains(self, prop: URIRef) -> Set[URIRef]:
+        """Classes de domínio de uma propriedade."""
+        return self._domains.get(prop, set())
+
+    def ranges(self, prop: URIRef) -> Set[URIRef]:
+        """Classes (ou datatypes) de imagem de uma propriedade."""
+        return self._ranges.get(prop, set())
+
+    def _is_instance(self, entity: URIRef, classes: Set[URIRef]) -> bool:
+        """Verifica se a entidade pertence a todas as classes (owl:Thing sempre)."""
+        required = classes - {OWL.Thing, RDFS.Resource}
+        return required <= self.types(entity)
+
+    def _check_literal(self, value: str, ranges: Set[URIRef]) -> Optional[str]:
+        """Valida um literal contra os datatypes da imagem; retorna o motivo da falha."""
+        for datatype in ranges:
+            if datatype in (RDFS.Literal, XSD.string):
+                continue
+            if Literal(value, datatype=datatype).ill_typed:
+                return f"Valor '{value}' inválido para o tipo {datatype}"
+        return None
+
+    def check(self, entity: str, prop: str, value: str) -> Dict:
+        """
+        Verifica se uma afirmação respeita o domínio e a imagem da propriedade.
+
+        Args:
+            entity: IRI da entidade (sujeito)
+            prop: IRI da propriedade
+            value: IRI do objeto ou valor literal
+
+        Returns:
+            Dicionário com ``consistent`` e, se inconsistente, ``reason``
+        """
+        entity_ref, prop_ref = URIRef(entity), URIRef(prop)
+        if prop_ref not in self._properties:
+            return {'consistent': False, 'reason': f"Propriedade desconhecida: {prop}"}
+
+        domains = self.domains(prop_ref)
+        if domains and not self._is_instance(entity_ref, domains):
+            return {
+                'consistent': False,
+                'reason': f"Entidade {entity} não é instância do domínio de {prop}"
+            }
+
+        ranges = self.ranges(prop_ref)
+        if prop_ref in self._datatype_properties or (ranges and all(map(_is_datatype, ranges))):
+            reason = self._check_literal(value, ranges)
+            if reason:
+                return {'consistent': False, 'reason': reason}
+        elif ranges and not self._is_instance(URIRef(value), ranges):
+            return {
+                'consistent': False,
+                'reason': f"Valor {value} não é instância da imagem de {prop}"
+            }
+        return {'consistent': True}
+
+    def check_many(self, claims: Iterable[Dict]) -> List[Dict]:
+        """
+        Verifica várias afirmações.
+
+        Args:
+            claims: Afirmações com campos ``entity``, ``property`` e ``value``
+
+        Returns:
+            Resultados na mesma ordem, com os campos da afirmação
+        """
+        results = []
+        for claim in claims:
+            entity, prop, value = claim.get('entity'), claim.get('property'), claim.get('value')
+            if not all([entity, prop, value]):
+                result = {'consistent': False, 'reason': 'Campos obrigatórios faltando'}
+            else:
+                result = self.check(entity, prop, value)
+            results.append({'entity': entity, 'property': prop, 'value': value, **result})
+        return results
@@ -1,62 +1,285 @@
 """
 Módulo para consultas SPARQL à ontologia.
 """
-from typing import List, Dict, Optional
-from rdflib import Graph, Namespace, URIRef, Literal
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+from itertools import chain, islice
+from rdflib import Graph, Namespace, URIRef, RDF
 from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.evaluate import evalQuery
+from rdflib.plugins.stores.memory import Memory
 import os
+import threading
+from rag.graph_store import default_store_path, write_snapshot
+from rag.knowledge_graph import KnowledgeGraph
+from rag.prerequisite_index import PrerequisiteIndex
+from rag.path_index import CoursePathIndex
+from rag.predicate_stats import PredicateStatistics
+from rag.schema_index import SchemaIndex
+from rag.worker_process import WorkerUnavailable
+from rag.query_workers import DeltaLog
+from rag.columnar import ColumnarResult, term_to_string
+from rag.query_guard import parse_query
+from rag.query_optimizer import QueryOptimizer
 
 
-def _get_ontology_path(ontology_path: str = "ontologia_mora.owl") -> str:
+def _evaluate_select(graph: Graph, prepared) -> Tuple[Iterator, List]:
     """
-    Resolve o caminho da ontologia relativo à raiz do projeto.
+    Avalia uma consulta SELECT e itera os bindings sem materializá-los.
+    
+    ``Graph.query`` embrulha o resultado em um ``Result``, que guarda cada
+    linha já produzida; ``evalQuery`` (API pública do processador SPARQL do
+    rdflib) devolve o gerador de bindings diretamente, mantendo a memória
+    constante.
     
     Args:
-        ontology_path: Caminho relativo ou absoluto para o arquivo OWL
+        graph: Grafo consultado
+        prepared: Consulta preparada (ou string, se o parse falhou)
         
     Returns:
-        Caminho absoluto para o arquivo OWL
+        Tupla (bindings não vazios, variáveis da projeção); vazia para
+        consultas que não são SELECT
     """
-    # Se já é um caminho absoluto, retornar como está
-    if os.path.isabs(ontology_path):
-        return ontology_path
-    
-    # Encontrar o diretório raiz do projeto (onde está ontologia_mora.owl)
-    # Começar do diretório deste arquivo e subir até encontrar o arquivo
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Tentar encontrar o arquivo subindo os diretórios
-    for _ in range(5):  # Limitar a busca a 5 níveis
-        potential_path = os.path.join(current_dir, ontology_path)
-        if os.path.exists(potential_path):
-            return os.path.abspath(potential_path)
-        parent_dir = os.path.dirname(current_dir)
-        if parent_dir == current_dir:  # Chegou na raiz do sistema
-            break
-        current_dir = parent_dir
-    
-    # Se não encontrou, tentar caminho relativo ao diretório atual
-    return os.path.abspath(ontology_path)
+    if isinstance(prepared, str):
+        prepared = translateQuery(parse_query(prepared))
+    result = evalQuery(graph, prepared)
+    if result.get("type_") != "SELECT":
+        return iter(()), []
+    return (binding for binding in result["bindings"] if binding), list(result.get("vars_") or [])
 
 
 class SPARQLQueryEngine:
     """Motor de consultas SPARQL para a ontologia."""
     
-    def __init__(self, ontology_path: str = "ontologia_mora.owl"):
+    def __init__(self, ontology_path: str = "ontologia_mora.owl",
+                 store: Optional[str] = None, store_path: Optional[str] = None,
+                 replicas: Optional[int] = None,
+                 knowledge_graph: Optional[KnowledgeGraph] = None):
         """
         Inicializa o motor de consultas SPARQL.
         
         Args:
             ontology_path: Caminho para o arquivo OWL
+            store: Backend do grafo (memory, snapshot, berkeleydb, owlready).
+                Padrão: variável de ambiente GRAPH_STORE ou "memory"
+            store_path: Caminho do store persistente (opcional, usa
+                GRAPH_STORE_PATH ou o caminho padrão ao lado da ontologia)
+            replicas: Número de processos réplica para as consultas.
+                Padrão: variável de ambiente SPARQL_REPLICAS ou 0 (consultas
+                executadas neste processo)
+            knowledge_graph: Grafo de conhecimento compartilhado (opcional;
+                se omitido, um novo é carregado com os parâmetros acima)
         """
-        self.graph = Graph()
-        resolved_path = _get_ontology_path(ontology_path)
-        self.graph.parse(resolved_path, format="xml")
+        # Grafo próprio (não compartilhado): liberado em close()
+        self._owns_graph = knowledge_graph is None
+        if knowledge_graph is None:
+            knowledge_graph = KnowledgeGraph(ontology_path, store, store_path)
+        self.knowledge_graph = knowledge_graph
+        self.ontology_path = knowledge_graph.ontology_path
+        self.store = knowledge_graph.store
+        self.store_path = knowledge_graph.store_path
+        self.graph = knowledge_graph.graph
         
         # Definir namespaces
         self.EAD = Namespace("http://www.exemplo.org/ead-ontologia#")
         self.graph.bind("ead", self.EAD)
         
+        # Índices materializados, atualizados a cada alteração do grafo
+        self.prerequisite_index = PrerequisiteIndex.from_graph(
+            self.graph, self.EAD.possuiPreRequisito
+        )
+        self.path_index = CoursePathIndex.from_graph(
+            self.graph, self.EAD.possuiModulo, self.EAD.possuiAula, self.EAD.utilizaRecurso
+        )
+        self.predicate_stats = PredicateStatistics.from_graph(self.graph)
+        self.schema_index = SchemaIndex.from_graph(self.graph)
+        self._indexes = [self.prerequisite_index, self.path_index, self.predicate_stats,
+                         self.schema_index]
+        knowledge_graph.add_listener(self._notify_change)
+        
+        # Reescrita algébrica das consultas (desative com SPARQL_OPTIMIZER=0)
+        self.optimizer = None
+        if os.getenv("SPARQL_OPTIMIZER", "1") != "0":
+            self.optimizer = QueryOptimizer(self.predicate_stats)
+        self._optimized: Dict[str, object] = {}
+        
+        # Pools de processos que recebem o grafo por snapshot compartilhado;
+        # o snapshot é regravado a cada SPARQL_SNAPSHOT_DELTAS alterações
+        self._worker_pools = []
+        self._shared_snapshot: Optional[str] = None
+        self._delta_log = DeltaLog()
+        self._snapshot_every = int(os.getenv("SPARQL_SNAPSHOT_DELTAS", "256"))
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self.replica_pool = None
+        if replicas is None:
+            replicas = int(os.getenv("SPARQL_REPLICAS", "0"))
+        if replicas > 0:
+            try:
+                self.replica_pool = self.create_worker_pool(replicas, acquire_timeout=None)
+            except Exception as e:
+                print(f"⚠️  Réplicas SPARQL não disponíveis: {e}")
+                print("   Consultas serão executadas no processo atual")
+    
+    def _write_shared_snapshot(self) -> str:
+        """
+        Grava o grafo atual como snapshot para os processos de trabalho.
+        
+        Registra a posição do log de alterações incluída no snapshot: os
+        workers iniciados depois partem dela, e as entradas anteriores são
+        descartadas assim que todos os workers as aplicarem.
+        
+        Returns:
+            Caminho do snapshot
+        """
+        with self.knowledge_graph.lock:
+            if self._shared_snapshot is None:
+                base = default_store_path(self.ontology_path, "snapshot")
+                self._shared_snapshot = f"{os.path.splitext(base)[0]}.workers-{os.getpid()}.graph"
+            graph = self.graph
+            if not isinstance(graph.store, Memory):
+                # Stores em disco não são serializáveis: copiar para memória
+                graph = Graph()
+                for triple in self.graph:
+                    graph.add(triple)
+                for prefix, namespace in self.graph.namespaces():
+                    graph.bind(prefix, namespace)
+            write_snapshot(graph, self.ontology_path, self._shared_snapshot)
+            self._delta_log.snapshot_version = self._delta_log.end
+        self._delta_log.compact()
+        return self._shared_snapshot
+    
+    def _refresh_snapshot(self):
+        """Regrava o snapshot compartilhado (thread de fundo)."""
+        try:
+            if self._worker_pools:
+                self._write_shared_snapshot()
+        except Exception as e:
+            print(f"⚠️  Aviso: Não foi possível regravar o snapshot das réplicas: {e}")
+        finally:
+            self._snapshot_thread = None
+    
+    def create_worker_pool(self, size: int, **kwargs):
+        """
+        Cria um pool de processos com uma cópia do grafo atual.
+        
+        Os workers carregam um snapshot compartilhado do grafo e recebem as
+        alterações posteriores feitas por ``add_triples``/``remove_triples``.
+        
+        Args:
+            size: Número de processos
+            **kwargs: Opções de ``SPARQLWorkerPool`` (ex.: acquire_timeout)
+            
+        Returns:
+            Pool de workers
+        """
+        from rag.query_workers import SPARQLWorkerPool
+        
+        pool = SPARQLWorkerPool(
+            size,
+            ontology_path=self.ontology_path,
+            store="snapshot",
+            store_path=self._shared_snapshot or self._write_shared_snapshot(),
+            delta_log=self._delta_log,
+            **kwargs
+        )
+        self._worker_pools.append(pool)
+        return pool
+    
+    def close(self):
+        """Encerra os pools de processos, remove o snapshot compartilhado e libera o grafo próprio."""
+        for pool in self._worker_pools:
+            pool.close()
+        self._worker_pools = []
+        self.replica_pool = None
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+        if self._shared_snapshot and os.path.exists(self._shared_snapshot):
+            os.remove(self._shared_snapshot)
+        self._shared_snapshot = None
+        if self._owns_graph:
+            self.knowledge_graph.close()
+    
+    @property
+    def version(self) -> int:
+        """Versão do grafo: incrementada a cada alteração de triplas."""
+        return self.knowledge_graph.version
+    
+    def add_triples(self, triples: Iterable[Tuple]) -> int:
+        """
+        Adiciona triplas ao grafo e atualiza os índices.
+        
+        Args:
+            triples: Triplas (s, p, o) como termos rdflib
+            
+        Returns:
+            Número de triplas efetivamente adicionadas
+        """
+        return len(self.knowledge_graph.add_triples(triples))
+    
+    def remove_triples(self, triples: Iterable[Tuple]) -> int:
+        """
+        Remove triplas do grafo e atualiza os índices.
+        
+        Args:
+            triples: Triplas (s, p, o) como termos rdflib
+            
+        Returns:
+            Número de triplas efetivamente removidas
+        """
+        return len(self.knowledge_graph.remove_triples(triples))
+    
+    def _notify_change(self, added: List[Tuple], removed: List[Tuple]):
+        """Propaga uma alteração do grafo (ouvinte do KnowledgeGraph) para os índices."""
+        for index in self._indexes:
+            index.update(added, removed)
+        # A ordem dos padrões depende das estatísticas: reotimizar
+        self._optimized.clear()
+        if self._worker_pools:
+            # Os workers aplicam o log antes da próxima consulta
+            self._delta_log.append(added, removed)
+            pending = self._delta_log.end - self._delta_log.snapshot_version
+            if pending >= self._snapshot_every and self._snapshot_thread is None:
+                self._snapshot_thread = threading.Thread(
+                    target=self._refresh_snapshot, name="sparql-snapshot", daemon=True
+                )
+                self._snapshot_thread.start()
+        
+    def _prepare(self, sparql_query: str):
+        """
+        Faz o parse e otimiza a consulta antes da avaliação, com cache por
+        texto da consulta.
+        
+        O parse é serializado (``parse_query``); a avaliação recebe a consulta
+        já preparada e roda em paralelo sem refazer o parse. Avisos do
+        otimizador (ex.: produto cartesiano) são exibidos uma vez por
+        consulta. Se o parse falhar, a consulta original é usada.
+        
+        Args:
+            sparql_query: Consulta SPARQL como string
+            
+        Returns:
+            Consulta preparada (ou a string original)
+        """
+        prepared = self._optimized.get(sparql_query)
+        if prepared is not None:
+            return prepared
+        warnings: List[str] = []
+        try:
+            if self.optimizer is None:
+                prepared = translateQuery(parse_query(sparql_query))
+            else:
+                prepared, warnings = self.optimizer.optimize(sparql_query)
+        except Exception:
+            # Erros de sintaxe são reportados pela avaliação normal
+            return sparql_query
+        for warning in warnings:
+            print(f"⚠️  Aviso SPARQL: {warning}")
+        if len(self._optimized) >= 256:
+            self._optimized.clear()
+        self._optimized[sparql_query] = prepared
+        return prepared
+    
     def query(self, sparql_query: str) -> List[Dict]:
         """
         Executa uma consulta SPARQL.
@@ -67,23 +290,80 @@ class SPARQLQueryEngine:
         Returns:
             Lista de resultados como dicionários
         """
-        results = []
-        query_result = self.graph.query(sparql_query)
-        
-        for row in query_result:
-            result_dict = {}
-            for var in query_result.vars:
-                value = row[var]
-                if value:
-                    if isinstance(value, URIRef):
-                        result_dict[str(var)] = str(value)
-                    elif isinstance(value, Literal):
-                        result_dict[str(var)] = str(value.value)
-                    else:
-                        result_dict[str(var)] = str(value)
-            results.append(result_dict)
+        return list(self.iter_query(sparql_query))
+    
+    def iter_query(self, sparql_query: str, limit: Optional[int] = None,
+                   offset: int = 0) -> Iterator[Dict]:
+        """
+        Executa uma consulta SPARQL produzindo os resultados sob demanda.
         
-        return results
+        As linhas são convertidas uma a uma a partir do gerador de bindings do
+        rdflib, sem acumular o resultado completo em memória (exceto quando a
+        própria consulta exige, como em ORDER BY ou DISTINCT). Com réplicas
+        ativas, a consulta é avaliada em um processo réplica, que envia as
+        linhas em partes à medida que são consumidas.
+        
+        Args:
+            sparql_query: Consulta SPARQL como string
+            limit: Número máximo de linhas (opcional)
+            offset: Número de linhas a pular
+            
+        Yields:
+            Resultados como dicionários
+        """
+        if self.replica_pool is not None:
+            rows = self.replica_pool.execute_stream(sparql_query, None, limit, offset)
+            try:
+                # Antecipar a primeira linha: réplica indisponível cai na avaliação local
+                first = next(rows, None)
+            except WorkerUnavailable as e:
+                print(f"⚠️  Réplica SPARQL indisponível, executando localmente: {e}")
+            else:
+                return iter(()) if first is None else chain([first], rows)
+        
+        bindings, projection = _evaluate_select(self.graph, self._prepare(sparql_query))
+        variables = [(var, str(var)) for var in projection]
+        rows = (self._format_row(binding, variables) for binding in bindings)
+        stop = offset + limit if limit is not None else None
+        return islice(rows, offset, stop)
+    
+    @staticmethod
+    def _format_row(binding, variables: List[Tuple]) -> Dict:
+        """Converte um binding do rdflib em dicionário de strings."""
+        result_dict = {}
+        for var, name in variables:
+            value = term_to_string(binding.get(var))
+            if value is not None:
+                result_dict[name] = value
+        return result_dict
+    
+    def query_columnar(self, sparql_query: str, limit: Optional[int] = None,
+                       offset: int = 0) -> ColumnarResult:
+        """
+        Executa uma consulta SPARQL retornando o resultado em colunas.
+        
+        Evita um dicionário por linha e converte cada termo distinto para
+        string uma única vez; indicado para resultados grandes.
+        
+        Args:
+            sparql_query: Consulta SPARQL como string
+            limit: Número máximo de linhas (opcional)
+            offset: Número de linhas a pular
+            
+        Returns:
+            Resultado colunar (variável -> lista de valores)
+        """
+        if self.replica_pool is not None:
+            try:
+                return ColumnarResult.from_encoded(*self.replica_pool.execute_encoded(
+                    sparql_query, None, limit, offset, columnar=True
+                ))
+            except WorkerUnavailable as e:
+                print(f"⚠️  Réplica SPARQL indisponível, executando localmente: {e}")
+        
+        bindings, projection = _evaluate_select(self.graph, self._prepare(sparql_query))
+        stop = offset + limit if limit is not None else None
+        return ColumnarResult.from_bindings(islice(bindings, offset, stop), projection)
     
     def get_courses(self, student_id: Optional[str] = None) -> List[Dict]:
         """
@@ -95,8 +375,27 @@ class SPARQLQueryEngine:
         Returns:
             Lista de cursos com metadados
         """
+        return self.query(self._courses_query(student_id))
+    
+    def iter_courses(self, student_id: Optional[str] = None, limit: Optional[int] = None,
+                     offset: int = 0) -> Iterator[Dict]:
+        """
+        Itera cursos sob demanda, com paginação opcional.
+        
+        Args:
+            student_id: IRI do estudante (opcional)
+            limit: Número máximo de cursos (opcional)
+            offset: Número de cursos a pular
+            
+        Yields:
+            Cursos com metadados
+        """
+        return self.iter_query(self._courses_query(student_id), limit, offset)
+    
+    def _courses_query(self, student_id: Optional[str] = None) -> str:
+        """Monta a consulta de cursos, opcionalmente filtrada por estudante."""
         if student_id:
-            query = """
+            return """
             PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
             SELECT ?curso ?titulo ?descricao ?duracao ?professor
             WHERE {
@@ -108,20 +407,69 @@ class SPARQLQueryEngine:
                 OPTIONAL { ?curso ead:ministradoPor ?professor . }
             }
             """ % student_id
-        else:
-            query = """
-            PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
-            SELECT ?curso ?titulo ?descricao ?duracao ?professor
-            WHERE {
-                ?curso a ead:Curso .
-                OPTIONAL { ?curso ead:temTitulo ?titulo . }
-                OPTIONAL { ?curso ead:temDescricao ?descricao . }
-                OPTIONAL { ?curso ead:temDuracao ?duracao . }
-                OPTIONAL { ?curso ead:ministradoPor ?professor . }
-            }
-            """
+        return """
+        PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
+        SELECT ?curso ?titulo ?descricao ?duracao ?professor
+        WHERE {
+            ?curso a ead:Curso .
+            OPTIONAL { ?curso ead:temTitulo ?titulo . }
+            OPTIONAL { ?curso ead:temDescricao ?descricao . }
+            OPTIONAL { ?curso ead:temDuracao ?duracao . }
+            OPTIONAL { ?curso ead:ministradoPor ?professor . }
+        }
+        """
+    
+    @staticmethod
+    def _values_clause(variable: str, iris: Iterable[str]) -> str:
+        """Monta um bloco VALUES ligando a variável a uma lista de IRIs."""
+        return "VALUES ?%s { %s }" % (variable, " ".join("<%s>" % iri for iri in iris))
+    
+    def _query_grouped(self, sparql_query: str, key: str, iris: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Executa uma consulta em lote e agrupa as linhas pela entidade.
         
-        return self.query(query)
+        Args:
+            sparql_query: Consulta com a variável ``key`` ligada por VALUES
+            key: Nome da variável que identifica a entidade
+            iris: IRIs consultados (todos aparecem no resultado)
+            
+        Returns:
+            Dicionário IRI -> linhas (sem a coluna da entidade)
+        """
+        grouped: Dict[str, List[Dict]] = {iri: [] for iri in iris}
+        if not grouped:
+            return grouped
+        for row in self.iter_query(sparql_query):
+            entity = row.pop(key, None)
+            if entity in grouped:
+                grouped[entity].append(row)
+        return grouped
+    
+    def get_courses_for_students(self, student_ids: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Obtém os cursos de vários estudantes com uma única consulta.
+        
+        Args:
+            student_ids: IRIs dos estudantes
+            
+        Returns:
+            Dicionário IRI do estudante -> cursos (como em ``get_courses``)
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        query = """
+        PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
+        SELECT ?estudante ?curso ?titulo ?descricao ?duracao ?professor
+        WHERE {
+            %s
+            ?curso a ead:Curso .
+            ?curso ead:temMatriculado ?estudante .
+            OPTIONAL { ?curso ead:temTitulo ?titulo . }
+            OPTIONAL { ?curso ead:temDescricao ?descricao . }
+            OPTIONAL { ?curso ead:temDuracao ?duracao . }
+            OPTIONAL { ?curso ead:ministradoPor ?professor . }
+        }
+        """ % self._values_clause("estudante", student_ids)
+        return self._query_grouped(query, "estudante", student_ids)
     
     def get_student_tasks(self, student_id: str) -> List[Dict]:
         """
@@ -133,7 +481,26 @@ class SPARQLQueryEngine:
         Returns:
             Lista de tarefas
         """
-        query = """
+        return self.query(self._student_tasks_query(student_id))
+    
+    def iter_student_tasks(self, student_id: str, limit: Optional[int] = None,
+                           offset: int = 0) -> Iterator[Dict]:
+        """
+        Itera tarefas de um estudante sob demanda, com paginação opcional.
+        
+        Args:
+            student_id: IRI do estudante
+            limit: Número máximo de tarefas (opcional)
+            offset: Número de tarefas a pular
+            
+        Yields:
+            Tarefas
+        """
+        return self.iter_query(self._student_tasks_query(student_id), limit, offset)
+    
+    def _student_tasks_query(self, student_id: str) -> str:
+        """Monta a consulta de tarefas de um estudante."""
+        return """
         PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
         SELECT ?tarefa ?titulo ?dataEntrega ?avaliacao
         WHERE {
@@ -143,34 +510,94 @@ class SPARQLQueryEngine:
             OPTIONAL { ?avaliacao ead:possuiTarefa ?tarefa . }
         }
         """ % student_id
-        
-        return self.query(query)
     
-    def get_resources_for_course(self, course_id: str) -> List[Dict]:
+    def get_tasks_for_students(self, student_ids: List[str]) -> Dict[str, List[Dict]]:
         """
-        Obtém recursos de um curso.
+        Obtém as tarefas de vários estudantes com uma única consulta.
         
         Args:
-            course_id: IRI do curso
+            student_ids: IRIs dos estudantes
             
         Returns:
-            Lista de recursos
+            Dicionário IRI do estudante -> tarefas (como em ``get_student_tasks``)
         """
+        student_ids = list(dict.fromkeys(student_ids))
         query = """
         PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
-        SELECT ?recurso ?titulo ?url ?tipo
+        SELECT ?estudante ?tarefa ?titulo ?dataEntrega ?avaliacao
         WHERE {
-            ?curso ead:possuiModulo ?modulo .
-            ?modulo ead:possuiAula ?aula .
-            ?aula ead:utilizaRecurso ?recurso .
-            OPTIONAL { ?recurso ead:temTitulo ?titulo . }
-            OPTIONAL { ?recurso ead:temURL ?url . }
-            OPTIONAL { ?recurso rdf:type ?tipo . }
-            FILTER (?curso = <%s>)
+            %s
+            ?estudante ead:entregaTarefa ?tarefa .
+            OPTIONAL { ?tarefa ead:temTitulo ?titulo . }
+            OPTIONAL { ?tarefa ead:temDataEntrega ?dataEntrega . }
+            OPTIONAL { ?avaliacao ead:possuiTarefa ?tarefa . }
         }
-        """ % course_id
+        """ % self._values_clause("estudante", student_ids)
+        return self._query_grouped(query, "estudante", student_ids)
+    
+    def get_resources_for_course(self, course_id: str) -> List[Dict]:
+        """
+        Obtém recursos de um curso a partir do índice de caminhos materializado.
         
-        return self.query(query)
+        Args:
+            course_id: IRI do curso
+            
+        Returns:
+            Lista de recursos com módulo e aula de origem
+        """
+        results = []
+        for module, lesson, resource in self.path_index.paths(course_id):
+            resource_ref = URIRef(resource)
+            row = {'recurso': resource, 'modulo': module, 'aula': lesson}
+            titulo = self.graph.value(resource_ref, self.EAD.temTitulo)
+            if titulo is not None:
+                row['titulo'] = str(titulo)
+            url = self.graph.value(resource_ref, self.EAD.temURL)
+            if url is not None:
+                row['url'] = str(url)
+            # Uma linha por tipo, como o OPTIONAL { ?recurso rdf:type ?tipo }
+            tipos = [str(t) for t in self.graph.objects(resource_ref, RDF.type)]
+            if tipos:
+                results.extend({**row, 'tipo': tipo} for tipo in tipos)
+            else:
+                results.append(row)
+        
+        return results
+    
+    def get_resources_for_courses(self, course_ids: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Obtém os recursos de vários cursos.
+        
+        Os recursos vêm do índice de caminhos, sem consulta SPARQL; o método
+        existe para que lotes de cursos usem a mesma interface das demais
+        consultas em lote.
+        
+        Args:
+            course_ids: IRIs dos cursos
+            
+        Returns:
+            Dicionário IRI do curso -> recursos (como em ``get_resources_for_course``)
+        """
+        return {course_id: self.get_resources_for_course(course_id)
+                for course_id in dict.fromkeys(course_ids)}
+    
+    def get_course_resource_paths(self) -> List[Dict]:
+        """
+        Obtém todos os recursos utilizados em módulos de cursos (CQ2).
+        
+        Returns:
+            Lista de recursos com curso, módulo e aula de origem
+        """
+        results = []
+        for course, paths in self.path_index.items():
+            for module, lesson, resource in paths:
+                row = {'curso': course, 'recurso': resource, 'modulo': module, 'aula': lesson}
+                titulo = self.graph.value(URIRef(resource), self.EAD.temTitulo)
+                if titulo is not None:
+                    row['tituloRecurso'] = str(titulo)
+                results.append(row)
+        
+        return results
     
     def get_feedback(self, student_id: str) -> List[Dict]:
         """
@@ -194,6 +621,85 @@ class SPARQLQueryEngine:
         
         return self.query(query)
     
+    def get_feedback_for_students(self, student_ids: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Obtém o feedback de vários estudantes com uma única consulta.
+        
+        Args:
+            student_ids: IRIs dos estudantes
+            
+        Returns:
+            Dicionário IRI do estudante -> feedbacks (como em ``get_feedback``)
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        query = """
+        PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
+        SELECT ?estudante ?feedback ?texto ?professor
+        WHERE {
+            %s
+            ?estudante ead:recebeFeedback ?feedback .
+            ?feedback ead:temTextoDeFeedback ?texto .
+            ?professor ead:forneceFeedback ?feedback .
+        }
+        """ % self._values_clause("estudante", student_ids)
+        return self._query_grouped(query, "estudante", student_ids)
+    
+    def get_prerequisites(self, course_id: str, transitive: bool = True) -> List[Dict]:
+        """
+        Obtém os pré-requisitos de um curso a partir do índice de fecho transitivo.
+        
+        Args:
+            course_id: IRI do curso
+            transitive: Se deve incluir pré-requisitos indiretos
+            
+        Returns:
+            Lista de pré-requisitos com título e tipo (direto/indireto)
+        """
+        return [
+            self._prerequisite_row(course_id, prereq)
+            for prereq in self.prerequisite_index.prerequisites(course_id, transitive)
+        ]
+    
+    def get_unlocked_courses(self, course_id: str, transitive: bool = True) -> List[Dict]:
+        """
+        Obtém os cursos desbloqueados pela conclusão de um curso.
+        
+        Args:
+            course_id: IRI do curso
+            transitive: Se deve incluir cursos desbloqueados indiretamente
+            
+        Returns:
+            Lista de cursos com título e tipo (direto/indireto)
+        """
+        return [
+            self._prerequisite_row(course, course_id)
+            for course in self.prerequisite_index.unlocks(course_id, transitive)
+        ]
+    
+    def get_prerequisite_closure(self) -> List[Dict]:
+        """
+        Obtém todos os pares curso/pré-requisito, diretos e indiretos.
+        
+        Returns:
+            Lista de pares com títulos e tipo (direto/indireto)
+        """
+        return [
+            self._prerequisite_row(course, prereq)
+            for course, prereq, _ in self.prerequisite_index.pairs()
+        ]
+    
+    def _prerequisite_row(self, course: str, prereq: str) -> Dict:
+        """Monta uma linha de resultado curso/pré-requisito."""
+        row = {'curso': course, 'preRequisito': prereq}
+        titulo_curso = self.graph.value(URIRef(course), self.EAD.temTitulo)
+        if titulo_curso is not None:
+            row['tituloCurso'] = str(titulo_curso)
+        titulo_prereq = self.graph.value(URIRef(prereq), self.EAD.temTitulo)
+        if titulo_prereq is not None:
+            row['tituloPreReq'] = str(titulo_prereq)
+        row['tipo'] = 'direto' if self.prerequisite_index.is_direct(course, prereq) else 'indireto'
+        return row
+    
     def get_competencies_for_course(self, course_id: str) -> List[Dict]:
         """
         Obtém competências e resultados de aprendizagem de um curso.
@@ -215,10 +721,36 @@ class SPARQLQueryEngine:
         
         return self.query(query)
     
+    def get_competencies_for_courses(self, course_ids: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Obtém as competências de vários cursos com uma única consulta.
+        
+        Args:
+            course_ids: IRIs dos cursos
+            
+        Returns:
+            Dicionário IRI do curso -> competências (como em ``get_competencies_for_course``)
+        """
+        course_ids = list(dict.fromkeys(course_ids))
+        query = """
+        PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
+        SELECT ?curso ?resultado ?competencia
+        WHERE {
+            %s
+            ?curso ead:possuiResultadoDeAprendizagem ?resultado .
+            ?resultado ead:possuiCompetencia ?competencia .
+        }
+        """ % self._values_clause("curso", course_ids)
+        return self._query_grouped(query, "curso", course_ids)
+    
     def check_consistency(self, entity_iri: str, property_iri: str, value: str) -> bool:
         """
         Verifica consistência ontológica de uma afirmação.
         
+        A entidade deve ser instância do domínio da propriedade e o valor
+        instância da imagem (ou literal válido para o datatype), considerando
+        a hierarquia de classes. Usa o índice de esquema em memória.
+        
         Args:
             entity_iri: IRI da entidade
             property_iri: IRI da propriedade
@@ -227,18 +759,17 @@ class SPARQLQueryEngine:
         Returns:
             True se consistente, False caso contrário
         """
-        # Verificar se a propriedade existe e se o domínio/range são compatíveis
-        query = """
-        PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        ASK {
-            <%s> rdf:type ?domain .
-            <%s> rdfs:domain ?domain .
-            <%s> rdfs:range ?range .
-            ?value rdf:type ?range .
-        }
-        """ % (property_iri, property_iri, property_iri)
+        return self.schema_index.check(entity_iri, property_iri, value)['consistent']
+    
+    def check_many(self, claims: List[Dict]) -> List[Dict]:
+        """
+        Verifica a consistência de várias afirmações.
         
-        result = self.graph.query(query)
-        return bool(result)
+        Args:
+            claims: Afirmações com campos entity, property e value
+            
+        Returns:
+            Resultados na mesma ordem, com consistent e reason (se inconsistente)
+        """
+        return self.schema_index.check_many(claims)
 
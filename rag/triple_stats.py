@@ -0,0 +1,139 @@
+"""
+Módulo com contadores de triplas do grafo de conhecimento.
+
+Contar triplas iterando o grafo custa O(N) a cada pedido de métricas. O
+``TripleStats`` é preenchido em uma única passagem na carga e depois
+mantido pelo ``KnowledgeGraph`` a cada alteração (triplas declaradas e
+exportação de inferências), separando declaradas de inferidas:
+
+- totais de triplas declaradas e inferidas
+- contagens por predicado
+- contagens de instâncias por classe (objeto de ``rdf:type``)
+
+As consultas (``summary``, ``count``) são leituras de contadores em O(1).
+"""
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from rdflib import RDF, OWL
+
+
+ASSERTED = 0
+INFERRED = 1
+
+# Tipos que declaram entidades do esquema
+_PROPERTY_TYPES = (OWL.ObjectProperty, OWL.DatatypeProperty, OWL.AnnotationProperty)
+
+
+class TripleStats:
+    """Contadores de triplas declaradas e inferidas, por predicado e por classe."""
+
+    def __init__(self):
+        self.asserted = 0
+        self.inferred = 0
+        self._by_predicate: Dict = defaultdict(lambda: [0, 0])
+        self._by_class: Dict = defaultdict(lambda: [0, 0])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_graph(cls, graph: Iterable[Tuple],
+                   is_inferred: Optional[Callable[[Tuple], bool]] = None) -> "TripleStats":
+        """
+        Conta as triplas de um grafo (uma passagem).
+
+        Args:
+            graph: Grafo rdflib (ou iterável de triplas)
+            is_inferred: Função que indica se uma tripla é inferida (padrão:
+                todas declaradas)
+
+        Returns:
+            Contadores preenchidos
+        """
+        stats = cls()
+        for triple in graph:
+            stats._count(triple, INFERRED if is_inferred and is_inferred(triple) else ASSERTED, 1)
+        return stats
+
+    def _count(self, triple: Tuple, kind: int, delta: int):
+        """Atualiza os contadores de uma tripla."""
+        _, p, o = triple
+        if kind == ASSERTED:
+            self.asserted += delta
+        else:
+            self.inferred += delta
+        self._by_predicate[p][kind] += delta
+        if p == RDF.type:
+            self._by_class[o][kind] += delta
+
+    def update(self, added: Iterable[Tuple], removed: Iterable[Tuple], inferred: bool = False):
+        """
+        Aplica uma alteração do grafo.
+
+        Args:
+            added: Triplas adicionadas
+            removed: Triplas removidas
+            inferred: Se as triplas são inferidas
+        """
+        kind = INFERRED if inferred else ASSERTED
+        with self._lock:
+            for triple in added:
+                self._count(triple, kind, 1)
+            for triple in removed:
+                self._count(triple, kind, -1)
+
+    @property
+    def total(self) -> int:
+        """Total de triplas visíveis no grafo."""
+        return self.asserted + self.inferred
+
+    def count(self, predicate=None, cls=None) -> Dict[str, int]:
+        """
+        Contagem de um predicado ou das instâncias de uma classe.
+
+        Args:
+            predicate: IRI do predicado
+            cls: IRI da classe
+
+        Returns:
+            Dicionário com ``asserted`` e ``inferred``
+        """
+        counters = self._by_predicate if predicate is not None else self._by_class
+        asserted, inferred = counters.get(predicate if predicate is not None else cls, (0, 0))
+        return {'asserted': asserted, 'inferred': inferred}
+
+    def summary(self) -> Dict[str, int]:
+        """Totais (declaradas, inferidas, classes e propriedades declaradas)."""
+        return {
+            'asserted': self.asserted,
+            'inferred': self.inferred,
+            'total': self.total,
+            'classes': self.count(cls=OWL.Class)['asserted'],
+            'properties': sum(self.count(cls=t)['asserted'] for t in _PROPERTY_TYPES),
+            'predicates': len(self._by_predicate)
+        }
+
+    def _top(self, counters: Dict, limit: Optional[int]) -> List[Dict]:
+        """Entradas com mais triplas (declaradas + inferidas)."""
+        with self._lock:
+            rows = [(term, a, i) for term, (a, i) in counters.items() if a or i]
+        rows.sort(key=lambda row: row[1] + row[2], reverse=True)
+        return [
+            {'iri': str(term), 'asserted': a, 'inferred': i}
+            for term, a, i in rows[:limit]
+        ]
+
+    def to_dict(self, limit: Optional[int] = 20) -> Dict:
+        """
+        Totais e detalhamento por predicado e por classe.
+
+        Args:
+            limit: Número máximo de predicados/classes listados
+
+        Returns:
+            Dicionário serializável em JSON
+        """
+        return {
+            **self.summary(),
+            'by_predicate': self._top(self._by_predicate, limit),
+            'by_class': self._top(self._by_class, limit)
+        }
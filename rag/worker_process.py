@@ -0,0 +1,259 @@
+"""
+Módulo com processos de trabalho de longa duração.
+
+Cada worker é um subprocesso Python independente (``python -m <módulo>``)
+que se conecta de volta ao processo pai por um socket local autenticado
+(``multiprocessing.connection``). Usar um subprocesso, em vez de
+``multiprocessing.Process``, evita que o worker reimporte o módulo
+principal da API e permite matá-lo a qualquer momento sem afetar o pai.
+
+Respostas grandes podem vir em partes (``request_stream``): o worker envia
+uma parte por vez e só produz a seguinte quando o pai a pede, de modo que
+nenhum dos lados acumula a resposta inteira.
+"""
+import os
+import sys
+import time
+import secrets
+import threading
+import subprocess
+from types import GeneratorType
+from multiprocessing.connection import Listener, Client, Connection
+from typing import Any, Callable, Iterator, List, Optional
+
+
+AUTHKEY_ENV = "MORA_WORKER_AUTHKEY"
+ADDRESS_ENV = "MORA_WORKER_ADDRESS"
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class WorkerUnavailable(RuntimeError):
+    """O worker não iniciou, morreu ou não respondeu."""
+
+
+class WorkerProcess:
+    """Subprocesso de trabalho com canal de mensagens request/response."""
+
+    def __init__(self, module: str, args: Optional[List[str]] = None):
+        """
+        Inicia o subprocesso.
+
+        Args:
+            module: Módulo executado com ``python -m`` (deve chamar ``serve``)
+            args: Argumentos de linha de comando do worker
+        """
+        self.module = module
+        self._authkey = secrets.token_bytes(32)
+        self._listener = Listener(("127.0.0.1", 0), authkey=self._authkey)
+        self._conn: Optional[Connection] = None
+        self._connected = threading.Event()
+        self.ready_info: Any = None
+
+        host, port = self._listener.address
+        env = dict(os.environ)
+        env[AUTHKEY_ENV] = self._authkey.hex()
+        env[ADDRESS_ENV] = f"{host}:{port}"
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", module] + list(args or []),
+            cwd=_PROJECT_ROOT,
+            env=env
+        )
+
+        # Aceitar a conexão em segundo plano para não bloquear o chamador
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        """Aceita a conexão do subprocesso."""
+        try:
+            self._conn = self._listener.accept()
+        except Exception:
+            self._conn = None
+        finally:
+            self._listener.close()
+            self._connected.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> Any:
+        """
+        Aguarda o worker conectar e terminar a inicialização.
+
+        Args:
+            timeout: Tempo máximo de espera em segundos
+
+        Returns:
+            Informações enviadas pelo worker ao ficar pronto
+
+        Raises:
+            WorkerUnavailable: Se o worker não ficar pronto a tempo
+        """
+        if self.ready_info is not None:
+            return self.ready_info
+        if not self._connected.wait(timeout) or self._conn is None:
+            raise WorkerUnavailable(f"Worker {self.module} não conectou")
+        if not self._conn.poll(timeout):
+            raise WorkerUnavailable(f"Worker {self.module} não ficou pronto a tempo")
+        status, payload = self._conn.recv()
+        if status != "ready":
+            raise WorkerUnavailable(f"Worker {self.module} falhou ao iniciar: {payload}")
+        self.ready_info = payload
+        return payload
+
+    def request(self, message: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Envia uma mensagem e aguarda a resposta.
+
+        Args:
+            message: Mensagem (serializável com pickle)
+            timeout: Prazo em segundos; se expirar, o worker é morto
+
+        Returns:
+            Resposta do worker
+
+        Raises:
+            TimeoutError: Se o prazo expirar
+            WorkerUnavailable: Se o worker morrer durante a requisição
+        """
+        self._send(message)
+        return self._reply(timeout)
+
+    def request_stream(self, message: Any, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Envia uma mensagem cuja resposta vem em partes.
+
+        Cada parte só é produzida pelo worker depois que a anterior é
+        consumida. Se o consumidor parar antes do fim, o worker é avisado,
+        descarta o restante e continua disponível.
+
+        Args:
+            message: Mensagem (serializável com pickle)
+            timeout: Prazo em segundos para produzir a resposta inteira (só
+                conta o tempo esperando o worker, não o de consumo das
+                partes); se expirar, o worker é morto
+
+        Yields:
+            Cada parte da resposta
+
+        Raises:
+            TimeoutError: Se o prazo expirar
+            WorkerUnavailable: Se o worker morrer durante a requisição
+            ValueError: Se o worker responder com erro
+        """
+        self._send(message)
+        finished = False
+        remaining = timeout
+        try:
+            while True:
+                start = time.monotonic()
+                status, payload = self._reply(remaining, timeout)
+                if remaining is not None:
+                    remaining = max(remaining - (time.monotonic() - start), 0.0)
+                if status != "chunk":
+                    finished = True
+                    if status == "error":
+                        raise ValueError(payload)
+                    return
+                yield payload
+                self._send("next")
+        finally:
+            if not finished and self.is_alive():
+                # Consumidor parou antes do fim: interromper a produção
+                try:
+                    self._send("stop")
+                    while self._reply(timeout)[0] == "chunk":
+                        self._send("stop")
+                except (TimeoutError, WorkerUnavailable):
+                    pass
+
+    def _send(self, message: Any):
+        """Envia uma mensagem ao worker."""
+        try:
+            self._conn.send(message)
+        except (EOFError, OSError) as e:
+            self.kill()
+            raise WorkerUnavailable(f"Worker {self.module} encerrou inesperadamente: {e}")
+
+    def _reply(self, timeout: Optional[float], budget: Optional[float] = None) -> Any:
+        """
+        Aguarda a próxima mensagem do worker; mata o worker se o prazo expirar.
+
+        Args:
+            timeout: Tempo máximo de espera em segundos
+            budget: Prazo total citado no erro (padrão: ``timeout``)
+        """
+        try:
+            if self._conn.poll(timeout):
+                return self._conn.recv()
+        except (EOFError, OSError) as e:
+            self.kill()
+            raise WorkerUnavailable(f"Worker {self.module} encerrou inesperadamente: {e}")
+
+        self.kill()
+        raise TimeoutError(f"Worker {self.module} excedeu o prazo de {budget or timeout}s")
+
+    def is_alive(self) -> bool:
+        """Verifica se o subprocesso ainda está em execução."""
+        return self.process.poll() is None
+
+    def kill(self):
+        """Mata o subprocesso imediatamente."""
+        if self.is_alive():
+            self.process.kill()
+            self.process.wait()
+        if self._conn is not None:
+            self._conn.close()
+
+    def close(self, timeout: float = 5.0):
+        """Pede o encerramento do worker e o mata se não sair a tempo."""
+        try:
+            if self._conn is not None and self.is_alive():
+                self._conn.send(("shutdown", None))
+                self.process.wait(timeout)
+        except Exception:
+            pass
+        self.kill()
+
+
+def serve(setup: Callable[[], Any], handle: Callable[[Any, str, Any], Any]):
+    """
+    Laço principal do lado do worker.
+
+    Conecta ao processo pai, executa ``setup`` uma vez e responde às
+    mensagens ``(operação, payload)`` com ``("ok", resultado)`` ou
+    ``("error", mensagem)``. Se ``handle`` retornar um gerador, cada item é
+    enviado como ``("chunk", item)`` e o próximo só é produzido quando o pai
+    responde ``"next"`` (``"stop"`` encerra o gerador); ``("ok", None)``
+    fecha a resposta. A operação ``shutdown`` encerra o laço.
+
+    Args:
+        setup: Inicialização; retorna o estado do worker e pode expor
+            ``ready_info`` para o pai
+        handle: Função ``handle(estado, operação, payload)``
+    """
+    host, port = os.environ[ADDRESS_ENV].rsplit(":", 1)
+    conn = Client((host, int(port)), authkey=bytes.fromhex(os.environ[AUTHKEY_ENV]))
+    try:
+        state = setup()
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+    conn.send(("ready", getattr(state, "ready_info", None)))
+
+    while True:
+        try:
+            op, payload = conn.recv()
+        except EOFError:
+            break
+        if op == "shutdown":
+            break
+        try:
+            result = handle(state, op, payload)
+            if isinstance(result, GeneratorType):
+                for part in result:
+                    conn.send(("chunk", part))
+                    if conn.recv() != "next":
+                        result.close()
+                        break
+                result = None
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
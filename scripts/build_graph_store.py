@@ -0,0 +1,48 @@
+"""
+Script para converter a ontologia em um store de carga rápida.
+
+Uso:
+    python scripts/build_graph_store.py [--store snapshot|berkeleydb|quadstore] [--output CAMINHO]
+"""
+import os
+import sys
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag.graph_store import build_store, load_graph, load_owlready_world, release_owlready_world
+from rag.knowledge_graph import _get_ontology_path
+
+
+def main():
+    """Converte a ontologia e verifica o store gerado."""
+    parser = argparse.ArgumentParser(description="Converte a ontologia para um store persistente")
+    parser.add_argument("--ontology", default="ontologia_mora.owl", help="Arquivo OWL de origem")
+    parser.add_argument("--store", default="snapshot", choices=["snapshot", "berkeleydb", "quadstore"],
+                        help="Backend de destino")
+    parser.add_argument("--output", default=None, help="Caminho de destino (opcional)")
+    args = parser.parse_args()
+
+    ontology_path = _get_ontology_path(args.ontology)
+    print(f"Convertendo {ontology_path} para '{args.store}'...")
+
+    start = time.perf_counter()
+    store_path = build_store(ontology_path, args.store, args.output)
+    print(f"Store gerado em {store_path} ({time.perf_counter() - start:.2f}s)")
+
+    start = time.perf_counter()
+    if args.store == "quadstore":
+        if args.output:
+            os.environ["OWLREADY_QUADSTORE_PATH"] = store_path
+        world, _ = load_owlready_world(ontology_path, read_only=True)
+        print(f"Quadstore reaberto com {len(world.graph)} triplas ({time.perf_counter() - start:.2f}s)")
+        release_owlready_world(world)
+        print("Concluído! O reasoner abre o quadstore automaticamente (OWLREADY_QUADSTORE=1).")
+        return
+    graph = load_graph(ontology_path, args.store, store_path)
+    print(f"Store reaberto com {len(graph)} triplas ({time.perf_counter() - start:.2f}s)")
+    print("Concluído! Use GRAPH_STORE=%s para abrir o grafo a partir do store." % args.store)
+
+
+if __name__ == "__main__":
+    main()
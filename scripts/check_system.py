@@ -62,7 +62,7 @@ def check_llm():
     print("\n=== Verificando LLM ===")
     try:
         llm = _get_llm()
-        print(f"✓ LLM disponível: {type(llm).__name__}")
+        print(f"✓ LLM disponível: {type(llm.model).__name__} ({llm.backend.kind})")
         return True
     except Exception as e:
         print(f"  ✗ LLM não disponível: {e}")
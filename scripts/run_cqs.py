@@ -39,18 +39,8 @@ def run_cq2():
     print("\n=== CQ2: Recursos utilizados em módulos ===")
     engine = SPARQLQueryEngine()
     
-    query = """
-    PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
-    SELECT ?recurso ?modulo ?tituloRecurso
-    WHERE {
-        ?curso ead:possuiModulo ?modulo .
-        ?modulo ead:possuiAula ?aula .
-        ?aula ead:utilizaRecurso ?recurso .
-        OPTIONAL { ?recurso ead:temTitulo ?tituloRecurso . }
-    }
-    """
-    
-    results = engine.query(query)
+    # Caminhos curso → módulo → aula → recurso (índice materializado)
+    results = engine.get_course_resource_paths()
     print(f"Resultados encontrados: {len(results)}")
     for result in results:
         print(f"  Recurso: {result.get('recurso', 'N/A')}")
@@ -64,21 +54,12 @@ def run_cq3():
     print("\n=== CQ3: Pré-requisitos de cursos ===")
     engine = SPARQLQueryEngine()
     
-    query = """
-    PREFIX ead: <http://www.exemplo.org/ead-ontologia#>
-    SELECT ?curso ?preRequisito ?tituloCurso ?tituloPreReq
-    WHERE {
-        ?curso ead:possuiPreRequisito ?preRequisito .
-        OPTIONAL { ?curso ead:temTitulo ?tituloCurso . }
-        OPTIONAL { ?preRequisito ead:temTitulo ?tituloPreReq . }
-    }
-    """
-    
-    results = engine.query(query)
+    # Fecho transitivo de possuiPreRequisito (índice materializado)
+    results = engine.get_prerequisite_closure()
     print(f"Resultados encontrados: {len(results)}")
     for result in results:
         print(f"  Curso: {result.get('tituloCurso', result.get('curso', 'N/A'))}")
-        print(f"  Pré-requisito: {result.get('tituloPreReq', result.get('preRequisito', 'N/A'))}")
+        print(f"  Pré-requisito: {result.get('tituloPreReq', result.get('preRequisito', 'N/A'))} ({result.get('tipo')})")
         print()
 
 
@@ -226,9 +207,7 @@ def run_cq9():
     WHERE {
         ?estudante a ead:Estudante .
         ?estudante ead:matriculadoEm ?curso .
-        ?perfil ead:temPapel ?papel .
-        ?papel a ead:Estudante .
-        ?perfil ead:temEmail ?email .
+        ?estudante ead:temEmail ?email .
         OPTIONAL { ?curso ead:temTitulo ?tituloCurso . }
     }
     """